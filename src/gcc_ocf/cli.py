@@ -23,70 +23,10 @@ import sys
 from pathlib import Path
 
 from gcc_ocf.dir_pipeline_spec import DirPipelineSpecError, load_dir_pipeline_spec
-from gcc_ocf.errors import EXIT_CODES, GCCOCFError
+from gcc_ocf.errors import EXIT_GENERIC, EXIT_OK, EXIT_USAGE, GCCOCFError
 from gcc_ocf.pipeline_spec import PipelineSpecError, load_pipeline_spec
 
 
-def _build_exit_code_map() -> dict[str, int]:
-    """Normalize EXIT_CODES to a mapping: name -> int code.
-
-    Project history note: EXIT_CODES has existed in a few shapes:
-      - dict[str, int]
-      - dict[str, ExitCodeLike]
-      - sequence of (name, code)
-      - sequence of (code, name, meaning)
-    We accept all of them to keep the CLI robust across refactors.
-    """
-
-    if isinstance(EXIT_CODES, dict):
-        out: dict[str, int] = {}
-        for k, v in EXIT_CODES.items():
-            # v might already be an int, or an object with .code, etc.
-            if isinstance(v, int):
-                out[str(k)] = int(v)
-            else:
-                code = getattr(v, "code", None)
-                if isinstance(code, int):
-                    out[str(k)] = int(code)
-        return out
-
-    out: dict[str, int] = {}
-    if isinstance(EXIT_CODES, (list, tuple)):
-        for item in EXIT_CODES:
-            if not isinstance(item, (list, tuple)):
-                continue
-
-            # (name, code)
-            if len(item) == 2 and isinstance(item[0], str):
-                name, code = item
-                if isinstance(code, int):
-                    out[str(name)] = int(code)
-                continue
-
-            # (code, name, meaning)
-            if len(item) >= 2 and isinstance(item[0], int) and isinstance(item[1], str):
-                code = int(item[0])
-                name = str(item[1])
-                out[name] = code
-                continue
-
-    return out
-
-
-_EXIT_CODE_BY_NAME: dict[str, int] = _build_exit_code_map()
-_EXIT_CODE_BY_NAME.setdefault("OK", 0)
-_EXIT_CODE_BY_NAME.setdefault("USAGE", 2)
-_EXIT_CODE_BY_NAME.setdefault("GENERIC", 10)
-
-
-def _ec(name: str, default: int | None = None) -> int:
-    """Lookup exit code by symbolic name (e.g. 'OK', 'USAGE', 'GENERIC')."""
-    if name in _EXIT_CODE_BY_NAME:
-        return int(_EXIT_CODE_BY_NAME[name])
-    if default is not None:
-        return int(default)
-    raise KeyError(f"exit code not found: {name}")
-
 def _pkg_version() -> str:
     try:
         from importlib.metadata import PackageNotFoundError, version  # py3.8+
@@ -168,7 +108,7 @@ def _semantic_file_compress(
             codec_id=codec.strip(),
         )
 
-    return int(_ec("OK"))
+    return EXIT_OK
 
 
 def _semantic_file_compress_from_pipeline(
@@ -207,7 +147,7 @@ def _semantic_file_compress_from_pipeline(
             codec_id=codec_id,
         )
 
-    return int(_ec("OK"))
+    return EXIT_OK
 
 
 def _semantic_file_decompress(input_path: Path, output_path: Path) -> int:
@@ -215,28 +155,28 @@ def _semantic_file_decompress(input_path: Path, output_path: Path) -> int:
     from gcc_ocf.legacy.gcc_huffman import decompress_file_v7
 
     decompress_file_v7(str(input_path), str(output_path))
-    return int(_ec("OK"))
+    return EXIT_OK
 
 
 def _semantic_extract_numbers_only(input_path: Path, output_path: Path) -> int:
     from gcc_ocf.legacy.gcc_huffman import extract_numbers_only
 
     extract_numbers_only(str(input_path), str(output_path))
-    return int(_ec("OK"))
+    return EXIT_OK
 
 
 def _semantic_extract_show(input_path: Path) -> int:
     from gcc_ocf.legacy.gcc_huffman import extract_show
 
     extract_show(str(input_path))
-    return int(_ec("OK"))
+    return EXIT_OK
 
 
 def _semantic_file_pipeline_validate(pipeline_arg: str) -> int:
     # load is the validation
     load_pipeline_spec(pipeline_arg)
     print("OK")
-    return int(_ec("OK"))
+    return EXIT_OK
 
 
 def _semantic_file_verify(input_path: Path, *, full: bool, json_out: bool) -> int:
@@ -244,7 +184,7 @@ def _semantic_file_verify(input_path: Path, *, full: bool, json_out: bool) -> in
     from gcc_ocf.verify import verify_container_file
 
     if not input_path.is_file():
-        code = int(_ec("USAGE"))
+        code = EXIT_USAGE
         if json_out:
             err = {
                 "schema": "gcc-ocf.verify.v1",
@@ -271,7 +211,7 @@ def _semantic_file_verify(input_path: Path, *, full: bool, json_out: bool) -> in
         _print_verify_json("file", input_path, full=full)
     else:
         print("OK")
-    return int(_ec("OK"))
+    return EXIT_OK
 
 
 def _semantic_dir_verify(input_dir: Path, *, full: bool, json_out: bool) -> int:
@@ -303,13 +243,13 @@ def _semantic_dir_verify(input_dir: Path, *, full: bool, json_out: bool) -> int:
         _print_verify_json(kind, input_dir, full=full)
     else:
         print("OK")
-    return int(_ec("OK"))
+    return EXIT_OK
 
 
 def _semantic_dir_pipeline_validate(pipeline_arg: str) -> int:
     load_dir_pipeline_spec(pipeline_arg)
     print("OK")
-    return int(_ec("OK"))
+    return EXIT_OK
 
 
 def _semantic_dir_pack(
@@ -329,13 +269,13 @@ def _semantic_dir_pack(
         from gcc_ocf.single_container_mixed_dir import pack_single_container_mixed_dir
 
         pack_single_container_mixed_dir(input_dir, output_dir, keep_concat=keep_concat)
-        return int(_ec("OK"))
+        return EXIT_OK
 
     if single_container:
         from gcc_ocf.single_container_dir import pack_single_container_dir
 
         pack_single_container_dir(input_dir, output_dir, keep_concat=keep_concat)
-        return int(_ec("OK"))
+        return EXIT_OK
 
     from gcc_ocf.legacy.gcc_dir import packdir
 
@@ -360,7 +300,7 @@ def _semantic_dir_pack(
         )
     except TypeError:
         packdir(input_dir, output_dir, buckets=b, dir_spec=dir_spec, jobs=int(jobs))
-    return int(_ec("OK"))
+    return EXIT_OK
 
 
 def _semantic_dir_unpack(input_dir: Path, restore_dir: Path) -> int:
@@ -377,7 +317,7 @@ def _semantic_dir_unpack(input_dir: Path, restore_dir: Path) -> int:
         unpack_single_container_dir(input_dir, restore_dir)
     else:
         unpackdir(input_dir, restore_dir)
-    return int(_ec("OK"))
+    return EXIT_OK
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -671,20 +611,20 @@ def main(argv: list[str] | None = None) -> int:
         if getattr(ns, "debug", False):
             raise
         print(f"[gcc-ocf] {e}", file=sys.stderr)
-        return int(_ec("USAGE"))
+        return EXIT_USAGE
 
     except GCCOCFError as e:
         if getattr(ns, "debug", False):
             raise
         print(f"[gcc-ocf] {e}", file=sys.stderr)
         code = getattr(e, "exit_code", None)
-        return int(code) if code else int(_ec("GENERIC"))
+        return int(code) if code else EXIT_GENERIC
 
     except Exception as e:
         if getattr(ns, "debug", False):
             raise
         print(f"[gcc-ocf] error: {e}", file=sys.stderr)
-        return int(_ec("GENERIC"))
+        return EXIT_GENERIC
 
 
 if __name__ == "__main__":
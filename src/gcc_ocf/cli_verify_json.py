@@ -22,7 +22,7 @@ import sys
 from pathlib import Path
 
 from gcc_ocf.dir_pipeline_spec import DirPipelineSpecError, load_dir_pipeline_spec
-from gcc_ocf.errors import GCCOCFError
+from gcc_ocf.errors import EXIT_GENERIC, EXIT_OK, EXIT_USAGE, GCCOCFError
 from gcc_ocf.pipeline_spec import PipelineSpecError, load_pipeline_spec
 
 
@@ -128,7 +128,7 @@ def _semantic_file_compress(
             codec_id=codec.strip(),
         )
 
-    return 0
+    return EXIT_OK
 
 
 def _semantic_file_compress_from_pipeline(
@@ -165,7 +165,7 @@ def _semantic_file_compress_from_pipeline(
             codec_id=codec_id,
         )
 
-    return 0
+    return EXIT_OK
 
 
 def _semantic_file_decompress(input_path: Path, output_path: Path) -> int:
@@ -176,28 +176,28 @@ def _semantic_file_decompress(input_path: Path, output_path: Path) -> int:
     from gcc_ocf.legacy.gcc_huffman import decompress_file_v7
 
     decompress_file_v7(str(input_path), str(output_path))
-    return 0
+    return EXIT_OK
 
 
 def _semantic_extract_numbers_only(input_path: Path, output_path: Path) -> int:
     from gcc_ocf.legacy.gcc_huffman import extract_numbers_only
 
     extract_numbers_only(str(input_path), str(output_path))
-    return 0
+    return EXIT_OK
 
 
 def _semantic_extract_show(input_path: Path) -> int:
     from gcc_ocf.legacy.gcc_huffman import extract_show
 
     extract_show(str(input_path))
-    return 0
+    return EXIT_OK
 
 
 def _semantic_file_pipeline_validate(pipeline_arg: str) -> int:
     # load is the validation
     load_pipeline_spec(pipeline_arg)
     print("OK")
-    return 0
+    return EXIT_OK
 
 
 def _semantic_file_verify(input_path: Path, *, full: bool, json_out: bool) -> int:
@@ -214,7 +214,7 @@ def _semantic_file_verify(input_path: Path, *, full: bool, json_out: bool) -> in
                 err_type="FileNotFound",
                 message=f"file non trovato: {input_path}",
             )
-            return 2
+            return EXIT_USAGE
         raise
     except Exception as e:
         # For --json we must emit JSON on stderr (stable schema).
@@ -226,14 +226,14 @@ def _semantic_file_verify(input_path: Path, *, full: bool, json_out: bool) -> in
                 err_type=type(e).__name__,
                 message=str(e),
             )
-            return 10
+            return EXIT_GENERIC
         raise
 
     if json_out:
         _print_verify_json("file", input_path, full=full)
     else:
         print("OK")
-    return 0
+    return EXIT_OK
 
 
 
@@ -266,13 +266,13 @@ def _semantic_dir_verify(input_dir: Path, *, full: bool, json_out: bool) -> int:
         _print_verify_json(kind, input_dir, full=full)
     else:
         print("OK")
-    return 0
+    return EXIT_OK
 
 
 def _semantic_dir_pipeline_validate(pipeline_arg: str) -> int:
     load_dir_pipeline_spec(pipeline_arg)
     print("OK")
-    return 0
+    return EXIT_OK
 
 
 def _semantic_dir_pack(
@@ -290,13 +290,13 @@ def _semantic_dir_pack(
         from gcc_ocf.single_container_mixed_dir import pack_single_container_mixed_dir
 
         pack_single_container_mixed_dir(input_dir, output_dir, keep_concat=keep_concat)
-        return 0
+        return EXIT_OK
 
     if single_container:
         from gcc_ocf.single_container_dir import pack_single_container_dir
 
         pack_single_container_dir(input_dir, output_dir, keep_concat=keep_concat)
-        return 0
+        return EXIT_OK
 
     from gcc_ocf.legacy.gcc_dir import packdir
 
@@ -308,7 +308,7 @@ def _semantic_dir_pack(
         else (int(dir_spec.buckets) if dir_spec and dir_spec.buckets is not None else 16)
     )
     packdir(input_dir, output_dir, buckets=b, dir_spec=dir_spec, jobs=int(jobs))
-    return 0
+    return EXIT_OK
 
 
 def _semantic_dir_unpack(input_dir: Path, restore_dir: Path) -> int:
@@ -325,7 +325,7 @@ def _semantic_dir_unpack(input_dir: Path, restore_dir: Path) -> int:
         unpack_single_container_dir(input_dir, restore_dir)
     else:
         unpackdir(input_dir, restore_dir)
-    return 0
+    return EXIT_OK
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -579,17 +579,17 @@ def main(argv: list[str] | None = None) -> int:
         if getattr(ns, "debug", False):
             raise
         print(f"[gcc-ocf] {e}", file=sys.stderr)
-        return 2
+        return EXIT_USAGE
     except GCCOCFError as e:
         if getattr(ns, "debug", False):
             raise
         print(f"[gcc-ocf] {e}", file=sys.stderr)
-        return int(getattr(e, "exit_code", 10) or 10)
+        return int(getattr(e, "exit_code", EXIT_GENERIC) or EXIT_GENERIC)
     except Exception as e:
         if getattr(ns, "debug", False):
             raise
         print(f"[gcc-ocf] error: {e}", file=sys.stderr)
-        return 10
+        return EXIT_GENERIC
 
 
 if __name__ == "__main__":
@@ -7,6 +7,15 @@ StreamKind = Literal["bytes", "ids"]
 EncodingKind = Literal["raw", "huffman"]
 
 
+def as_bytes(x: bytes | bytearray | memoryview) -> bytes:
+    """
+    bytes senza copia quando lo è già (il caso comune per i payload degli stream).
+
+    Check su type esatto: bytearray/memoryview/sottoclassi vengono copiati.
+    """
+    return x if type(x) is bytes else bytes(x)
+
+
 @dataclass(frozen=True)
 class SymbolStream:
     name: str
@@ -29,13 +29,20 @@ def build_freq_table(data: bytes) -> list[int]:
 
 
 def build_huffman_tree(freq: list[int]) -> HuffmanNode | None:
+    return build_huffman_tree_used(((sym, f) for sym, f in enumerate(freq) if f > 0), len(freq))
+
+
+def build_huffman_tree_used(used, alphabet_size: int) -> HuffmanNode | None:
+    """
+    Come build_huffman_tree, ma da coppie sparse (sym, freq) con freq > 0,
+    in ordine crescente di sym (stesso ordine di inserimento => stesso albero).
+    """
     heap: list[tuple[int, int, HuffmanNode]] = []
     counter = itertools.count()
 
-    for sym, f in enumerate(freq):
-        if f > 0:
-            node = HuffmanNode(freq=f, symbol=sym)
-            heapq.heappush(heap, (f, next(counter), node))
+    for sym, f in used:
+        node = HuffmanNode(freq=f, symbol=sym)
+        heapq.heappush(heap, (f, next(counter), node))
 
     if not heap:
         return None
@@ -43,7 +50,7 @@ def build_huffman_tree(freq: list[int]) -> HuffmanNode | None:
     # Caso speciale: un solo simbolo => aggiungo dummy
     if len(heap) == 1:
         f, _, only = heap[0]
-        dummy_symbol = (only.symbol + 1) % len(freq)
+        dummy_symbol = (only.symbol + 1) % alphabet_size
         dummy = HuffmanNode(freq=0, symbol=dummy_symbol)
         heapq.heappush(heap, (0, next(counter), dummy))
 
@@ -159,6 +166,18 @@ def huffman_decompress_core(freq: list[int], bitstream: bytes, N: int, lastbits:
     return decode_bitstream(root, bitstream, N, lastbits)
 
 
+def huffman_decompress_core_used(
+    used, alphabet_size: int, bitstream: bytes, N: int, lastbits: int
+) -> bytes:
+    """
+    Come huffman_decompress_core, ma da coppie sparse (sym, freq): niente tabella densa.
+    """
+    root = build_huffman_tree_used(used, alphabet_size)
+    if root is None or N == 0:
+        return b""
+    return decode_bitstream(root, bitstream, N, lastbits)
+
+
 def huffman_compress_ids(id_stream: list[int], vocab_size: int) -> tuple[list[int], int, bytes]:
     """
     Variante di huffman_compress_core, ma per una sequenza di ID interi 0..vocab_size-1.
@@ -222,7 +241,29 @@ def huffman_decompress_ids(
     if not freq:
         raise ValueError("freq vuoto in huffman_decompress_ids")
 
-    root = build_huffman_tree(freq)
+    return _decode_ids_from_tree(build_huffman_tree(freq), N_symbols, lastbits, bitstream)
+
+
+def huffman_decompress_ids_used(
+    used, alphabet_size: int, N_symbols: int, lastbits: int, bitstream: bytes
+) -> list[int]:
+    """
+    Come huffman_decompress_ids, ma da coppie sparse (sym, freq): niente tabella densa.
+    """
+    if N_symbols == 0:
+        return []
+
+    if alphabet_size <= 0:
+        raise ValueError("freq vuoto in huffman_decompress_ids")
+
+    return _decode_ids_from_tree(
+        build_huffman_tree_used(used, alphabet_size), N_symbols, lastbits, bitstream
+    )
+
+
+def _decode_ids_from_tree(
+    root: HuffmanNode | None, N_symbols: int, lastbits: int, bitstream: bytes
+) -> list[int]:
     if root is None:
         return []
 
@@ -271,6 +312,15 @@ class CodecHuffman(Codec):
     def decompress_ids(self, freq, n_symbols: int, lastbits: int, bitstream: bytes):
         return huffman_decompress_ids(freq, n_symbols, lastbits, bitstream)
 
+    # Varianti sparse: (sym, freq) ordinati per sym, freq > 0
+    def decompress_bytes_used(self, used, alphabet_size: int, bitstream: bytes, n: int, lastbits):
+        return huffman_decompress_core_used(used, alphabet_size, bitstream, n, lastbits)
+
+    def decompress_ids_used(
+        self, used, alphabet_size: int, n_symbols: int, lastbits: int, bitstream: bytes
+    ):
+        return huffman_decompress_ids_used(used, alphabet_size, n_symbols, lastbits, bitstream)
+
 
 # ============================================================
 # Huffman Bundle v1 (multi-stream)
@@ -503,7 +553,7 @@ def pack_huffman_bundle(encoded_streams: list[EncodedStream]) -> bytes:
 
 
 def unpack_huffman_bundle(payload: bytes) -> list[EncodedStream]:
-    if len(payload) < 5 or payload[:4] != BUNDLE_MAGIC:
+    if len(payload) < 5 or not payload.startswith(BUNDLE_MAGIC):
         raise ValueError("payload non è un Huffman bundle")
     idx = 4
     n_streams = payload[idx]
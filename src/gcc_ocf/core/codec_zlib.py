@@ -16,8 +16,8 @@ class CodecZlib:
             raise TypeError("data must be bytes")
         return zlib.compress(bytes(data), self.level)
 
-    def decompress(self, comp: bytes, out_size: int | None = None) -> bytes:
-        # out_size is ignored for zlib
-        if not isinstance(comp, (bytes, bytearray)):
+    def decompress(self, comp: bytes | memoryview, out_size: int | None = None) -> bytes:
+        # out_size is ignored for zlib; memoryview (MBN stream views) is read without copying
+        if not isinstance(comp, (bytes, bytearray, memoryview)):
             raise TypeError("comp must be bytes")
-        return zlib.decompress(bytes(comp))
+        return zlib.decompress(comp)
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 
 try:
     import zstandard as zstd  # type: ignore
@@ -23,30 +26,84 @@ class CodecZstd:
     codec_id: str = "zstd"
     tight: bool = False
 
+    # contesti riusati dentro batch() (per-thread: i ctx zstd non sono thread-safe)
+    _local: threading.local = field(
+        default_factory=threading.local, init=False, repr=False, compare=False
+    )
+
+    def __getstate__(self) -> dict:
+        # pickle/copy/deepcopy: i contesti per-thread non si trasferiscono (threading.local
+        # non è picklabile) e la copia non deve condividere il batch dell'originale
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+
     def _require(self) -> None:
         if zstd is None:
             raise RuntimeError(
                 "Modulo 'zstandard' non disponibile. Installa con: python3 -m pip install zstandard"
             )
 
-    def compress(self, data: bytes) -> bytes:
-        self._require()
-
+    def _new_compressor(self):
         if self.tight:
             # Tenta di ridurre il frame overhead (più simile a "raw" minimale)
-            c = zstd.ZstdCompressor(
+            return zstd.ZstdCompressor(
                 level=int(self.level),
                 write_content_size=False,
                 write_checksum=False,
             )
-        else:
-            c = zstd.ZstdCompressor(level=int(self.level))
+        return zstd.ZstdCompressor(level=int(self.level))
 
+    @contextmanager
+    def batch(self) -> Iterator[CodecZstd]:
+        """
+        Riusa un solo ZstdCompressor/ZstdDecompressor per tutte le chiamate nel blocco
+        (bundle con molti stream piccoli: niente re-alloc dei buffer interni per stream).
+        """
+        self._require()
+        loc = self._local
+        if getattr(loc, "cctx", None) is not None:
+            # batch annidato: riusa i contesti esterni
+            yield self
+            return
+        loc.cctx = self._new_compressor()
+        loc.dctx = zstd.ZstdDecompressor()
+        try:
+            yield self
+        finally:
+            loc.cctx = None
+            loc.dctx = None
+
+    def compress(self, data: bytes) -> bytes:
+        # un solo buffer: zstd scrive già la content size nel frame header (salvo tight)
+        self._require()
+        c = getattr(self._local, "cctx", None) or self._new_compressor()
         return c.compress(data)
 
+    def compress_chunks(self, chunks: Iterable[bytes], size: int | None = None) -> bytes:
+        """
+        Comprime una sequenza di chunk come un unico frame (streaming): il chiamante non
+        deve concatenarli prima. size = lunghezza totale se nota (pledged content size).
+        """
+        self._require()
+        c = getattr(self._local, "cctx", None) or self._new_compressor()
+        cobj = c.compressobj(size=-1 if size is None else int(size))
+        out = [cobj.compress(ch) for ch in chunks]
+        out.append(cobj.flush())
+        return b"".join(out)
+
     def decompress(self, data: bytes, out_size: int | None = None) -> bytes:
         self._require()
-        d = zstd.ZstdDecompressor()
+        d = getattr(self._local, "dctx", None) or zstd.ZstdDecompressor()
         if out_size is None:
+            # content size nel frame header (default): allocazione esatta in un colpo.
+            # Frame "tight" (senza content size): decoder streaming.
+            if zstd.get_frame_parameters(data).content_size == zstd.CONTENTSIZE_UNKNOWN:
+                dobj = d.decompressobj()
+                return dobj.decompress(data) + dobj.flush()
             return d.decompress(data)
         return d.decompress(data, max_output_size=int(out_size))
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None
+
+# -------------------------------------------------------------------
+# JSON (de)serialization con orjson opzionale + fallback stdlib.
+#
+# Contratto: i bytes prodotti sono IDENTICI a quelli di json.dumps(..., ensure_ascii=False)
+# con lo stesso layout (indent=2). orjson non serializza float come Python
+# (es. 1e16 vs 1e+16): questi helper sono pensati per documenti senza float
+# (index, manifest di interi/stringhe). Qualunque errore orjson -> fallback stdlib.
+# -------------------------------------------------------------------
+
+
+def dumps_indent2(obj: Any) -> bytes:
+    """== json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        except Exception:
+            pass
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def dumps_compact(obj: Any, *, has_float: bool = True) -> bytes:
+    """
+    == json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    orjson solo se il chiamante garantisce has_float=False (formattazione float diversa,
+    NaN/Infinity -> null): il default resta sempre sulla stdlib.
+    """
+    if orjson is not None and not has_float:
+        try:
+            return orjson.dumps(obj)
+        except Exception:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes | str) -> Any:
+    """== json.loads(data) (bytes UTF-8 o str)."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except Exception:
+            # interi > 64 bit, surrogati, ecc.: decide (ed eventualmente fallisce) la stdlib
+            pass
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode("utf-8")
+    return json.loads(data)
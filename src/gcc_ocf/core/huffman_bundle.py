@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import struct
+from array import array
+
 from gcc_ocf.core.bundle import EncodedStream, SymbolStream
 from gcc_ocf.core.codec_huffman import CodecHuffman
 
@@ -8,36 +11,44 @@ from gcc_ocf.core.codec_huffman import CodecHuffman
 #
 # V1: magic b"HBN1", uses u32 lengths + (sym,u32 freq) pairs.
 # V2: magic b"HBN2", uses varint lengths + (sym-delta,varint freq) pairs.
+# V3: magic b"HBN3", like V2 but the (sym-delta,freq) table is stored
+#     Stream-VByte style: control bytes (2 bit per value) + data bytes.
 #
-# Decoder supports BOTH. Encoder emits V2.
+# Decoder supports ALL. Encoder emits V2 (V3 is opt-in).
 # -------------------------------------------------------------------
 
 BUNDLE_MAGIC_V1 = b"HBN1"
 BUNDLE_MAGIC_V2 = b"HBN2"
+BUNDLE_MAGIC_V3 = b"HBN3"
 
 # Default magic used by pack_huffman_bundle()
 BUNDLE_MAGIC = BUNDLE_MAGIC_V2
 
 # Magics accepted by container detection
-BUNDLE_MAGICS = (BUNDLE_MAGIC_V1, BUNDLE_MAGIC_V2)
+BUNDLE_MAGICS = (BUNDLE_MAGIC_V1, BUNDLE_MAGIC_V2, BUNDLE_MAGIC_V3)
 
+_U32_PAIR = struct.Struct(">II")
 
-def _enc_varint(n: int) -> bytes:
+
+def _enc_varint_into(out: bytearray, n: int) -> None:
+    """Appende uvarint(n) a un buffer del chiamante (niente bytes intermedi)."""
     if n < 0:
         raise ValueError("varint: n < 0")
-    out = bytearray()
-    while True:
-        b = n & 0x7F
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
         n >>= 7
-        if n:
-            out.append(b | 0x80)
-        else:
-            out.append(b)
-            break
+    out.append(n)
+
+
+def _enc_varint(n: int) -> bytes:
+    if 0 <= n < 0x80:
+        return bytes((n,))
+    out = bytearray()
+    _enc_varint_into(out, n)
     return bytes(out)
 
 
-def _dec_varint(buf: bytes, idx: int) -> tuple[int, int]:
+def _dec_varint(buf: bytes | memoryview, idx: int) -> tuple[int, int]:
     n = 0
     shift = 0
     while True:
@@ -53,6 +64,64 @@ def _dec_varint(buf: bytes, idx: int) -> tuple[int, int]:
             raise ValueError("varint: overflow")
 
 
+# ---------------------------
+# Stream-VByte (u32 values)
+#
+# Layout: [ceil(n/4) control bytes][data bytes]
+# Ogni control byte descrive 4 valori (2 bit ciascuno, LSB-first) = len-1 (1..4 byte).
+# I data byte di ogni valore sono little-endian.
+# ---------------------------
+
+
+def _svb_len(v: int) -> int:
+    if v < 0x100:
+        return 1
+    if v < 0x10000:
+        return 2
+    if v < 0x1000000:
+        return 3
+    return 4
+
+
+# control byte -> (len0, len1, len2, len3)
+_SVB_LENS: tuple[tuple[int, int, int, int], ...] = tuple(
+    tuple(((c >> (2 * k)) & 0x3) + 1 for k in range(4))  # type: ignore[misc]
+    for c in range(256)
+)
+
+
+def _svb_encode(values: list[int]) -> bytes:
+    n = len(values)
+    ctrl = bytearray((n + 3) // 4)
+    data = bytearray()
+    for i, v in enumerate(values):
+        if v < 0 or v > 0xFFFFFFFF:
+            raise ValueError("stream-vbyte: valore fuori range u32")
+        ln = _svb_len(v)
+        ctrl[i >> 2] |= (ln - 1) << (2 * (i & 3))
+        data += v.to_bytes(ln, "little")
+    return bytes(ctrl) + bytes(data)
+
+
+def _svb_decode(buf: bytes | memoryview, idx: int, n: int) -> tuple[list[int], int]:
+    n_ctrl = (n + 3) // 4
+    if idx + n_ctrl > len(buf):
+        raise ValueError("stream-vbyte: control bytes troncati")
+    pos = idx + n_ctrl
+    out: list[int] = []
+    append = out.append
+    for ci in range(n_ctrl):
+        lens = _SVB_LENS[buf[idx + ci]]
+        for k in range(min(4, n - 4 * ci)):
+            ln = lens[k]
+            end = pos + ln
+            if end > len(buf):
+                raise ValueError("stream-vbyte: data bytes troncati")
+            append(int.from_bytes(buf[pos:end], "little"))
+            pos = end
+    return out, pos
+
+
 def _norm_triplet(ret) -> tuple[list[int], int, bytes]:
     """Normalizza output di compress_*: (freq_list, lastbits_int, bitstream_bytes)."""
     if not isinstance(ret, tuple) or len(ret) != 3:
@@ -80,8 +149,9 @@ def _freq_to_used(freq: list[int]) -> list[tuple[int, int]]:
     return [(i, f) for i, f in enumerate(freq) if f > 0]
 
 
-def _used_to_freq(used: list[tuple[int, int]], alphabet_size: int) -> list[int]:
-    freq = [0] * alphabet_size
+def _used_to_freq(used: list[tuple[int, int]], alphabet_size: int) -> array[int]:
+    # array 'Q' (u64 contigui): i consumer (build_huffman_tree) accettano qualunque sequenza
+    freq = array("Q", [0]) * alphabet_size
     for sym, f in used:
         if sym < 0 or sym >= alphabet_size:
             raise ValueError("freq_used contiene sym fuori range")
@@ -89,6 +159,16 @@ def _used_to_freq(used: list[tuple[int, int]], alphabet_size: int) -> list[int]:
     return freq
 
 
+def _norm_used(used: list[tuple[int, int]], alphabet_size: int) -> list[tuple[int, int]]:
+    """(sym, freq) sparsi, ordinati per sym, freq > 0: stesso albero della tabella densa."""
+    last: dict[int, int] = {}
+    for sym, f in used:
+        if sym < 0 or sym >= alphabet_size:
+            raise ValueError("freq_used contiene sym fuori range")
+        last[sym] = f
+    return [(sym, f) for sym, f in sorted(last.items()) if f > 0]
+
+
 def huffman_encode_stream(stream: SymbolStream, codec: CodecHuffman | None = None) -> EncodedStream:
     if codec is None:
         codec = CodecHuffman()
@@ -142,6 +222,25 @@ def huffman_decode_stream(enc: EncodedStream, codec: CodecHuffman | None = None)
     if enc.freq_used is None or enc.lastbits is None or enc.bitstream is None:
         raise ValueError("EncodedStream huffman incompleto")
 
+    if hasattr(codec, "decompress_ids_used"):
+        # niente tabella densa alphabet_size: l'albero si costruisce dalle coppie usate
+        used = _norm_used(enc.freq_used, enc.alphabet_size)
+        if enc.kind == "bytes":
+            data = codec.decompress_bytes_used(
+                used, enc.alphabet_size, enc.bitstream, enc.n, enc.lastbits
+            )
+            return SymbolStream(
+                name=enc.name, kind="bytes", alphabet_size=256, n=len(data), data=data
+            )
+        if enc.kind == "ids":
+            ids = codec.decompress_ids_used(
+                used, enc.alphabet_size, enc.n, enc.lastbits, enc.bitstream
+            )
+            return SymbolStream(
+                name=enc.name, kind="ids", alphabet_size=enc.alphabet_size, n=len(ids), data=ids
+            )
+        raise NotImplementedError(f"kind non supportato: {enc.kind}")
+
     freq = _used_to_freq(enc.freq_used, enc.alphabet_size)
 
     if enc.kind == "bytes":
@@ -183,9 +282,14 @@ def _pack_encoded_stream_v1(enc: EncodedStream) -> bytes:
 
     used = enc.freq_used or []
     out += len(used).to_bytes(4, "big")
+    # (sym u32, freq u32) pairs: one preallocated block, one pack_into per entry
+    pack_into = _U32_PAIR.pack_into
+    table = bytearray(8 * len(used))
+    off = 0
     for sym, f in used:
-        out += sym.to_bytes(4, "big")
-        out += f.to_bytes(4, "big")
+        pack_into(table, off, sym, f)
+        off += 8
+    out += table
 
     out.append(int(enc.lastbits or 0) & 0xFF)
     bs = enc.bitstream or b""
@@ -194,7 +298,7 @@ def _pack_encoded_stream_v1(enc: EncodedStream) -> bytes:
     return bytes(out)
 
 
-def _unpack_encoded_stream_v1(blob: bytes, idx: int) -> tuple[EncodedStream, int]:
+def _unpack_encoded_stream_v1(blob: bytes | memoryview, idx: int) -> tuple[EncodedStream, int]:
     if idx + 1 + 1 + 1 + 4 + 4 > len(blob):
         raise ValueError("bundle troncato (header stream)")
 
@@ -207,7 +311,7 @@ def _unpack_encoded_stream_v1(blob: bytes, idx: int) -> tuple[EncodedStream, int
 
     if idx + name_len > len(blob):
         raise ValueError("bundle troncato (name)")
-    name = blob[idx : idx + name_len].decode("utf-8")
+    name = bytes(blob[idx : idx + name_len]).decode("utf-8")
     idx += name_len
 
     alphabet_size = int.from_bytes(blob[idx : idx + 4], "big")
@@ -223,7 +327,7 @@ def _unpack_encoded_stream_v1(blob: bytes, idx: int) -> tuple[EncodedStream, int
         idx += 4
         if idx + raw_len > len(blob):
             raise ValueError("bundle troncato (raw)")
-        raw = blob[idx : idx + raw_len]
+        raw = bytes(blob[idx : idx + raw_len])
         idx += raw_len
         return EncodedStream(
             name=name, kind=kind, alphabet_size=alphabet_size, n=n, encoding="raw", raw=raw
@@ -250,7 +354,7 @@ def _unpack_encoded_stream_v1(blob: bytes, idx: int) -> tuple[EncodedStream, int
     idx += 4
     if idx + bs_len > len(blob):
         raise ValueError("bundle troncato (bitstream)")
-    bitstream = blob[idx : idx + bs_len]
+    bitstream = bytes(blob[idx : idx + bs_len])
     idx += bs_len
 
     return EncodedStream(
@@ -270,7 +374,7 @@ def _unpack_encoded_stream_v1(blob: bytes, idx: int) -> tuple[EncodedStream, int
 # ---------------------------
 
 
-def _pack_encoded_stream_v2(enc: EncodedStream) -> bytes:
+def _pack_encoded_stream_v2(enc: EncodedStream, *, svb_table: bool = False) -> bytes:
     name_b = enc.name.encode("utf-8")
     if len(name_b) > 0xFF:
         raise ValueError("stream name troppo lungo (max 255)")
@@ -285,15 +389,16 @@ def _pack_encoded_stream_v2(enc: EncodedStream) -> bytes:
 
     if enc.encoding == "raw":
         raw = enc.raw or b""
-        out += _enc_varint(len(raw))
+        _enc_varint_into(out, len(raw))
         out += raw
         return bytes(out)
 
     used = enc.freq_used or []
     # Store used entries sorted by sym, with delta sym (varint) and varint freq
     used_sorted = sorted(used, key=lambda t: t[0])
-    out += _enc_varint(len(used_sorted))
+    _enc_varint_into(out, len(used_sorted))
 
+    table: list[int] = []
     prev = 0
     first = True
     for sym, f in used_sorted:
@@ -305,17 +410,26 @@ def _pack_encoded_stream_v2(enc: EncodedStream) -> bytes:
             if delta < 0:
                 raise ValueError("used_sorted non monotono")
         prev = sym
-        out += _enc_varint(delta)
-        out += _enc_varint(f)
+        table.append(delta)
+        table.append(f)
+
+    if svb_table:
+        # V3: delta/freq interleaved, Stream-VByte
+        out += _svb_encode(table)
+    else:
+        for v in table:
+            _enc_varint_into(out, v)
 
     out.append(int(enc.lastbits or 0) & 0xFF)
     bs = enc.bitstream or b""
-    out += _enc_varint(len(bs))
+    _enc_varint_into(out, len(bs))
     out += bs
     return bytes(out)
 
 
-def _unpack_encoded_stream_v2(blob: bytes, idx: int) -> tuple[EncodedStream, int]:
+def _unpack_encoded_stream_v2(
+    blob: bytes | memoryview, idx: int, *, svb_table: bool = False
+) -> tuple[EncodedStream, int]:
     if idx + 1 + 1 + 1 + 4 + 4 > len(blob):
         raise ValueError("bundle troncato (header stream)")
 
@@ -328,7 +442,7 @@ def _unpack_encoded_stream_v2(blob: bytes, idx: int) -> tuple[EncodedStream, int
 
     if idx + name_len > len(blob):
         raise ValueError("bundle troncato (name)")
-    name = blob[idx : idx + name_len].decode("utf-8")
+    name = bytes(blob[idx : idx + name_len]).decode("utf-8")
     idx += name_len
 
     alphabet_size = int.from_bytes(blob[idx : idx + 4], "big")
@@ -343,7 +457,7 @@ def _unpack_encoded_stream_v2(blob: bytes, idx: int) -> tuple[EncodedStream, int
         raw_len, idx = _dec_varint(blob, idx)
         if idx + raw_len > len(blob):
             raise ValueError("bundle troncato (raw)")
-        raw = blob[idx : idx + raw_len]
+        raw = bytes(blob[idx : idx + raw_len])
         idx += raw_len
         return EncodedStream(
             name=name, kind=kind, alphabet_size=alphabet_size, n=n, encoding="raw", raw=raw
@@ -351,17 +465,24 @@ def _unpack_encoded_stream_v2(blob: bytes, idx: int) -> tuple[EncodedStream, int
 
     num_used, idx = _dec_varint(blob, idx)
     used: list[tuple[int, int]] = []
-    sym = 0
-    first = True
-    for _ in range(num_used):
-        delta, idx = _dec_varint(blob, idx)
-        if first:
-            sym = delta
-            first = False
-        else:
-            sym = sym + delta
-        f, idx = _dec_varint(blob, idx)
-        used.append((sym, f))
+    if svb_table:
+        table, idx = _svb_decode(blob, idx, 2 * num_used)
+        sym = 0
+        for i in range(num_used):
+            sym += table[2 * i]
+            used.append((sym, table[2 * i + 1]))
+    else:
+        sym = 0
+        first = True
+        for _ in range(num_used):
+            delta, idx = _dec_varint(blob, idx)
+            if first:
+                sym = delta
+                first = False
+            else:
+                sym = sym + delta
+            f, idx = _dec_varint(blob, idx)
+            used.append((sym, f))
 
     if idx >= len(blob):
         raise ValueError("bundle troncato (lastbits)")
@@ -371,7 +492,7 @@ def _unpack_encoded_stream_v2(blob: bytes, idx: int) -> tuple[EncodedStream, int
     bs_len, idx = _dec_varint(blob, idx)
     if idx + bs_len > len(blob):
         raise ValueError("bundle troncato (bitstream)")
-    bitstream = blob[idx : idx + bs_len]
+    bitstream = bytes(blob[idx : idx + bs_len])
     idx += bs_len
 
     return EncodedStream(
@@ -391,57 +512,68 @@ def _unpack_encoded_stream_v2(blob: bytes, idx: int) -> tuple[EncodedStream, int
 # ---------------------------
 
 
-def pack_huffman_bundle(encoded_streams: list[EncodedStream]) -> bytes:
-    """Serializza una lista di EncodedStream (multi-stream) in un payload bundle (V2)."""
+def pack_huffman_bundle(
+    encoded_streams: list[EncodedStream], *, magic: bytes = BUNDLE_MAGIC
+) -> bytes:
+    """Serializza una lista di EncodedStream (multi-stream) in un payload bundle.
+
+    Default: V2. Con magic=BUNDLE_MAGIC_V3 la tabella freq usa il layout Stream-VByte.
+    """
+    if magic not in (BUNDLE_MAGIC_V2, BUNDLE_MAGIC_V3):
+        raise ValueError("magic bundle non supportato in encode (solo HBN2/HBN3)")
     if len(encoded_streams) > 0xFF:
         raise ValueError("troppi stream (max 255)")
+    svb_table = magic == BUNDLE_MAGIC_V3
     out = bytearray()
-    out += BUNDLE_MAGIC_V2
+    out += magic
     out.append(len(encoded_streams))
     for s in encoded_streams:
-        sb = _pack_encoded_stream_v2(s)
-        out += _enc_varint(len(sb))
+        sb = _pack_encoded_stream_v2(s, svb_table=svb_table)
+        _enc_varint_into(out, len(sb))
         out += sb
     return bytes(out)
 
 
 def unpack_huffman_bundle(payload: bytes) -> list[EncodedStream]:
-    """Deserializza un payload bundle (V1 o V2) in lista di EncodedStream."""
+    """Deserializza un payload bundle (V1, V2 o V3) in lista di EncodedStream."""
     if len(payload) < 5:
         raise ValueError("payload troppo corto per bundle")
 
-    magic = payload[:4]
+    # memoryview: gli slice per-stream sono viste, si copia solo in EncodedStream
+    mv = memoryview(payload)
+    magic = bytes(mv[:4])
     if magic not in BUNDLE_MAGICS:
         raise ValueError("payload non è un Huffman bundle")
 
     idx = 4
-    n_streams = payload[idx]
+    n_streams = mv[idx]
     idx += 1
     streams: list[EncodedStream] = []
 
     if magic == BUNDLE_MAGIC_V1:
         # V1 lengths are u32
         for _ in range(n_streams):
-            if idx + 4 > len(payload):
+            if idx + 4 > len(mv):
                 raise ValueError("bundle V1 troncato (len)")
-            L = int.from_bytes(payload[idx : idx + 4], "big")
+            L = int.from_bytes(mv[idx : idx + 4], "big")
             idx += 4
-            if idx + L > len(payload):
+            if idx + L > len(mv):
                 raise ValueError("bundle V1 troncato (stream blob)")
-            s_blob = payload[idx : idx + L]
+            s_blob = mv[idx : idx + L]
             idx += L
             s, _ = _unpack_encoded_stream_v1(s_blob, 0)
             streams.append(s)
         return streams
 
-    # V2 lengths are varint
+    # V2/V3 lengths are varint
+    svb_table = magic == BUNDLE_MAGIC_V3
     for _ in range(n_streams):
-        L, idx = _dec_varint(payload, idx)
-        if idx + L > len(payload):
+        L, idx = _dec_varint(mv, idx)
+        if idx + L > len(mv):
             raise ValueError("bundle V2 troncato (stream blob)")
-        s_blob = payload[idx : idx + L]
+        s_blob = mv[idx : idx + L]
         idx += L
-        s, _ = _unpack_encoded_stream_v2(s_blob, 0)
+        s, _ = _unpack_encoded_stream_v2(s_blob, 0, svb_table=svb_table)
         streams.append(s)
 
     return streams
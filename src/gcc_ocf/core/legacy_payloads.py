@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import struct
+from array import array
+
 from gcc_ocf.layers.vocab_blob import pack_vocab_list, unpack_vocab_list
 
 # -------------------------------------------------------------------
@@ -21,6 +24,19 @@ KIND_IDS = 1
 KIND_IDS_META_VOCAB = 1
 KIND_IDS_INLINE_VOCAB = 2
 
+_U32_PAIR = struct.Struct(">II")
+
+
+def _pack_used_u32_pairs(used: list[tuple[int, int]]) -> bytearray:
+    """Blocco [sym u32|freq u32]*: preallocato, un pack_into per entry."""
+    pack_into = _U32_PAIR.pack_into
+    buf = bytearray(8 * len(used))
+    off = 0
+    for sym, f in used:
+        pack_into(buf, off, sym, f)
+        off += 8
+    return buf
+
 
 # -------------------
 # bytes payload (KIND_BYTES)
@@ -88,15 +104,13 @@ def pack_huffman_payload_ids(
     out.append(KIND_IDS)
     out += vocab_size.to_bytes(4, "big")
     out += len(used).to_bytes(4, "big")
-    for sym, f in used:
-        out += sym.to_bytes(4, "big")  # u32
-        out += f.to_bytes(4, "big")  # u32
+    out += _pack_used_u32_pairs(used)  # repeat(sym u32, freq u32)
     out.append(lastbits & 0xFF)
     out += bitstream
     return bytes(out)
 
 
-def unpack_huffman_payload_ids(payload: bytes) -> tuple[int, list[int], int, bytes]:
+def unpack_huffman_payload_ids(payload: bytes) -> tuple[int, array[int], int, bytes]:
     if len(payload) < 1 + 4 + 4 + 1:
         raise ValueError("payload Huffman(ids) troppo corto")
 
@@ -111,7 +125,8 @@ def unpack_huffman_payload_ids(payload: bytes) -> tuple[int, list[int], int, byt
     num = int.from_bytes(payload[idx : idx + 4], "big")
     idx += 4
 
-    freq = [0] * vocab_size
+    # array 'Q': 8 byte/entry contigui, niente lista di PyObject* per vocab grandi
+    freq = array("Q", [0]) * vocab_size
     for _ in range(num):
         if idx + 4 + 4 > len(payload):
             raise ValueError("payload troncato (freq entries ids)")
@@ -154,9 +169,7 @@ def pack_huffman_payload_ids_inline_vocab(
     out += len(vocab_blob).to_bytes(4, "big")
     out += vocab_blob
     out += len(used).to_bytes(4, "big")
-    for sym, f in used:
-        out += sym.to_bytes(4, "big")  # u32
-        out += f.to_bytes(4, "big")  # u32
+    out += _pack_used_u32_pairs(used)  # repeat(sym u32, freq u32)
     out.append(lastbits & 0xFF)
     out += bitstream
     return bytes(out)
@@ -164,7 +177,7 @@ def pack_huffman_payload_ids_inline_vocab(
 
 def unpack_huffman_payload_ids_inline_vocab(
     payload: bytes,
-) -> tuple[list[bytes], list[int], int, bytes]:
+) -> tuple[list[bytes], array[int], int, bytes]:
     if len(payload) < 1 + 4 + 4 + 1:
         raise ValueError("payload Huffman(ids+vocab) troppo corto")
 
@@ -188,7 +201,8 @@ def unpack_huffman_payload_ids_inline_vocab(
     num = int.from_bytes(payload[idx : idx + 4], "big")
     idx += 4
 
-    freq = [0] * vocab_size
+    # array 'Q': 8 byte/entry contigui, niente lista di PyObject* per vocab grandi
+    freq = array("Q", [0]) * vocab_size
     for _ in range(num):
         if idx + 8 > len(payload):
             raise ValueError("payload troncato (freq entries)")
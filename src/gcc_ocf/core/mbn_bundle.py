@@ -36,7 +36,7 @@ def _enc_varint(x: int) -> bytes:
     return bytes(out)
 
 
-def _dec_varint(buf: bytes, idx: int) -> tuple[int, int]:
+def _dec_varint(buf: bytes | memoryview, idx: int) -> tuple[int, int]:
     """Unsigned LEB128 decode."""
     shift = 0
     x = 0
@@ -54,23 +54,23 @@ def _dec_varint(buf: bytes, idx: int) -> tuple[int, int]:
     return x, idx
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MBNStream:
     stype: int
     codec: int
     ulen: int
-    comp: bytes
+    comp: bytes | memoryview  # da unpack_mbn su memoryview: vista, niente copia
     meta: bytes = b""
 
 
-def is_mbn(payload: bytes) -> bool:
+def is_mbn(payload: bytes | memoryview) -> bool:
     return len(payload) >= 3 and payload[:3] == MBN_MAGIC
 
 
 def pack_mbn(streams: list[MBNStream]) -> bytes:
-    out = bytearray()
-    out += MBN_MAGIC
-    out += _enc_varint(len(streams))
+    # frammenti + b"".join: una sola allocazione finale (niente bytearray che cresce)
+    parts: list[bytes] = [MBN_MAGIC, _enc_varint(len(streams))]
+    append = parts.append
 
     for s in streams:
         if not (0 <= s.stype <= 255):
@@ -80,19 +80,18 @@ def pack_mbn(streams: list[MBNStream]) -> bytes:
         if s.ulen < 0:
             raise ValueError("MBN: ulen negativo")
 
-        out.append(s.stype)
-        out.append(s.codec)
-        out += _enc_varint(int(s.ulen))
-        out += _enc_varint(len(s.comp))
-        out += _enc_varint(len(s.meta))
+        append(bytes((s.stype, s.codec)))
+        append(_enc_varint(int(s.ulen)))
+        append(_enc_varint(len(s.comp)))
+        append(_enc_varint(len(s.meta)))
         if s.meta:
-            out += s.meta
-        out += s.comp
+            append(s.meta)
+        append(s.comp)
 
-    return bytes(out)
+    return b"".join(parts)
 
 
-def unpack_mbn(payload: bytes) -> list[MBNStream]:
+def unpack_mbn(payload: bytes | memoryview) -> list[MBNStream]:
     if not is_mbn(payload):
         raise ValueError("MBN: magic non valido")
 
@@ -116,7 +115,7 @@ def unpack_mbn(payload: bytes) -> list[MBNStream]:
         if idx + mlen + clen > len(payload):
             raise ValueError("MBN: stream troncato (meta/comp)")
 
-        meta = payload[idx : idx + mlen] if mlen else b""
+        meta = bytes(payload[idx : idx + mlen]) if mlen else b""
         idx += mlen
         comp = payload[idx : idx + clen]
         idx += clen
@@ -1,60 +1,90 @@
 from __future__ import annotations
 
-
-def _enc_varint(x: int) -> bytes:
-    if x < 0:
-        raise ValueError("varint negativo non supportato")
-    out = bytearray()
-    while True:
-        b = x & 0x7F
-        x >>= 7
-        if x:
-            out.append(0x80 | b)
-        else:
-            out.append(b)
-            break
-    return bytes(out)
-
-
-def _dec_varint(buf: bytes, idx: int) -> tuple[int, int]:
-    shift = 0
-    x = 0
-    while True:
-        if idx >= len(buf):
-            raise ValueError("varint troncato")
-        b = buf[idx]
-        idx += 1
-        x |= (b & 0x7F) << shift
-        if (b & 0x80) == 0:
-            break
-        shift += 7
-        if shift > 63:
-            raise ValueError("varint troppo grande")
-    return x, idx
+import re
+from functools import lru_cache
 
 
-def _zigzag_enc(n: int) -> int:
-    return (n << 1) if n >= 0 else ((-n << 1) - 1)
+@lru_cache(maxsize=1)
+def _varint2_tables() -> tuple[list[bytes], dict[bytes, int]]:
+    signed = [*range(1 << 13), *range(-(1 << 13), 0)]
+    enc = [
+        bytes((z,)) if z < 0x80 else bytes(((z & 0x7F) | 0x80, z >> 7))
+        for z in [(n << 1) if n >= 0 else ((-n << 1) - 1) for n in signed]
+    ]
+    dec = dict(zip(enc, signed, strict=True))
+    # varint a 2 byte non canonici (secondo byte 0): il decoder generico li accetta
+    for u in range(0x80):
+        dec[bytes((0x80 | u, 0))] = (u >> 1) ^ -(u & 1)
+    return enc, dec
 
 
-def _zigzag_dec(u: int) -> int:
-    return (u >> 1) if (u & 1) == 0 else -(u >> 1) - 1
+# Tabelle per i varint da 1-2 byte (-8192 <= n < 8192, cioè zigzag < 2**14): il caso
+# tipico di IDS/NUMS. Encode e decode diventano una lookup per valore dentro map(),
+# senza loop Python per byte. La tabella di encode si indicizza col valore con segno:
+# gli indici negativi pescano dalla coda, dove stanno proprio gli n < 0. Costruite al
+# primo uso (~16k voci), non all'import.
+_VARINT2_MIN = -(1 << 13)
+_VARINT2_MAX = (1 << 13) - 1
+# un varint da 1-2 byte; lo stream è tutto così se nessun byte alto è seguito da un altro
+# byte alto o dalla fine (varint più lunghi o troncati -> percorso generico)
+_VARINT2_RE = re.compile(rb"[\x80-\xff]?[\x00-\x7f]")
+_VARINT_LONG_RE = re.compile(rb"[\x80-\xff](?:[\x80-\xff]|\Z)")
 
 
 def encode_ints(ints: list[int]) -> bytes:
     """Encode lista di int come concatenazione di uvarint(zigzag(int))."""
+    if type(ints) is list and ints and _VARINT2_MIN <= min(ints) and max(ints) <= _VARINT2_MAX:
+        try:
+            return b"".join(map(_varint2_tables()[0].__getitem__, ints))
+        except TypeError:
+            pass  # valori non int (es. float interi): li normalizza il percorso generico
+
+    zz = [(n << 1) if n >= 0 else ((-n << 1) - 1) for n in map(int, ints)]
+    if not zz:
+        return b""
+    # fast path: tutti i valori stanno in 1 byte -> nessun loop per-int
+    if max(zz) < 0x80:
+        return bytes(zz)
+
     out = bytearray()
-    for n in ints:
-        out += _enc_varint(_zigzag_enc(int(n)))
+    append = out.append
+    for x in zz:
+        while x >= 0x80:
+            append((x & 0x7F) | 0x80)
+            x >>= 7
+        append(x)
     return bytes(out)
 
 
 def decode_ints(raw: bytes) -> list[int]:
     """Decode concatenazione uvarint(zigzag(int)) fino a EOF."""
+    b = bytes(raw)
+    # fast path: nessun byte di continuazione -> ogni byte e' un varint
+    if b.isascii():
+        return [(u >> 1) ^ -(u & 1) for u in b]
+    if _VARINT_LONG_RE.search(b) is None:
+        return list(map(_varint2_tables()[1].__getitem__, _VARINT2_RE.findall(b)))
+
     out: list[int] = []
+    append = out.append
     idx = 0
-    b = bytes(raw)
-    while idx < len(b):
-        u, idx = _dec_varint(b, idx)
-        out.append(_zigzag_dec(u))
+    n = len(b)
+    while idx < n:
+        x = b[idx]
+        idx += 1
+        if x >= 0x80:
+            x &= 0x7F
+            shift = 7
+            while True:
+                if idx >= n:
+                    raise ValueError("varint troncato")
+                c = b[idx]
+                idx += 1
+                x |= (c & 0x7F) << shift
+                if c < 0x80:
+                    break
+                shift += 7
+                if shift > 63:
+                    raise ValueError("varint troppo grande")
+        append((x >> 1) ^ -(x & 1))
     return out
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+from collections.abc import Callable
+from functools import cache
 from typing import Any
 
-from gcc_ocf.core.bundle import SymbolStream
+from gcc_ocf.core.bundle import SymbolStream, as_bytes
 from gcc_ocf.core.codec_huffman import CodecHuffman
 from gcc_ocf.core.codec_zstd import CodecZstd
 from gcc_ocf.core.huffman_bundle import (
@@ -22,17 +24,32 @@ from gcc_ocf.core.legacy_payloads import (
 from gcc_ocf.core.zstd_bundle import (
     ZBN1_MAGIC,
     ZBN2_MAGIC,
-    pack_zstd_bundle2,
+    ZBN3_MAGIC,
+    pack_zstd_bundle3,
     unpack_zstd_bundle,
     unpack_zstd_bundle2,
+    unpack_zstd_bundle3,
 )
-from gcc_ocf.core.zstd_raw import ZRAW1_MAGIC, pack_zstd_raw, unpack_zstd_raw
+from gcc_ocf.core.zstd_raw import (
+    ZRAW1_MAGIC,
+    ZRAW2_MAGIC,
+    pack_zstd_raw,
+    pack_zstd_raw2,
+    unpack_zstd_raw,
+    unpack_zstd_raw2,
+)
+
+
+@cache
+def _layer_caps(layer_cls: type) -> tuple[bool, bool]:
+    """(has pack_meta, has unpack_meta): per classe, calcolato una volta."""
+    return hasattr(layer_cls, "pack_meta"), hasattr(layer_cls, "unpack_meta")
 
 
 def _symbols_to_streams(layer_id: str, symbols: Any, meta: dict[str, Any]) -> list[SymbolStream]:
     # bytes
     if isinstance(symbols, (bytes, bytearray)):
-        b = bytes(symbols)
+        b = as_bytes(symbols)
         return [SymbolStream(name="main", kind="bytes", alphabet_size=256, n=len(b), data=b)]
 
     # ids
@@ -56,7 +73,7 @@ def _symbols_to_streams(layer_id: str, symbols: Any, meta: dict[str, Any]) -> li
         )
         out: list[SymbolStream] = []
         for name, part in zip(names, symbols, strict=False):
-            pb = bytes(part)
+            pb = as_bytes(part)
             out.append(SymbolStream(name=name, kind="bytes", alphabet_size=256, n=len(pb), data=pb))
         return out
 
@@ -99,11 +116,11 @@ def _decode_streams_with_optional_meta(
             if not isinstance(s.data, (bytes, bytearray)):
                 raise ValueError("__meta__ stream non è bytes")
             if s.data:
-                meta_bytes = bytes(s.data)
+                meta_bytes = as_bytes(s.data)
         else:
             symbol_streams.append(s)
 
-    if meta_bytes is not None and hasattr(layer, "unpack_meta"):
+    if meta_bytes is not None and _layer_caps(type(layer))[1]:
         layer_meta = layer.unpack_meta(meta_bytes)
     else:
         layer_meta = {}
@@ -123,17 +140,30 @@ def encode_v5_payload(input_bytes: bytes, layer_id: str, layer: Any, codec: Any)
     else:
         symbols, layer_meta = ret, {}
 
-    layer_meta = layer_meta or {}
-
-    streams = _symbols_to_streams(layer_id, symbols, layer_meta)
+    if layer_meta is None:
+        layer_meta = {}
 
     # Optional meta stream
     meta_bytes = None
-    if layer_meta and hasattr(layer, "pack_meta"):
+    if layer_meta and _layer_caps(type(layer))[0]:
         mb = layer.pack_meta(layer_meta)
         if mb:
             meta_bytes = bytes(mb)
 
+    codec_id = getattr(codec, "codec_id", "huffman")
+
+    # ZRAW1/ZRAW2 fast-path, deciso PRIMA di costruire SymbolStream/lista:
+    # symbols bytes (-> un solo stream "main") + zstd.
+    if codec_id == "zstd" and isinstance(symbols, (bytes, bytearray)):
+        zc = codec if isinstance(codec, CodecZstd) else CodecZstd()
+        if meta_bytes is None:
+            # ZRAW1: solo main, niente bundle
+            return pack_zstd_raw(symbols, zc)
+        # ZRAW2: main + __meta__ in un frame, niente framing ZBN2
+        return pack_zstd_raw2(symbols, meta_bytes, zc)
+
+    streams = _symbols_to_streams(layer_id, symbols, layer_meta)
+
     if meta_bytes is not None:
         streams.append(
             SymbolStream(
@@ -141,8 +171,6 @@ def encode_v5_payload(input_bytes: bytes, layer_id: str, layer: Any, codec: Any)
             )
         )
 
-    codec_id = getattr(codec, "codec_id", "huffman")
-
     if codec_id == "huffman":
         huff = codec if isinstance(codec, CodecHuffman) else CodecHuffman()
         enc_streams = [huffman_encode_stream(s, huff) for s in streams]
@@ -150,15 +178,62 @@ def encode_v5_payload(input_bytes: bytes, layer_id: str, layer: Any, codec: Any)
 
     if codec_id == "zstd":
         zc = codec if isinstance(codec, CodecZstd) else CodecZstd()
+        return pack_zstd_bundle3(streams, zc)
 
-        # ZRAW1 fast-path:
-        # se abbiamo UN SOLO stream bytes "main" e NON c'è meta, evitiamo il bundle.
-        if len(streams) == 1 and streams[0].name == "main" and streams[0].kind == "bytes":
-            return pack_zstd_raw(streams[0].data, zc)  # type: ignore[arg-type]
+    raise ValueError(f"codec_id non supportato in v5: {codec_id!r}")
 
-        return pack_zstd_bundle2(streams, zc)
 
-    raise ValueError(f"codec_id non supportato in v5: {codec_id!r}")
+def _zstd_codec(codec: Any) -> CodecZstd:
+    return codec if isinstance(codec, CodecZstd) else CodecZstd()
+
+
+def _decode_zraw1(payload: bytes, layer_id: str, layer: Any, codec: Any) -> bytes:
+    raw = unpack_zstd_raw(payload, _zstd_codec(codec))
+    return layer.decode(raw, {})
+
+
+def _decode_zraw2(payload: bytes, layer_id: str, layer: Any, codec: Any) -> bytes:
+    main, meta_b = unpack_zstd_raw2(payload, _zstd_codec(codec))
+    decoded = [
+        SymbolStream(name="main", kind="bytes", alphabet_size=256, n=len(main), data=main),
+        SymbolStream(name="__meta__", kind="bytes", alphabet_size=256, n=len(meta_b), data=meta_b),
+    ]
+    return _decode_streams_with_optional_meta(layer_id, layer, decoded)
+
+
+def _decode_huffman_bundle(payload: bytes, layer_id: str, layer: Any, codec: Any) -> bytes:
+    huff = codec if isinstance(codec, CodecHuffman) else CodecHuffman()
+    enc_streams = unpack_huffman_bundle(payload)
+    decoded = [huffman_decode_stream(es, huff) for es in enc_streams]
+    return _decode_streams_with_optional_meta(layer_id, layer, decoded)
+
+
+def _decode_zbn1(payload: bytes, layer_id: str, layer: Any, codec: Any) -> bytes:
+    decoded = unpack_zstd_bundle(payload, _zstd_codec(codec))
+    return _decode_streams_with_optional_meta(layer_id, layer, decoded)
+
+
+def _decode_zbn2(payload: bytes, layer_id: str, layer: Any, codec: Any) -> bytes:
+    decoded = unpack_zstd_bundle2(payload, _zstd_codec(codec))
+    return _decode_streams_with_optional_meta(layer_id, layer, decoded)
+
+
+def _decode_zbn3(payload: bytes, layer_id: str, layer: Any, codec: Any) -> bytes:
+    decoded = unpack_zstd_bundle3(payload, _zstd_codec(codec))
+    return _decode_streams_with_optional_meta(layer_id, layer, decoded)
+
+
+# magic -> decoder(payload, layer_id, layer, codec)
+_DECODE_BY_MAGIC5: dict[bytes, Callable[[bytes, str, Any, Any], bytes]] = {
+    ZRAW1_MAGIC: _decode_zraw1,
+    ZRAW2_MAGIC: _decode_zraw2,
+}
+_DECODE_BY_MAGIC4: dict[bytes, Callable[[bytes, str, Any, Any], bytes]] = {
+    ZBN1_MAGIC: _decode_zbn1,
+    ZBN2_MAGIC: _decode_zbn2,
+    ZBN3_MAGIC: _decode_zbn3,
+    **{m: _decode_huffman_bundle for m in BUNDLE_MAGICS},
+}
 
 
 def decode_v5_payload(
@@ -167,30 +242,18 @@ def decode_v5_payload(
     """
     payload -> bundle (Huffman o Zstd) OR legacy v5 -> layer.decode -> raw bytes
     """
-    getattr(codec, "codec_id", "huffman")
-
-    # --- ZRAW1 fast-path (bytes+zstd) ---
-    if len(payload) >= 5 and payload[:5] == ZRAW1_MAGIC:
-        zc = codec if isinstance(codec, CodecZstd) else CodecZstd()
-        raw = unpack_zstd_raw(payload, zc)
-        return layer.decode(raw, {})
-
-    # --- Bundle payloads ---
-    if len(payload) >= 4 and payload[:4] in BUNDLE_MAGICS:
-        huff = codec if isinstance(codec, CodecHuffman) else CodecHuffman()
-        enc_streams = unpack_huffman_bundle(payload)
-        decoded = [huffman_decode_stream(es, huff) for es in enc_streams]
-        return _decode_streams_with_optional_meta(layer_id, layer, decoded)
-
-    if len(payload) >= 4 and payload[:4] == ZBN1_MAGIC:
-        zc = codec if isinstance(codec, CodecZstd) else CodecZstd()
-        decoded = unpack_zstd_bundle(payload, zc)
-        return _decode_streams_with_optional_meta(layer_id, layer, decoded)
-
-    if len(payload) >= 4 and payload[:4] == ZBN2_MAGIC:
-        zc = codec if isinstance(codec, CodecZstd) else CodecZstd()
-        decoded = unpack_zstd_bundle2(payload, zc)
-        return _decode_streams_with_optional_meta(layer_id, layer, decoded)
+    # --- Bundle / ZRAW payloads: primo byte, poi magic completo ---
+    # Tutti i magic iniziano con "Z" (ZRAW*, ZBN*) o "H" (HBN*): il legacy non fa lookup.
+    first = payload[0] if payload else 0
+    fn = None
+    if first == 0x5A:  # "Z": ZRAW1/ZRAW2 (5 byte, il caso più comune con zstd), poi ZBN*
+        fn = _DECODE_BY_MAGIC5.get(bytes(payload[:5]))
+        if fn is None:
+            fn = _DECODE_BY_MAGIC4.get(bytes(payload[:4]))
+    elif first == 0x48:  # "H": HBN*
+        fn = _DECODE_BY_MAGIC4.get(bytes(payload[:4]))
+    if fn is not None:
+        return fn(payload, layer_id, layer, codec)
 
     # --- Legacy v5 payload (fallback) ---
     symbol_kind = container_meta.get("symbol_kind")
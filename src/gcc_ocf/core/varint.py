@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+# ------------------------------------------------------------
+# uvarint LEB128 (7 bit per byte, bit alto = continua) condiviso dai formati
+# (ZBN/ZRAW, container v6, layer line/template/vocab).
+#
+# Casi 1..3 byte srotolati: lunghezze, conteggi e id stanno quasi sempre in <= 2 byte.
+# I messaggi d'errore sono parametri perché alcuni formati hanno i propri testi storici.
+# ------------------------------------------------------------
+
+
+def enc_varint(x: int, *, neg_msg: str = "varint negativo non supportato") -> bytes:
+    if x < 0:
+        raise ValueError(neg_msg)
+    if x < 0x80:
+        return bytes((x,))
+    if x < 0x4000:
+        return bytes(((x & 0x7F) | 0x80, x >> 7))
+    if x < 0x200000:
+        return bytes(((x & 0x7F) | 0x80, ((x >> 7) & 0x7F) | 0x80, x >> 14))
+    # buffer a dimensione esatta: nessuna crescita
+    n = (x.bit_length() + 6) // 7
+    out = bytearray(n)
+    for i in range(n - 1):
+        out[i] = (x & 0x7F) | 0x80
+        x >>= 7
+    out[n - 1] = x
+    return bytes(out)
+
+
+def dec_varint(
+    buf: bytes | memoryview,
+    idx: int,
+    *,
+    trunc_msg: str = "varint troncato",
+    big_msg: str = "varint troppo grande",
+) -> tuple[int, int]:
+    """(valore, indice dopo il varint); al più 10 byte (valori fino a 2^64)."""
+    end = len(buf)
+    if idx >= end:
+        raise ValueError(trunc_msg)
+    b0 = buf[idx]
+    if b0 < 0x80:
+        return b0, idx + 1
+    if idx + 1 >= end:
+        raise ValueError(trunc_msg)
+    b1 = buf[idx + 1]
+    if b1 < 0x80:
+        return (b0 & 0x7F) | (b1 << 7), idx + 2
+    if idx + 2 >= end:
+        raise ValueError(trunc_msg)
+    b2 = buf[idx + 2]
+    if b2 < 0x80:
+        return (b0 & 0x7F) | ((b1 & 0x7F) << 7) | (b2 << 14), idx + 3
+
+    x = (b0 & 0x7F) | ((b1 & 0x7F) << 7) | ((b2 & 0x7F) << 14)
+    shift = 21
+    idx += 3
+    while True:
+        if idx >= end:
+            raise ValueError(trunc_msg)
+        b = buf[idx]
+        idx += 1
+        x |= (b & 0x7F) << shift
+        if (b & 0x80) == 0:
+            break
+        shift += 7
+        if shift > 63:
+            raise ValueError(big_msg)
+    return x, idx
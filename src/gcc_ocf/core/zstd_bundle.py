@@ -1,163 +1,211 @@
 from __future__ import annotations
 
-from gcc_ocf.core.bundle import SymbolStream
+import os
+import struct
+import sys
+from collections.abc import Iterator
+from contextlib import nullcontext
+
+from gcc_ocf.core.bundle import SymbolStream, as_bytes
 from gcc_ocf.core.codec_zstd import CodecZstd
+from gcc_ocf.core.varint import dec_varint, enc_varint
 
 ZBN1_MAGIC = b"ZBN1"  # legacy: frame per-stream
-ZBN2_MAGIC = b"ZBN2"  # new: single zstd frame for whole bundle
-
-
-def _enc_varint(x: int) -> bytes:
-    if x < 0:
-        raise ValueError("varint negativo non supportato")
-    out = bytearray()
-    while True:
-        b = x & 0x7F
-        x >>= 7
-        if x:
-            out.append(0x80 | b)
-        else:
-            out.append(b)
-            break
-    return bytes(out)
+ZBN2_MAGIC = b"ZBN2"  # single zstd frame for whole bundle
+ZBN3_MAGIC = b"ZBN3"  # like ZBN2, names moved to a name table
 
+# SymbolStream è un tipo interno fidato (n coerente coi dati per costruzione):
+# i check di invariante in encode girano solo con GCC_OCF_DEBUG=1.
+# In decode l'input non è fidato: quei check restano sempre attivi.
+_DEBUG = os.environ.get("GCC_OCF_DEBUG") == "1"
 
-def _dec_varint(buf: bytes, idx: int) -> tuple[int, int]:
-    shift = 0
-    x = 0
-    while True:
-        if idx >= len(buf):
-            raise ValueError("varint troncato")
-        b = buf[idx]
-        idx += 1
-        x |= (b & 0x7F) << shift
-        if (b & 0x80) == 0:
-            break
-        shift += 7
-        if shift > 63:
-            raise ValueError("varint troppo grande")
-    return x, idx
+# per-stream header: kind(u8) + alphabet_size(u32) + n(u32)
+_HDR = struct.Struct(">BII")
+
+
+# LUT id -> varint per id < 2^14 (1-2 byte): costruita al primo stream grande che la usa.
+_VARINT2_LIMIT = 0x4000
+_VARINT2_MIN_IDS = 4096
+_varint2_table: list[bytes] | None = None
+
+
+def _get_varint2_table() -> list[bytes]:
+    global _varint2_table
+    if _varint2_table is None:
+        _varint2_table = [enc_varint(i) for i in range(_VARINT2_LIMIT)]
+    return _varint2_table
 
 
 def _pack_ids_varint(ids: list[int]) -> bytes:
-    out = bytearray()
+    if not ids:
+        return b""
+    lo = min(ids)
+    if lo < 0:
+        raise ValueError("ids negativi non supportati")
+    hi = max(ids)
+    # fast path: tutti gli id < 0x80 -> 1 byte ciascuno, conversione in C
+    if hi < 0x80:
+        return bytes(ids)
+    # fast path: id < 2^14 -> lookup + join interamente in C
+    if hi < _VARINT2_LIMIT and (_varint2_table is not None or len(ids) >= _VARINT2_MIN_IDS):
+        return b"".join(map(_get_varint2_table().__getitem__, ids))
+
+    # byte raccolti in lista, un solo bytes() finale a dimensione esatta
+    out: list[int] = []
+    append = out.append
     for v in ids:
-        if v < 0:
-            raise ValueError("ids negativi non supportati")
-        out += _enc_varint(int(v))
+        v = int(v)
+        while v >= 0x80:
+            append((v & 0x7F) | 0x80)
+            v >>= 7
+        append(v)
     return bytes(out)
 
 
-def _unpack_ids_varint(data: bytes, n: int) -> list[int]:
+def _unpack_ids_varint(data: bytes | memoryview, n: int) -> list[int]:
+    # fast path: nessun byte di continuazione e 1 byte per id
+    if len(data) == n:
+        b = data if isinstance(data, bytes) else bytes(data)
+        if b.isascii():
+            return list(b)
+
     ids: list[int] = []
+    append = ids.append
     idx = 0
+    end = len(data)
     for _ in range(n):
-        v, idx = _dec_varint(data, idx)
-        ids.append(v)
-    if idx != len(data):
+        if idx >= end:
+            raise ValueError("varint troncato")
+        v = data[idx]
+        idx += 1
+        if v >= 0x80:
+            v &= 0x7F
+            shift = 7
+            while True:
+                if idx >= end:
+                    raise ValueError("varint troncato")
+                b = data[idx]
+                idx += 1
+                v |= (b & 0x7F) << shift
+                if b < 0x80:
+                    break
+                shift += 7
+                if shift > 63:
+                    raise ValueError("varint troppo grande")
+        append(v)
+    if idx != end:
         raise ValueError("ids varint: bytes residui (n mismatch o payload corrotto)")
     return ids
 
 
-# -------------------------
-# ZBN1 (legacy): per-stream compression
-# -------------------------
-def pack_zstd_bundle(streams: list[SymbolStream], codec: CodecZstd | None = None) -> bytes:
-    if codec is None:
-        codec = CodecZstd()
+def _batch(codec):
+    """codec.batch() se disponibile (contesti zstd riusati), altrimenti no-op."""
+    batch = getattr(codec, "batch", None)
+    return batch() if batch is not None else nullcontext()
+
 
-    out = bytearray()
-    out += ZBN1_MAGIC
-    out += _enc_varint(len(streams))
-
-    for s in streams:
-        name_b = s.name.encode("utf-8")
-        if len(name_b) > 255:
-            raise ValueError("stream name troppo lungo (max 255)")
-        out.append(len(name_b))
-        out += name_b
-
-        if s.kind == "bytes":
-            kind = 0
-            raw = bytes(s.data)  # type: ignore[arg-type]
-            if s.n != len(raw):
-                raise ValueError("SymbolStream.n mismatch (bytes)")
-            payload = raw
-        elif s.kind == "ids":
-            kind = 1
-            ids = s.data  # type: ignore[assignment]
+def _varint_len(x: int) -> int:
+    return 1 if x < 0x80 else (x.bit_length() + 6) // 7
+
+
+def _stream_fields(s: SymbolStream) -> tuple[bytes, int, bytes]:
+    """SymbolStream -> (name_b, kind byte, payload non compresso)."""
+    name_b = s.name.encode("utf-8")
+    if len(name_b) > 255:
+        raise ValueError("stream name troppo lungo (max 255)")
+
+    if s.kind == "bytes":
+        raw = as_bytes(s.data)  # type: ignore[arg-type]
+        if _DEBUG and s.n != len(raw):
+            raise ValueError("SymbolStream.n mismatch (bytes)")
+        return name_b, 0, raw
+    if s.kind == "ids":
+        ids = s.data  # type: ignore[assignment]
+        if _DEBUG:
             if not isinstance(ids, list):
                 raise ValueError("ids stream deve avere data=list[int]")
             if s.n != len(ids):
                 raise ValueError("SymbolStream.n mismatch (ids)")
-            payload = _pack_ids_varint(ids)
-        else:
-            raise NotImplementedError(f"kind non supportato: {s.kind}")
+        return name_b, 1, _pack_ids_varint(ids)
+    raise NotImplementedError(f"kind non supportato: {s.kind}")
 
-        out.append(kind)
-        out += int(s.alphabet_size).to_bytes(4, "big")
-        out += int(s.n).to_bytes(4, "big")
 
-        comp = codec.compress(payload)
-        out += _enc_varint(len(comp))
-        out += comp
+# -------------------------
+# ZBN1 (legacy): per-stream compression
+# -------------------------
+def pack_zstd_bundle(streams: list[SymbolStream], codec: CodecZstd | None = None) -> bytes:
+    if codec is None:
+        codec = CodecZstd()
 
-    return bytes(out)
+    parts: list[bytes] = [ZBN1_MAGIC, enc_varint(len(streams))]
+    append = parts.append
+    with _batch(codec):
+        for s in streams:
+            name_b, kind, payload = _stream_fields(s)
+            comp = codec.compress(payload)
+            append(bytes((len(name_b),)))
+            append(name_b)
+            append(_HDR.pack(kind, int(s.alphabet_size), int(s.n)))
+            append(enc_varint(len(comp)))
+            append(comp)
+
+    # una sola allocazione finale
+    return b"".join(parts)
 
 
 def unpack_zstd_bundle(blob: bytes, codec: CodecZstd | None = None) -> list[SymbolStream]:
     if codec is None:
         codec = CodecZstd()
 
-    if len(blob) < 4 or blob[:4] != ZBN1_MAGIC:
+    if not blob.startswith(ZBN1_MAGIC):
         raise ValueError("ZBN1 magic non valido")
 
+    # memoryview: name/comp per-stream sono viste, niente copie intermedie
+    blob = memoryview(blob)
     idx = 4
-    n_streams, idx = _dec_varint(blob, idx)
+    n_streams, idx = dec_varint(blob, idx)
 
     streams: list[SymbolStream] = []
-    for _ in range(n_streams):
-        if idx >= len(blob):
-            raise ValueError("bundle troncato (name_len)")
-        name_len = blob[idx]
-        idx += 1
-        if idx + name_len > len(blob):
-            raise ValueError("bundle troncato (name)")
-        name = blob[idx : idx + name_len].decode("utf-8")
-        idx += name_len
-
-        if idx >= len(blob):
-            raise ValueError("bundle troncato (kind)")
-        kind_b = blob[idx]
-        idx += 1
-
-        if idx + 4 + 4 > len(blob):
-            raise ValueError("bundle troncato (sizes)")
-        alphabet_size = int.from_bytes(blob[idx : idx + 4], "big")
-        idx += 4
-        n = int.from_bytes(blob[idx : idx + 4], "big")
-        idx += 4
-
-        comp_len, idx = _dec_varint(blob, idx)
-        if idx + comp_len > len(blob):
-            raise ValueError("bundle troncato (comp bytes)")
-        comp = blob[idx : idx + comp_len]
-        idx += comp_len
-
-        payload = codec.decompress(comp)
-
-        if kind_b == 0:
-            data = payload
-            if len(data) != n:
-                raise ValueError("bundle corrotto: n mismatch (bytes)")
-            streams.append(SymbolStream(name=name, kind="bytes", alphabet_size=256, n=n, data=data))
-        elif kind_b == 1:
-            ids = _unpack_ids_varint(payload, n)
-            streams.append(
-                SymbolStream(name=name, kind="ids", alphabet_size=alphabet_size, n=n, data=ids)
-            )
-        else:
-            raise ValueError(f"kind byte sconosciuto: {kind_b}")
+    with _batch(codec):
+        for _ in range(n_streams):
+            if idx >= len(blob):
+                raise ValueError("bundle troncato (name_len)")
+            name_len = blob[idx]
+            idx += 1
+            if idx + name_len > len(blob):
+                raise ValueError("bundle troncato (name)")
+            name = sys.intern(str(blob[idx : idx + name_len], "utf-8"))
+            idx += name_len
+
+            if idx >= len(blob):
+                raise ValueError("bundle troncato (kind)")
+            if idx + _HDR.size > len(blob):
+                raise ValueError("bundle troncato (sizes)")
+            kind_b, alphabet_size, n = _HDR.unpack_from(blob, idx)
+            idx += _HDR.size
+
+            comp_len, idx = dec_varint(blob, idx)
+            if idx + comp_len > len(blob):
+                raise ValueError("bundle troncato (comp bytes)")
+            comp = blob[idx : idx + comp_len]
+            idx += comp_len
+
+            payload = codec.decompress(comp)
+
+            if kind_b == 0:
+                data = payload
+                if len(data) != n:
+                    raise ValueError("bundle corrotto: n mismatch (bytes)")
+                streams.append(
+                    SymbolStream(name=name, kind="bytes", alphabet_size=256, n=n, data=data)
+                )
+            elif kind_b == 1:
+                ids = _unpack_ids_varint(payload, n)
+                streams.append(
+                    SymbolStream(name=name, kind="ids", alphabet_size=alphabet_size, n=n, data=ids)
+                )
+            else:
+                raise ValueError(f"kind byte sconosciuto: {kind_b}")
 
     return streams
 
@@ -165,71 +213,109 @@ def unpack_zstd_bundle(blob: bytes, codec: CodecZstd | None = None) -> list[Symb
 # -------------------------
 # ZBN2 (new): single-frame compression for all streams together
 # -------------------------
-def _pack_inner(streams: list[SymbolStream]) -> bytes:
-    inner = bytearray()
-    inner += _enc_varint(len(streams))
-
-    for s in streams:
-        name_b = s.name.encode("utf-8")
-        if len(name_b) > 255:
-            raise ValueError("stream name troppo lungo (max 255)")
-        inner.append(len(name_b))
-        inner += name_b
-
-        if s.kind == "bytes":
-            kind = 0
-            raw = bytes(s.data)  # type: ignore[arg-type]
-            if s.n != len(raw):
-                raise ValueError("SymbolStream.n mismatch (bytes)")
-            payload = raw
-        elif s.kind == "ids":
-            kind = 1
-            ids = s.data  # type: ignore[assignment]
-            if not isinstance(ids, list):
-                raise ValueError("ids stream deve avere data=list[int]")
-            if s.n != len(ids):
-                raise ValueError("SymbolStream.n mismatch (ids)")
-            payload = _pack_ids_varint(ids)
-        else:
-            raise NotImplementedError(f"kind non supportato: {s.kind}")
-
-        inner.append(kind)
-        inner += int(s.alphabet_size).to_bytes(4, "big")
-        inner += int(s.n).to_bytes(4, "big")
-        inner += _enc_varint(len(payload))
-        inner += payload
-
-    return bytes(inner)
-
-
-def _unpack_inner(inner: bytes) -> list[SymbolStream]:
+def _plan_inner(streams: list[SymbolStream]) -> tuple[int, list[tuple[bytes, int, bytes]]]:
+    """Campi per-stream + dimensione esatta dell'inner (senza serializzarlo)."""
+    fields = [_stream_fields(s) for s in streams]
+    total = _varint_len(len(streams))
+    for name_b, _, payload in fields:
+        # ZBN2: name_len+name nel record; ZBN3: stessi byte, ma nella name table
+        total += 1 + len(name_b) + _HDR.size + _varint_len(len(payload)) + len(payload)
+    return total, fields
+
+
+def _iter_inner(
+    streams: list[SymbolStream],
+    fields: list[tuple[bytes, int, bytes]],
+    *,
+    name_table: bool = False,
+) -> Iterator[bytes]:
+    """
+    Inner a chunk: header per-stream (piccolo) + payload (così com'è, niente copie).
+
+    ZBN2: varint(n) + repeat(name_len u8, name, kind u8, alphabet u32, n u32, varint(len), payload)
+    ZBN3: varint(n) + name_len u8 * n + names concatenati
+          + repeat(kind u8, alphabet u32, n u32, varint(len), payload)
+    """
+    yield enc_varint(len(streams))
+    hdr_pack = _HDR.pack
+    if name_table:
+        yield bytes(len(name_b) for name_b, _, _ in fields)
+        yield b"".join(name_b for name_b, _, _ in fields)
+        for s, (_, kind, payload) in zip(streams, fields, strict=True):
+            yield hdr_pack(kind, int(s.alphabet_size), int(s.n)) + enc_varint(len(payload))
+            yield payload
+        return
+
+    for s, (name_b, kind, payload) in zip(streams, fields, strict=True):
+        yield (
+            bytes((len(name_b),))
+            + name_b
+            + hdr_pack(kind, int(s.alphabet_size), int(s.n))
+            + enc_varint(len(payload))
+        )
+        yield payload
+
+
+def _pack_inner(streams: list[SymbolStream], *, name_table: bool = False) -> bytearray:
+    # pass 1: campi per-stream + dimensione esatta
+    total, fields = _plan_inner(streams)
+
+    # pass 2: un solo buffer preallocato, riempito in place
+    inner = bytearray(total)
+    off = 0
+    with memoryview(inner) as mv:
+        for chunk in _iter_inner(streams, fields, name_table=name_table):
+            mv[off : off + len(chunk)] = chunk
+            off += len(chunk)
+
+    if off != total:
+        raise AssertionError("_pack_inner: size mismatch")
+    return inner
+
+
+def _unpack_inner(inner: bytes, *, name_table: bool = False) -> list[SymbolStream]:
+    # nomi (max 255 byte, pochi distinti: "main", "__meta__", ...) internati:
+    # una sola copia per processo e confronti per identità in _streams_to_symbols
+    # memoryview: name/payload per-stream sono viste; bytes solo per i SymbolStream "bytes"
+    inner = memoryview(inner)
     idx = 0
-    n_streams, idx = _dec_varint(inner, idx)
+    n_streams, idx = dec_varint(inner, idx)
+
+    names: list[str] | None = None
+    if name_table:
+        if idx + n_streams > len(inner):
+            raise ValueError("inner troncato (name table)")
+        name_lens = inner[idx : idx + n_streams]
+        idx += n_streams
+        names = []
+        for name_len in name_lens:
+            if idx + name_len > len(inner):
+                raise ValueError("inner troncato (name)")
+            names.append(sys.intern(str(inner[idx : idx + name_len], "utf-8")))
+            idx += name_len
 
     streams: list[SymbolStream] = []
-    for _ in range(n_streams):
-        if idx >= len(inner):
-            raise ValueError("inner troncato (name_len)")
-        name_len = inner[idx]
-        idx += 1
-        if idx + name_len > len(inner):
-            raise ValueError("inner troncato (name)")
-        name = inner[idx : idx + name_len].decode("utf-8")
-        idx += name_len
+    for i in range(n_streams):
+        if names is not None:
+            name = names[i]
+        else:
+            if idx >= len(inner):
+                raise ValueError("inner troncato (name_len)")
+            name_len = inner[idx]
+            idx += 1
+            if idx + name_len > len(inner):
+                raise ValueError("inner troncato (name)")
+            name = sys.intern(str(inner[idx : idx + name_len], "utf-8"))
+            idx += name_len
 
         if idx >= len(inner):
             raise ValueError("inner troncato (kind)")
-        kind_b = inner[idx]
-        idx += 1
-
-        if idx + 4 + 4 > len(inner):
+        if idx + _HDR.size > len(inner):
             raise ValueError("inner troncato (sizes)")
-        alphabet_size = int.from_bytes(inner[idx : idx + 4], "big")
-        idx += 4
-        n = int.from_bytes(inner[idx : idx + 4], "big")
-        idx += 4
+        kind_b, alphabet_size, n = _HDR.unpack_from(inner, idx)
+        idx += _HDR.size
 
-        payload_len, idx = _dec_varint(inner, idx)
+        payload_len, idx = dec_varint(inner, idx)
         if idx + payload_len > len(inner):
             raise ValueError("inner troncato (payload)")
         payload = inner[idx : idx + payload_len]
@@ -239,7 +325,7 @@ def _unpack_inner(inner: bytes) -> list[SymbolStream]:
             if len(payload) != n:
                 raise ValueError("inner corrotto: n mismatch (bytes)")
             streams.append(
-                SymbolStream(name=name, kind="bytes", alphabet_size=256, n=n, data=payload)
+                SymbolStream(name=name, kind="bytes", alphabet_size=256, n=n, data=bytes(payload))
             )
         elif kind_b == 1:
             ids = _unpack_ids_varint(payload, n)
@@ -254,30 +340,61 @@ def _unpack_inner(inner: bytes) -> list[SymbolStream]:
     return streams
 
 
-def pack_zstd_bundle2(streams: list[SymbolStream], codec: CodecZstd | None = None) -> bytes:
+def _pack_single_frame(
+    magic: bytes, streams: list[SymbolStream], codec: CodecZstd | None, *, name_table: bool
+) -> bytes:
     if codec is None:
         codec = CodecZstd()
-    inner = _pack_inner(streams)
-    comp = codec.compress(inner)
-    out = bytearray()
-    out += ZBN2_MAGIC
-    out += _enc_varint(len(inner))
-    out += comp
-    return bytes(out)
 
+    compress_chunks = getattr(codec, "compress_chunks", None)
+    if compress_chunks is not None:
+        # streaming: l'inner non viene mai materializzato (inner_len noto dal pass 1)
+        inner_len, fields = _plan_inner(streams)
+        comp = compress_chunks(_iter_inner(streams, fields, name_table=name_table), size=inner_len)
+    else:
+        inner = _pack_inner(streams, name_table=name_table)
+        inner_len = len(inner)
+        comp = codec.compress(inner)
 
-def unpack_zstd_bundle2(blob: bytes, codec: CodecZstd | None = None) -> list[SymbolStream]:
+    return magic + enc_varint(inner_len) + comp
+
+
+def _unpack_single_frame(
+    magic: bytes, blob: bytes, codec: CodecZstd | None, *, name_table: bool
+) -> list[SymbolStream]:
     if codec is None:
         codec = CodecZstd()
 
-    if len(blob) < 4 or blob[:4] != ZBN2_MAGIC:
-        raise ValueError("ZBN2 magic non valido")
+    tag = magic.decode("ascii")
+    if not blob.startswith(magic):
+        raise ValueError(f"{tag} magic non valido")
 
+    mv = memoryview(blob)
     idx = 4
-    inner_len, idx = _dec_varint(blob, idx)
-    comp = blob[idx:]
-    inner = codec.decompress(comp)
+    inner_len, idx = dec_varint(mv, idx)
+    comp = mv[idx:]
+    inner = codec.decompress(comp, out_size=inner_len)
     if len(inner) != inner_len:
         # strict: se non matcha, file corrotto o codec errato
-        raise ValueError("ZBN2: inner_len mismatch (file corrotto?)")
-    return _unpack_inner(inner)
+        raise ValueError(f"{tag}: inner_len mismatch (file corrotto?)")
+    return _unpack_inner(inner, name_table=name_table)
+
+
+def pack_zstd_bundle2(streams: list[SymbolStream], codec: CodecZstd | None = None) -> bytes:
+    return _pack_single_frame(ZBN2_MAGIC, streams, codec, name_table=False)
+
+
+def unpack_zstd_bundle2(blob: bytes, codec: CodecZstd | None = None) -> list[SymbolStream]:
+    return _unpack_single_frame(ZBN2_MAGIC, blob, codec, name_table=False)
+
+
+# -------------------------
+# ZBN3: come ZBN2, ma i nomi stanno in una name table (lunghezze + blob UTF-8)
+# davanti ai record, che restano a header fisso (kind, alphabet, n) + payload.
+# -------------------------
+def pack_zstd_bundle3(streams: list[SymbolStream], codec: CodecZstd | None = None) -> bytes:
+    return _pack_single_frame(ZBN3_MAGIC, streams, codec, name_table=True)
+
+
+def unpack_zstd_bundle3(blob: bytes, codec: CodecZstd | None = None) -> list[SymbolStream]:
+    return _unpack_single_frame(ZBN3_MAGIC, blob, codec, name_table=True)
@@ -1,40 +1,11 @@
 from __future__ import annotations
 
+from gcc_ocf.core.bundle import as_bytes
 from gcc_ocf.core.codec_zstd import CodecZstd
+from gcc_ocf.core.varint import dec_varint, enc_varint
 
-ZRAW1_MAGIC = b"ZRAW1"
-
-
-def _enc_varint(x: int) -> bytes:
-    if x < 0:
-        raise ValueError("varint negativo non supportato")
-    out = bytearray()
-    while True:
-        b = x & 0x7F
-        x >>= 7
-        if x:
-            out.append(0x80 | b)
-        else:
-            out.append(b)
-            break
-    return bytes(out)
-
-
-def _dec_varint(buf: bytes, idx: int) -> tuple[int, int]:
-    shift = 0
-    x = 0
-    while True:
-        if idx >= len(buf):
-            raise ValueError("varint troncato")
-        b = buf[idx]
-        idx += 1
-        x |= (b & 0x7F) << shift
-        if (b & 0x80) == 0:
-            break
-        shift += 7
-        if shift > 63:
-            raise ValueError("varint troppo grande")
-    return x, idx
+ZRAW1_MAGIC = b"ZRAW1"  # main bytes
+ZRAW2_MAGIC = b"ZRAW2"  # main bytes + __meta__ bytes, un solo frame
 
 
 def pack_zstd_raw(data: bytes, codec: CodecZstd) -> bytes:
@@ -42,17 +13,45 @@ def pack_zstd_raw(data: bytes, codec: CodecZstd) -> bytes:
     Layout:
       ZRAW1_MAGIC + varint(uncompressed_len) + zstd(compressed bytes)
     """
-    raw = bytes(data)
+    raw = as_bytes(data)
     comp = codec.compress(raw)
-    return ZRAW1_MAGIC + _enc_varint(len(raw)) + comp
+    return ZRAW1_MAGIC + enc_varint(len(raw)) + comp
 
 
 def unpack_zstd_raw(blob: bytes, codec: CodecZstd) -> bytes:
-    if len(blob) < 5 or blob[:5] != ZRAW1_MAGIC:
+    if not blob.startswith(ZRAW1_MAGIC):
         raise ValueError("ZRAW1 magic non valido")
-    n, idx = _dec_varint(blob, 5)
-    comp = blob[idx:]
+    mv = memoryview(blob)
+    n, idx = dec_varint(mv, 5)
+    comp = mv[idx:]
     raw = codec.decompress(comp, out_size=n)
     if len(raw) != n:
         raise ValueError("ZRAW1: uncompressed_len mismatch (file corrotto?)")
     return raw
+
+
+def pack_zstd_raw2(main: bytes, meta: bytes, codec: CodecZstd) -> bytes:
+    """
+    Caso (main bytes + __meta__ bytes) senza framing ZBN2.
+
+    Layout:
+      ZRAW2_MAGIC + varint(main_len) + varint(meta_len) + zstd(main || meta)
+    """
+    main_b = as_bytes(main)
+    meta_b = as_bytes(meta)
+    comp = codec.compress(main_b + meta_b)
+    return ZRAW2_MAGIC + enc_varint(len(main_b)) + enc_varint(len(meta_b)) + comp
+
+
+def unpack_zstd_raw2(blob: bytes, codec: CodecZstd) -> tuple[bytes, bytes]:
+    """Ritorna (main, meta)."""
+    if not blob.startswith(ZRAW2_MAGIC):
+        raise ValueError("ZRAW2 magic non valido")
+    mv = memoryview(blob)
+    main_len, idx = dec_varint(mv, 5)
+    meta_len, idx = dec_varint(mv, idx)
+    n = main_len + meta_len
+    raw = codec.decompress(mv[idx:], out_size=n)
+    if len(raw) != n:
+        raise ValueError("ZRAW2: uncompressed_len mismatch (file corrotto?)")
+    return raw[:main_len], raw[main_len:]
@@ -1,17 +1,23 @@
 from __future__ import annotations
 
 import json
+import sys
 from collections.abc import Iterable
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Final
 
+from gcc_ocf.core.fast_json import dumps_indent2, loads
 from gcc_ocf.errors import CorruptPayload
 
 SPEC_INDEX_V1: Final[str] = "gcc-ocf.dir_bundle_index.v1"
 
+# rel corti (il caso normale) vengono internati: directory con migliaia di file
+# ripetono gli stessi path tra index, manifest e lookup.
+_INTERN_REL_MAX: Final[int] = 128
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class DirIndexEntry:
     rel: str
     offset: int
@@ -43,8 +49,45 @@ class DirIndexEntry:
         if not isinstance(sha, str) or not sha:
             raise CorruptPayload(f"bundle index entry invalida (sha256): {raw}")
 
+        if len(rel) < _INTERN_REL_MAX:
+            rel = sys.intern(rel)
         return DirIndexEntry(rel=rel, offset=off_i, length=ln_i, sha256=sha)
 
+    @staticmethod
+    def list_from_dicts(files_raw: list[Any]) -> list[DirIndexEntry]:
+        """
+        Bulk from_dict: fast path per entry già ben tipate (caso normale),
+        fallback su from_dict (coercizioni + messaggi d'errore precisi) per le altre.
+        """
+        die = DirIndexEntry
+        intern = sys.intern
+        slow = DirIndexEntry.from_dict
+        out: list[DirIndexEntry] = []
+        app = out.append
+        for x in files_raw:
+            try:
+                rel = x["rel"]
+                off = x["offset"]
+                ln = x["length"]
+                sha = x["sha256"]
+            except (KeyError, TypeError, IndexError):
+                app(slow(x))
+                continue
+            if (
+                type(rel) is str
+                and rel
+                and type(off) is int
+                and off >= 0
+                and type(ln) is int
+                and ln >= 0
+                and type(sha) is str
+                and sha
+            ):
+                app(die(intern(rel) if len(rel) < _INTERN_REL_MAX else rel, off, ln, sha))
+            else:
+                app(slow(x))
+        return out
+
     def to_dict(self) -> dict[str, Any]:
         return {
             "rel": self.rel,
@@ -81,14 +124,26 @@ class DirBundleIndexV1:
     files: list[DirIndexEntry]
     stream_codecs_used: str | None = None
 
+    # rel -> entry, costruito al primo get() (prima occorrenza vince, come la scansione)
+    # e tenuto allineato da put(): è l'unico modo supportato di aggiungere voci dopo un
+    # get(); modifiche dirette a `files` non sono viste dalla mappa.
+    _by_rel: dict[str, DirIndexEntry] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
     def put(self, name: str, offset: int, length: int, sha256: str) -> None:
-        self.files.append(DirIndexEntry(rel=name, offset=offset, length=length, sha256=sha256))
+        e = DirIndexEntry(rel=name, offset=offset, length=length, sha256=sha256)
+        self.files.append(e)
+        if self._by_rel is not None:
+            self._by_rel.setdefault(name, e)
 
     def get(self, name: str) -> DirIndexEntry | None:
-        for e in self.files:
-            if e.rel == name:
-                return e
-        return None
+        if self._by_rel is None:
+            by_rel: dict[str, DirIndexEntry] = {}
+            for e in self.files:
+                by_rel.setdefault(e.rel, e)
+            self._by_rel = by_rel
+        return self._by_rel.get(name)
 
     def iter_entries(self) -> Iterable[DirIndexEntry]:
         return iter(self.files)
@@ -109,12 +164,15 @@ class DirBundleIndexV1:
         return d
 
     def serialize(self, *, indent: int = 2) -> bytes:
+        if indent == 2:
+            # orjson se disponibile (bytes identici allo stdlib)
+            return dumps_indent2(self.to_dict())
         return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent).encode("utf-8")
 
     @classmethod
     def deserialize(cls, data: bytes) -> DirBundleIndexV1:
         try:
-            raw = json.loads(data.decode("utf-8"))
+            raw = loads(data)
         except Exception as e:
             raise CorruptPayload(f"bundle index JSON invalido: {e}") from e
         return cls.from_dict(raw)
@@ -147,7 +205,7 @@ class DirBundleIndexV1:
         if not isinstance(files_raw, list):
             raise CorruptPayload("bundle index invalido (files)")
 
-        files = [DirIndexEntry.from_dict(x) for x in files_raw]
+        files = DirIndexEntry.list_from_dicts(files_raw)
 
         if "count" in raw:
             try:
@@ -16,10 +16,16 @@ aggregations derived from the produced artifacts (manifest.jsonl, bucket stats).
 
 from __future__ import annotations
 
-import json
+import heapq
+from functools import lru_cache
+from itertools import groupby, starmap
+from operator import itemgetter
 from pathlib import Path
+from sys import intern
 from typing import Any
 
+from gcc_ocf.core.fast_json import loads
+
 
 def _safe_int(x: object, default: int = 0) -> int:
     try:
@@ -38,9 +44,12 @@ def _safe_float(x: object, default: float = 0.0) -> float:
 
 
 def _safe_stream_codecs(d: object) -> dict[int, str]:
-    out: dict[int, str] = {}
+    """Normalize to {int: str}. Already-normalized dicts are returned as-is (read-only use)."""
     if not isinstance(d, dict):
-        return out
+        return {}
+    if all(type(k) is int for k in d) and all(type(v) is str for v in d.values()):
+        return d
+    out: dict[int, str] = {}
     for k, v in d.items():
         try:
             ik = int(k)  # type: ignore[arg-type]
@@ -50,26 +59,54 @@ def _safe_stream_codecs(d: object) -> dict[int, str]:
     return out
 
 
+@lru_cache(maxsize=1024)
+def _ext_label(suf: str) -> str:
+    # Cached: one canonical label object per suffix, so ext_stats hits compare by identity.
+    return suf.lower() if suf else "(none)"
+
+
 def _norm_ext(rel: str) -> str:
-    suf = Path(rel).suffix.lower()
-    return suf if suf else "(none)"
+    # Same rule as Path(rel).suffix, without building a Path per row:
+    # last component, dot not leading and not trailing.
+    name = rel.rstrip("/").rpartition("/")[2]
+    i = name.rfind(".")
+    return _ext_label(name[i:] if 0 < i < len(name) - 1 else "")
 
 
-def _plan_key(plan: dict[str, Any] | None) -> str:
+PlanTuple = tuple[str, str, tuple[tuple[int, str], ...], str] | tuple[()]
+
+
+def _plan_tuple(plan: dict[str, Any] | None) -> PlanTuple:
+    """Compact, sortable plan identity; () means "no plan"."""
     if not plan:
-        return "(none)"
-    layer_id = str(plan.get("layer_id") or plan.get("layer") or "")
-    codec_text = str(plan.get("codec_text") or plan.get("codec") or "")
+        return ()
+    # Tiny vocabularies, fresh str per manifest row: intern so the plan sort and
+    # groupby compare mostly by identity.
+    layer_id = intern(str(plan.get("layer_id") or plan.get("layer") or ""))
+    codec_text = intern(str(plan.get("codec_text") or plan.get("codec") or ""))
     sc = _safe_stream_codecs(plan.get("stream_codecs"))
-    note = str(plan.get("note") or plan.get("plan_note") or "").strip()
-    sc_part = ""
-    if sc:
-        items = sorted(sc.items(), key=lambda kv: kv[0])
-        sc_part = ";streams=" + ",".join([f"{k}:{v}" for k, v in items])
+    note = intern(str(plan.get("note") or plan.get("plan_note") or "").strip())
+    return (layer_id, codec_text, tuple(sorted(sc.items())), note)
+
+
+# join() materializes its input anyway: starmap over a bound format beats a genexpr
+# (and skips the listcomp frame).
+_SC_ITEM_FMT = "{}:{}".format
+
+
+def _format_plan_key(pt: PlanTuple) -> str:
+    if not pt:
+        return "(none)"
+    layer_id, codec_text, sc_items, note = pt
+    sc_part = ";streams=" + ",".join(starmap(_SC_ITEM_FMT, sc_items)) if sc_items else ""
     note_part = f";note={note}" if note else ""
     return f"{layer_id}+{codec_text}{sc_part}{note_part}"
 
 
+def _plan_key(plan: dict[str, Any] | None) -> str:
+    return _format_plan_key(_plan_tuple(plan))
+
+
 def _bytes_h(n: int) -> str:
     if n < 0:
         return str(n)
@@ -88,16 +125,21 @@ def _load_manifest_rows(output_dir: Path) -> list[dict[str, Any]]:
     if not path.is_file():
         return []
     rows: list[dict[str, Any]] = []
-    for ln in path.read_text(encoding="utf-8").splitlines():
-        ln = ln.strip()
-        if not ln:
-            continue
-        try:
-            obj = json.loads(ln)
-        except Exception:
-            continue
-        if isinstance(obj, dict):
-            rows.append(obj)
+    # Bound methods hoisted out of the per-line loop.
+    append = rows.append
+    _loads = loads
+    # Streaming line-by-line (binary): no full-file text + splitlines list in memory.
+    with path.open("rb") as f:
+        for raw in f:
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                obj = _loads(raw)
+            except Exception:
+                continue
+            if type(obj) is dict:
+                append(obj)
     return rows
 
 
@@ -157,10 +199,12 @@ def build_dir_pack_report(
     if not file_rows:
         file_rows = _load_manifest_rows(output_dir)
 
-    # Aggregate by extension / plan / bucket
-    ext_stats: dict[str, dict[str, int]] = {}
-    plan_stats: dict[str, dict[str, int]] = {}
-    bucket_stats: dict[int, dict[str, Any]] = {}
+    # Aggregate by extension / plan / bucket.
+    # Accumulators are mutable [files, in, out] lists: one dict lookup per group per row.
+    ext_stats: dict[str, list[int]] = {}
+    plan_stats: dict[str, list[int]] = {}
+    bucket_stats: dict[int, list[int]] = {}
+    plan_rows: list[tuple[PlanTuple, int, int]] = []
 
     for r in file_rows:
         rel = str(r.get("rel") or r.get("path") or r.get("name") or "")
@@ -171,10 +215,6 @@ def build_dir_pack_report(
         out_sz = _safe_int(r.get("out_size"), _safe_int(r.get("size_out"), 0))
 
         ext = _norm_ext(rel)
-        es = ext_stats.setdefault(ext, {"files": 0, "in": 0, "out": 0})
-        es["files"] += 1
-        es["in"] += in_sz
-        es["out"] += out_sz
 
         plan_obj: dict[str, Any] = {
             "layer_id": r.get("layer_id"),
@@ -182,42 +222,54 @@ def build_dir_pack_report(
             "stream_codecs": r.get("stream_codecs"),
             "note": r.get("plan_note") or r.get("note"),
         }
-        pk = _plan_key(plan_obj)
-        ps = plan_stats.setdefault(pk, {"files": 0, "in": 0, "out": 0})
-        ps["files"] += 1
-        ps["in"] += in_sz
-        ps["out"] += out_sz
-
-        bs = bucket_stats.setdefault(b, {"bucket": b, "files": 0, "in": 0, "out": 0})
-        bs["files"] += 1
-        bs["in"] += in_sz
-        bs["out"] += out_sz
-
-    def _top_rows(stats: dict[str, dict[str, int]], k: int) -> list[dict[str, Any]]:
-        rows: list[dict[str, Any]] = []
-        for key, v in stats.items():
-            in_b = _safe_int(v.get("in"), 0)
-            out_b = _safe_int(v.get("out"), 0)
+        plan_rows.append((_plan_tuple(plan_obj), in_sz, out_sz))
+
+        es = ext_stats.get(ext)
+        if es is None:
+            es = ext_stats[ext] = [0, 0, 0]
+        es[0] += 1
+        es[1] += in_sz
+        es[2] += out_sz
+
+        bs = bucket_stats.get(b)
+        if bs is None:
+            bs = bucket_stats[b] = [0, 0, 0]
+        bs[0] += 1
+        bs[1] += in_sz
+        bs[2] += out_sz
+
+    # Plans: sort by compact tuple key, fold runs of equal plans, format the
+    # string key once per distinct plan (not per row). Distinct tuples that
+    # render to the same string still merge, as with the string-keyed grouping.
+    plan_rows.sort(key=itemgetter(0))
+    for pt, grp in groupby(plan_rows, key=itemgetter(0)):
+        g = list(grp)
+        pk = _format_plan_key(pt)
+        ps = plan_stats.get(pk)
+        if ps is None:
+            ps = plan_stats[pk] = [0, 0, 0]
+        ps[0] += len(g)
+        ps[1] += sum(x[1] for x in g)
+        ps[2] += sum(x[2] for x in g)
+
+    def _top_rows(stats: dict[str, list[int]], k: int) -> list[dict[str, Any]]:
+        # Sort key materialized once per group from the int accumulators
+        # (no per-comparison _safe_int calls), kept beside the row, not in it.
+        keyed: list[tuple[tuple[int, int, str], dict[str, Any]]] = []
+        for key, (files, in_b, out_b) in stats.items():
             saved = in_b - out_b
             ratio = (out_b / in_b) if in_b else 0.0
-            rows.append(
-                {
-                    "key": key,
-                    "files": _safe_int(v.get("files"), 0),
-                    "in": in_b,
-                    "out": out_b,
-                    "saved": saved,
-                    "ratio": float(ratio),
-                }
-            )
-        rows.sort(
-            key=lambda rr: (
-                -_safe_int(rr.get("saved"), 0),
-                _safe_int(rr.get("out"), 0),
-                str(rr.get("key")),
-            )
-        )
-        return rows[: max(0, int(k))]
+            row = {
+                "key": key,
+                "files": files,
+                "in": in_b,
+                "out": out_b,
+                "saved": saved,
+                "ratio": ratio,
+            }
+            keyed.append(((-saved, out_b, str(key)), row))
+        # Top-k only: O(N log k) heap instead of sorting every group.
+        return [row for _, row in heapq.nsmallest(max(0, int(k)), keyed, key=itemgetter(0))]
 
     top_extensions = _top_rows(ext_stats, 10)
     top_plans = _top_rows(plan_stats, 10)
@@ -226,15 +278,20 @@ def build_dir_pack_report(
     top_buckets: list[dict[str, Any]] = []
     buckets_detail: dict[str, Any] = {}
 
-    all_bucket_ids: set[int] = set(int(k) for k in bucket_stats.keys())
+    # bucket_stats keys are already ints (from _safe_int); only summary keys need parsing.
+    # Ids arrive in manifest-row order, so one sort stays (timsort is linear on sorted runs).
+    all_bucket_ids: set[int] = set(bucket_stats)
     for k in bucket_summaries.keys():
+        if type(k) is int:
+            all_bucket_ids.add(k)
+            continue
         try:
             all_bucket_ids.add(int(k))  # type: ignore[arg-type]
         except Exception:
             continue
 
     for b in sorted(all_bucket_ids):
-        bs = bucket_stats.get(b, {"bucket": b, "files": 0, "in": 0, "out": 0})
+        b_files, in_b, out_b = bucket_stats.get(b) or (0, 0, 0)
         summ = bucket_summaries.get(b) if isinstance(bucket_summaries, dict) else None
         if summ is None and isinstance(bucket_summaries, dict):
             summ = bucket_summaries.get(f"{b:02d}") or bucket_summaries.get(str(b))
@@ -244,8 +301,6 @@ def build_dir_pack_report(
             (summ or {}).get("chosen") if isinstance((summ or {}).get("chosen"), dict) else None
         )
 
-        in_b = _safe_int(bs.get("in"), 0)
-        out_b = _safe_int(bs.get("out"), 0)
         saved = in_b - out_b
         ratio = (out_b / in_b) if in_b else 0.0
 
@@ -263,44 +318,33 @@ def build_dir_pack_report(
         top3 = [_cand_to_public(c) for c in sorted_ok[:3]]
         selected_by = "autopick" if sorted_ok else "heuristic_or_spec"
 
-        buckets_detail[f"{b:02d}"] = {
+        entry = {
             "bucket": b,
             "bucket_type": btype,
-            "files": _safe_int(bs.get("files"), 0),
+            "files": b_files,
             "in": in_b,
             "out": out_b,
             "saved": saved,
-            "ratio": float(ratio),
+            "ratio": ratio,
             "chosen": chosen,
+        }
+        top_buckets.append(entry)
+        # Detail = the same fields + "why" (C-level copy; top_buckets rows stay without it).
+        buckets_detail[f"{b:02d}"] = {
+            **entry,
             "why": {
                 "selected_by": selected_by,
                 "top_candidates": top3,
             },
         }
 
-        top_buckets.append(
-            {
-                "bucket": b,
-                "bucket_type": btype,
-                "files": _safe_int(bs.get("files"), 0),
-                "in": in_b,
-                "out": out_b,
-                "saved": saved,
-                "ratio": float(ratio),
-                "chosen": chosen,
-            }
-        )
-
-    top_buckets.sort(
-        key=lambda r: (
-            -_safe_int(r.get("saved"), 0),
-            _safe_int(r.get("out"), 0),
-            _safe_int(r.get("bucket"), 0),
-        )
-    )
+    # Rows built above hold plain ints: no _safe_int round-trips in the key.
+    top_buckets.sort(key=lambda r: (-r["saved"], r["out"], r["bucket"]))
     top_buckets = top_buckets[:5]
 
-    overall_ratio = (int(total_out) / int(total_in)) if int(total_in) else 0.0
+    total_in = int(total_in)
+    total_out = int(total_out)
+    overall_ratio = (total_out / total_in) if total_in else 0.0
 
     # Deterministic: omit absolute paths and timestamps.
     return {
@@ -315,9 +359,9 @@ def build_dir_pack_report(
         "buckets": int(buckets),
         "files_ok": int(files_ok),
         "files_fail": int(files_fail),
-        "total_in": int(total_in),
-        "total_out": int(total_out),
-        "ratio": float(overall_ratio),
+        "total_in": total_in,
+        "total_out": total_out,
+        "ratio": overall_ratio,
         "top_buckets": top_buckets,
         "top_extensions": top_extensions,
         "top_plans": top_plans,
@@ -14,7 +14,8 @@ Design goals:
 from __future__ import annotations
 
 import json
-from collections.abc import Iterable, Mapping
+from collections.abc import Mapping
+from collections.abc import Set as AbstractSet
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -26,20 +27,10 @@ class DirPipelineSpecError(ValueError):
     pass
 
 
-_STREAM_NAME_TO_KEY = {
-    "MAIN": "MAIN",
-    "TEXT": "TEXT",
-    "NUMS": "NUMS",
-    "IDS": "IDS",
-    "TPL": "TPL",
-    "META": "META",
-    "CONS": "CONS",
-    "VOWELS": "VOWELS",
-    "MASK": "MASK",
-}
+_STREAM_NAMES = frozenset({"MAIN", "TEXT", "NUMS", "IDS", "TPL", "META", "CONS", "VOWELS", "MASK"})
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DirAutopick:
     enabled: bool | None = None
     sample_n: int | None = None
@@ -48,13 +39,13 @@ class DirAutopick:
     refresh_top: bool | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DirResourceNumDictV1:
     enabled: bool | None = None
     k: int | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DirResourceTplDictV0:
     """Bucket-level shared template dictionary for tpl_lines_shared_v0 (archive-only)."""
 
@@ -62,7 +53,7 @@ class DirResourceTplDictV0:
     k: int | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DirPlan:
     layer: str
     codec: str
@@ -70,7 +61,7 @@ class DirPlan:
     note: str = ""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DirPipelineSpec:
     spec: str
     buckets: int | None = None
@@ -104,24 +95,29 @@ def _expect_type(name: str, v: Any, t: type) -> Any:
     return v
 
 
-def _ensure_allowed_keys(obj_name: str, obj: Mapping[str, Any], allowed: Iterable[str]) -> None:
-    allowed_set = set(allowed)
-    extra = [k for k in obj.keys() if k not in allowed_set]
-    if extra:
-        raise DirPipelineSpecError(
-            f"dir pipeline spec: chiavi non supportate in {obj_name}: {', '.join(sorted(extra))}"
-        )
+# Allowed keys per object, built once at import (not per validated object).
+_ROOT_KEYS = frozenset({"spec", "buckets", "archive", "autopick", "candidate_pools", "resources"})
+_AUTOPICK_KEYS = frozenset({"enabled", "sample_n", "top_k", "top_db_max", "refresh_top"})
+_PLAN_KEYS = frozenset({"layer", "codec", "stream_codecs", "note"})
+_RESOURCES_KEYS = frozenset({"num_dict_v1", "tpl_dict_v0"})
+_RESOURCE_DICT_KEYS = frozenset({"enabled", "k"})
+
+
+def _ensure_allowed_keys(obj_name: str, obj: Mapping[str, Any], allowed: AbstractSet[str]) -> None:
+    # common case: one C-level subset check on the keys view
+    if obj.keys() <= allowed:
+        return
+    extra = [k for k in obj.keys() if k not in allowed]
+    raise DirPipelineSpecError(
+        f"dir pipeline spec: chiavi non supportate in {obj_name}: {', '.join(sorted(extra))}"
+    )
 
 
 def _parse_autopick(v: Any) -> DirAutopick:
     if v is None:
         return DirAutopick()
     _expect_type("autopick", v, dict)
-    _ensure_allowed_keys(
-        "autopick",
-        v,
-        ["enabled", "sample_n", "top_k", "top_db_max", "refresh_top"],
-    )
+    _ensure_allowed_keys("autopick", v, _AUTOPICK_KEYS)
     enabled = v.get("enabled")
     sample_n = v.get("sample_n")
     top_k = v.get("top_k")
@@ -153,7 +149,7 @@ def _parse_autopick(v: Any) -> DirAutopick:
 
 def _parse_plan(obj: Any) -> DirPlan:
     _expect_type("plan", obj, dict)
-    _ensure_allowed_keys("plan", obj, ["layer", "codec", "stream_codecs", "note"])
+    _ensure_allowed_keys("plan", obj, _PLAN_KEYS)
     layer = obj.get("layer")
     codec = obj.get("codec")
     if not isinstance(layer, str) or not layer.strip():
@@ -174,7 +170,7 @@ def _parse_plan(obj: Any) -> DirPlan:
                     "dir pipeline spec: stream_codecs deve essere mappa string->string"
                 )
             k2 = k.strip().upper()
-            if k2 not in _STREAM_NAME_TO_KEY:
+            if k2 not in _STREAM_NAMES:
                 raise DirPipelineSpecError(f"dir pipeline spec: stream name non supportato: {k}")
             if not v.strip():
                 raise DirPipelineSpecError("dir pipeline spec: codec vuoto in stream_codecs")
@@ -202,13 +198,13 @@ def _parse_resources(v: Any) -> tuple[DirResourceNumDictV1, DirResourceTplDictV0
     if v is None:
         return DirResourceNumDictV1(), DirResourceTplDictV0()
     _expect_type("resources", v, dict)
-    _ensure_allowed_keys("resources", v, ["num_dict_v1", "tpl_dict_v0"])
+    _ensure_allowed_keys("resources", v, _RESOURCES_KEYS)
     # num_dict_v1
     nd = v.get("num_dict_v1")
     nd_out = DirResourceNumDictV1()
     if nd is not None:
         _expect_type("resources.num_dict_v1", nd, dict)
-        _ensure_allowed_keys("resources.num_dict_v1", nd, ["enabled", "k"])
+        _ensure_allowed_keys("resources.num_dict_v1", nd, _RESOURCE_DICT_KEYS)
         enabled = nd.get("enabled")
         k = nd.get("k")
         if enabled is not None:
@@ -226,7 +222,7 @@ def _parse_resources(v: Any) -> tuple[DirResourceNumDictV1, DirResourceTplDictV0
     td_out = DirResourceTplDictV0()
     if td is not None:
         _expect_type("resources.tpl_dict_v0", td, dict)
-        _ensure_allowed_keys("resources.tpl_dict_v0", td, ["enabled", "k"])
+        _ensure_allowed_keys("resources.tpl_dict_v0", td, _RESOURCE_DICT_KEYS)
         enabled = td.get("enabled")
         k = td.get("k")
         if enabled is not None:
@@ -250,9 +246,7 @@ def load_dir_pipeline_spec(arg: str) -> DirPipelineSpec:
     except Exception as e:
         raise DirPipelineSpecError(f"dir pipeline spec: JSON invalido: {e}") from e
     _expect_type("root", obj, dict)
-    _ensure_allowed_keys(
-        "root", obj, ["spec", "buckets", "archive", "autopick", "candidate_pools", "resources"]
-    )
+    _ensure_allowed_keys("root", obj, _ROOT_KEYS)
 
     spec = obj.get("spec")
     if spec != SCHEMA_ID:
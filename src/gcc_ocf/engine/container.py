@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-import base64
-import json
+import struct
+from binascii import a2b_base64, b2a_base64
+from collections.abc import Callable
 from dataclasses import dataclass
+from functools import partial
 from typing import Any
 
 from gcc_ocf.core.codec_huffman import CodecHuffman
@@ -11,6 +13,7 @@ from gcc_ocf.core.codec_num_v1 import CodecNumV1
 from gcc_ocf.core.codec_raw import CodecRaw
 from gcc_ocf.core.codec_zlib import CodecZlib
 from gcc_ocf.core.codec_zstd import CodecZstd
+from gcc_ocf.core.fast_json import dumps_compact, loads
 from gcc_ocf.core.v5_dispatch import decode_v5_payload, encode_v5_payload
 from gcc_ocf.layers.bytes import LayerBytes
 from gcc_ocf.layers.lines_dict import LayerLinesDict
@@ -25,52 +28,143 @@ from gcc_ocf.layers.words_it import LayerWordsIT
 MAGIC = b"GCC"
 VERSION_CONTAINER_V5 = 5
 
+# MAGIC(3) + VER(1) + LAYERLEN(1)
+_V5_PREFIX = struct.Struct(">3sBB")
+_U32 = struct.Struct(">I")
+
 
 # -------------------
 # Meta encoding (JSON + base64 per bytes)
 # -------------------
-def _meta_to_jsonable(obj: Any) -> Any:
-    if isinstance(obj, (str, int, float, bool)) or obj is None:
-        return obj
+# Conversioni iterative (stack esplicito: niente ricorsione né limite di profondità).
+# Dispatch O(1) su type(obj); isinstance solo per sottoclassi (stesso ordine di prima).
+# Ogni contenitore viene creato vuoto, assegnato al suo slot e riempito quando esce
+# dallo stack; le foglie si risolvono subito.
+_K_LEAF, _K_FLOAT, _K_BYTES, _K_LIST, _K_TUPLE, _K_DICT = range(6)
+
+_TO_JSONABLE_KIND: dict[type, int] = {
+    str: _K_LEAF,
+    int: _K_LEAF,
+    bool: _K_LEAF,
+    type(None): _K_LEAF,
+    float: _K_FLOAT,
+    bytes: _K_BYTES,
+    bytearray: _K_BYTES,
+    list: _K_LIST,
+    tuple: _K_TUPLE,
+    dict: _K_DICT,
+}
+
+
+def _to_jsonable_kind_slow(obj: Any) -> int:
+    if isinstance(obj, float):
+        return _K_FLOAT
+    if isinstance(obj, (str, int, bool)):
+        return _K_LEAF
     if isinstance(obj, (bytes, bytearray)):
-        b = bytes(obj)
-        return {"__t": "bytes", "b64": base64.b64encode(b).decode("ascii")}
+        return _K_BYTES
     if isinstance(obj, list):
-        return [_meta_to_jsonable(x) for x in obj]
+        return _K_LIST
     if isinstance(obj, tuple):
-        return {"__t": "tuple", "items": [_meta_to_jsonable(x) for x in obj]}
+        return _K_TUPLE
     if isinstance(obj, dict):
-        out: dict[str, Any] = {}
-        for k, v in obj.items():
-            out[str(k)] = _meta_to_jsonable(v)
-        return out
+        return _K_DICT
     raise TypeError(f"meta non serializzabile in JSON: {type(obj)}")
 
 
+def _meta_to_jsonable(obj: Any, floats: list[float] | None = None) -> Any:
+    # floats: se passato, raccoglie i float incontrati (decide il serializzatore in encode_meta)
+    root: list[Any] = [None]
+    work: list[tuple[Any, Any, Any]] = [(obj, root, 0)]  # (sorgente, contenitore, slot)
+    kinds = _TO_JSONABLE_KIND
+    while work:
+        x, dst, slot = work.pop()
+        kind = kinds.get(type(x))
+        if kind is None:
+            kind = _to_jsonable_kind_slow(x)
+
+        if kind == _K_LEAF:
+            dst[slot] = x
+        elif kind == _K_FLOAT:
+            if floats is not None:
+                floats.append(x)
+            dst[slot] = x
+        elif kind == _K_BYTES:
+            dst[slot] = {"__t": "bytes", "b64": b2a_base64(x, newline=False).decode("ascii")}
+        elif kind == _K_DICT:
+            out: dict[str, Any] = {}
+            dst[slot] = out
+            pending = []
+            for k, v in x.items():
+                sk = str(k)
+                out[sk] = None  # fissa l'ordine delle chiavi
+                pending.append((v, out, sk))
+            # estratti in ordine: con chiavi che collidono (1 e "1") vince l'ultima
+            work.extend(reversed(pending))
+        else:
+            items: list[Any] = [None] * len(x)
+            dst[slot] = items if kind == _K_LIST else {"__t": "tuple", "items": items}
+            work.extend([(v, items, i) for i, v in enumerate(x)])
+    return root[0]
+
+
+_FROM_JSONABLE_LEAF = frozenset((str, int, float, bool, type(None)))
+_FINALIZE_TUPLE = object()
+
+
 def _meta_from_jsonable(obj: Any) -> Any:
-    if isinstance(obj, (str, int, float, bool)) or obj is None:
-        return obj
-    if isinstance(obj, list):
-        return [_meta_from_jsonable(x) for x in obj]
-    if isinstance(obj, dict):
-        t = obj.get("__t")
-        if t == "bytes":
-            return base64.b64decode(obj["b64"].encode("ascii"))
-        if t == "tuple":
-            return tuple(_meta_from_jsonable(x) for x in obj["items"])
-        return {k: _meta_from_jsonable(v) for k, v in obj.items()}
-    raise TypeError(f"meta JSON inatteso: {type(obj)}")
+    root: list[Any] = [None]
+    work: list[tuple[Any, Any, Any]] = [(obj, root, 0)]
+    leaf = _FROM_JSONABLE_LEAF
+    while work:
+        x, dst, slot = work.pop()
+        if x is _FINALIZE_TUPLE:
+            # figli già tutti convertiti (stanno sopra nello stack): congela la lista
+            items, tdst, tslot = slot
+            tdst[tslot] = tuple(items)
+            continue
+
+        t = type(x)
+        if t in leaf:
+            dst[slot] = x
+        elif t is dict or (t is not list and isinstance(x, dict)):
+            tag = x.get("__t")
+            if tag == "bytes":
+                dst[slot] = a2b_base64(x["b64"])
+            elif tag == "tuple":
+                items = list(x["items"])
+                work.append((_FINALIZE_TUPLE, None, (items, dst, slot)))
+                work.extend([(v, items, i) for i, v in enumerate(items)])
+            else:
+                out: dict[str, Any] = {}
+                dst[slot] = out
+                pending = []
+                for k, v in x.items():
+                    out[k] = None
+                    pending.append((v, out, k))
+                work.extend(reversed(pending))
+        elif t is list or isinstance(x, list):
+            items = [None] * len(x)
+            dst[slot] = items
+            work.extend([(v, items, i) for i, v in enumerate(x)])
+        elif isinstance(x, (str, int, float, bool)):
+            dst[slot] = x
+        else:
+            raise TypeError(f"meta JSON inatteso: {type(x)}")
+    return root[0]
 
 
 def encode_meta(meta: dict[str, Any]) -> bytes:
-    jsonable = _meta_to_jsonable(meta)
-    return json.dumps(jsonable, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    floats: list[float] = []
+    jsonable = _meta_to_jsonable(meta, floats)
+    # bytes identici alla stdlib: orjson solo per meta senza float
+    return dumps_compact(jsonable, has_float=bool(floats))
 
 
-def decode_meta(meta_bytes: bytes) -> dict[str, Any]:
+def decode_meta(meta_bytes: bytes | memoryview) -> dict[str, Any]:
     if not meta_bytes:
         return {}
-    obj = json.loads(meta_bytes.decode("utf-8"))
+    obj = loads(meta_bytes)
     meta = _meta_from_jsonable(obj)
     if not isinstance(meta, dict):
         raise ValueError("meta root deve essere un dict")
@@ -91,52 +185,53 @@ def pack_container_v5(layer_id: str, codec_id: str, meta: dict[str, Any], payloa
     if len(meta_b) > 0xFFFFFFFF or len(payload) > 0xFFFFFFFF:
         raise ValueError("meta/payload troppo grandi (u32 overflow)")
 
-    out = bytearray()
-    out += MAGIC
-    out.append(VERSION_CONTAINER_V5)
-    out.append(len(layer_b))
-    out += layer_b
-    out.append(len(codec_b))
-    out += codec_b
-    out += len(meta_b).to_bytes(4, "big")
-    out += meta_b
-    out += len(payload).to_bytes(4, "big")
-    out += payload
-    return bytes(out)
+    # header fissi via struct, una sola allocazione finale (niente resize del bytearray)
+    return b"".join(
+        (
+            _V5_PREFIX.pack(MAGIC, VERSION_CONTAINER_V5, len(layer_b)),
+            layer_b,
+            bytes((len(codec_b),)),
+            codec_b,
+            _U32.pack(len(meta_b)),
+            meta_b,
+            _U32.pack(len(payload)),
+            payload,
+        )
+    )
 
 
 def unpack_container_v5(blob: bytes) -> tuple[str, str, dict[str, Any], bytes]:
     if len(blob) < 3 + 1 + 1 + 1 + 4 + 4:
         raise ValueError("blob troppo corto per container v5")
 
-    idx = 0
-    if blob[idx : idx + 3] != MAGIC:
+    # memoryview: header/meta letti senza copie; il payload viene copiato una volta sola
+    mv = memoryview(blob)
+    magic, ver, layer_len = _V5_PREFIX.unpack_from(mv, 0)
+    if magic != MAGIC:
         raise ValueError("Magic number non valido")
-    idx += 3
-
-    ver = blob[idx]
-    idx += 1
     if ver != VERSION_CONTAINER_V5:
         raise ValueError(f"Versione container inattesa: {ver}")
+    idx = _V5_PREFIX.size
 
-    layer_len = blob[idx]
-    idx += 1
-    layer_id = blob[idx : idx + layer_len].decode("utf-8")
+    layer_id = str(mv[idx : idx + layer_len], "utf-8")
     idx += layer_len
 
-    codec_len = blob[idx]
+    codec_len = mv[idx]
     idx += 1
-    codec_id = blob[idx : idx + codec_len].decode("utf-8")
+    codec_id = str(mv[idx : idx + codec_len], "utf-8")
     idx += codec_len
 
-    meta_len = int.from_bytes(blob[idx : idx + 4], "big")
-    idx += 4
-    meta_b = blob[idx : idx + meta_len]
-    idx += meta_len
-
-    payload_len = int.from_bytes(blob[idx : idx + 4], "big")
-    idx += 4
-    payload = blob[idx : idx + payload_len]
+    try:
+        meta_len = _U32.unpack_from(mv, idx)[0]
+        idx += 4
+        meta_b = mv[idx : idx + meta_len]
+        idx += meta_len
+
+        payload_len = _U32.unpack_from(mv, idx)[0]
+        idx += 4
+    except struct.error as e:
+        raise ValueError("container v5 troncato (meta_len/payload_len)") from e
+    payload = bytes(mv[idx : idx + payload_len])
     idx += payload_len
 
     meta = decode_meta(meta_b)
@@ -146,6 +241,90 @@ def unpack_container_v5(blob: bytes) -> tuple[str, str, dict[str, Any], bytes]:
 # -------------------
 # Engine
 # -------------------
+# Tabella dei costruttori di default, fissata all'import (costa solo i riferimenti alle
+# classi). Ogni Engine.default() crea istanze nuove, al primo accesso a ciascuna voce:
+# alcuni layer/codec hanno stato impostabile dal chiamante (set_shared_dict su
+# tpl_lines_shared_v0 e num_v1), che non deve trapelare tra engine diversi.
+_DEFAULT_LAYERS: dict[str, Callable[[], Any]] = {
+    "bytes": LayerBytes,
+    "vc0": LayerVC0,
+    "syllables_it": LayerSyllablesIT,
+    "words_it": LayerWordsIT,
+    "lines_dict": LayerLinesDict,
+    "lines_rle": LayerLinesRLE,
+    "split_text_nums": LayerSplitTextNums,
+    "tpl_lines_v0": LayerTplLinesV0,
+    "tpl_lines_shared_v0": LayerTplLinesSharedV0,
+}
+
+_DEFAULT_CODECS: dict[str, Callable[[], Any]] = {
+    "huffman": CodecHuffman,
+    "zstd": partial(CodecZstd, level=19, tight=False),
+    "zstd_tight": partial(CodecZstd, level=19, tight=True),
+    "zlib": partial(CodecZlib, level=9),
+    "raw": CodecRaw,
+    "num_v0": CodecNumV0,
+    "num_v1": CodecNumV1,
+}
+
+
+class _LazyRegistry(dict):
+    """dict id -> istanza che costruisce ogni voce al primo accesso e la tiene (per-engine).
+
+    Le voci non ancora costruite sono comunque visibili a `in`, `.get()`, iterazione e
+    copie (`dict(x)` / `.copy()`); un'assegnazione esplicita sostituisce il costruttore.
+    """
+
+    def __init__(self, factories: dict[str, Callable[[], Any]]):
+        super().__init__()
+        self._factories = dict(factories)
+
+    def __missing__(self, key: str) -> Any:
+        make = self._factories.pop(key, None)
+        if make is None:
+            raise KeyError(key)
+        obj = make()
+        dict.__setitem__(self, key, obj)
+        return obj
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._factories.pop(key, None)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if self._factories.pop(key, None) is None:
+            dict.__delitem__(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        return dict.__contains__(self, key) or key in self._factories
+
+    def __len__(self) -> int:
+        return dict.__len__(self) + len(self._factories)
+
+    def __iter__(self):
+        # __iter__ ridefinito: dict(x) passa da keys()/__getitem__ e materializza le voci
+        yield from list(dict.keys(self)) + list(self._factories)
+
+    def keys(self):  # type: ignore[override]
+        return list(self)
+
+    def values(self):  # type: ignore[override]
+        return [self[k] for k in self]
+
+    def items(self):  # type: ignore[override]
+        return [(k, self[k]) for k in self]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def copy(self) -> _LazyRegistry:
+        """Copia superficiale: le voci già costruite sono condivise, le altre restano lazy."""
+        out = _LazyRegistry(self._factories)
+        for k in dict.keys(self):
+            dict.__setitem__(out, k, dict.__getitem__(self, k))
+        return out
+
+
 @dataclass
 class Engine:
     layers: dict[str, Any]
@@ -153,29 +332,11 @@ class Engine:
 
     @classmethod
     def default(cls) -> Engine:
-        layers = {
-            "bytes": LayerBytes(),
-            "vc0": LayerVC0(),
-            "syllables_it": LayerSyllablesIT(),
-            "words_it": LayerWordsIT(),
-            "lines_dict": LayerLinesDict(),
-            "lines_rle": LayerLinesRLE(),
-            "split_text_nums": LayerSplitTextNums(),
-            "tpl_lines_v0": LayerTplLinesV0(),
-            "tpl_lines_shared_v0": LayerTplLinesSharedV0(),
-        }
-
-        codecs = {
-            "huffman": CodecHuffman(),
-            "zstd": CodecZstd(level=19, tight=False),
-            "zstd_tight": CodecZstd(level=19, tight=True),
-            "zlib": CodecZlib(level=9),
-            "raw": CodecRaw(),
-            "num_v0": CodecNumV0(),
-            "num_v1": CodecNumV1(),
-        }
-
-        return cls(layers=layers, codecs=codecs)
+        # istanze costruite al primo uso e proprie di questo engine
+        return cls(
+            layers=_LazyRegistry(_DEFAULT_LAYERS),
+            codecs=_LazyRegistry(_DEFAULT_CODECS),
+        )
 
     def compress(
         self, input_bytes: bytes, layer_id: str = "bytes", codec_id: str = "huffman"
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+import os
+import struct
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import cache
 from typing import Any
 
+from gcc_ocf.core.bundle import as_bytes
 from gcc_ocf.core.mbn_bundle import (
     MBN_MAGIC,
     ST_CONS,
@@ -18,7 +24,8 @@ from gcc_ocf.core.mbn_bundle import (
     pack_mbn,
     unpack_mbn,
 )
-from gcc_ocf.core.v5_dispatch import decode_v5_payload, encode_v5_payload
+from gcc_ocf.core.v5_dispatch import _layer_caps, decode_v5_payload, encode_v5_payload
+from gcc_ocf.core.varint import dec_varint, enc_varint
 
 MAGIC = b"GCC"
 VER_V6 = 6
@@ -50,55 +57,46 @@ CODEC_TO_CODE: dict[str, int] = {
 }
 CODE_TO_CODEC: dict[int, str] = {v: k for k, v in CODEC_TO_CODE.items()}
 
+# lookup sul path di unpack: i codici arrivano da un byte (0..255), quindi una tupla
+# da 256 voci (None = sconosciuto) si indicizza senza hash e senza bounds check
+_LAYER_BY_U8: tuple[str | None, ...] = tuple(CODE_TO_LAYER.get(i) for i in range(256))
+_CODEC_BY_U8: tuple[str | None, ...] = tuple(CODE_TO_CODEC.get(i) for i in range(256))
+
+# MAGIC(3) + VER(1) + FLAGS(1) + LAYER(1) + CODEC(1)
+_V6_HEADER = struct.Struct(">3sBBBB")
+
 # flags
 F_HAS_META = 0x01
 F_HAS_PAYLOAD_LEN = 0x02
 F_KIND_EXTRACT = 0x80  # lossy, decode via extract-show (non via decompress)
 
 
-def _enc_varint(x: int) -> bytes:
-    if x < 0:
-        raise ValueError("varint negativo non supportato")
-    out = bytearray()
-    while True:
-        b = x & 0x7F
-        x >>= 7
-        if x:
-            out.append(0x80 | b)
-        else:
-            out.append(b)
-            break
-    return bytes(out)
-
-
-def _dec_varint(buf: bytes, idx: int) -> tuple[int, int]:
-    shift = 0
-    x = 0
-    while True:
-        if idx >= len(buf):
-            raise ValueError("varint troncato")
-        b = buf[idx]
-        idx += 1
-        x |= (b & 0x7F) << shift
-        if (b & 0x80) == 0:
-            break
-        shift += 7
-        if shift > 63:
-            raise ValueError("varint troppo grande")
-    return x, idx
-
-
 def is_container_v6(blob: bytes) -> bool:
     return len(blob) >= 5 and blob[:3] == MAGIC and blob[3] == VER_V6
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class V6Header:
     layer_id: str
     codec_id: str
     is_extract: bool
     meta: bytes
-    payload: bytes
+    payload: bytes | memoryview  # vista su blob (unpack_container_v6)
+
+
+@cache
+def _v6_header(layer_id: str, codec_id: str, flags: int) -> bytes:
+    """Header a 7 byte: invariante per (layer, codec, flags), calcolato una volta.
+
+    Gli id non mappati sollevano ValueError (le eccezioni non vengono memorizzate).
+    """
+    layer_code = LAYER_TO_CODE.get(layer_id)
+    if layer_code is None:
+        raise ValueError(f"v6: layer_id non mappato: {layer_id!r}")
+    codec_code = CODEC_TO_CODE.get(codec_id)
+    if codec_code is None:
+        raise ValueError(f"v6: codec_id non mappato: {codec_id!r}")
+    return _V6_HEADER.pack(MAGIC, VER_V6, flags, layer_code, codec_code)
 
 
 def pack_container_v6(
@@ -109,30 +107,16 @@ def pack_container_v6(
     meta: bytes = b"",
     is_extract: bool = False,
 ) -> bytes:
-    if layer_id not in LAYER_TO_CODE:
-        raise ValueError(f"v6: layer_id non mappato: {layer_id!r}")
-    if codec_id not in CODEC_TO_CODE:
-        raise ValueError(f"v6: codec_id non mappato: {codec_id!r}")
-
+    # flags calcolati per intero prima di scrivere l'header (niente patch a posteriori)
     flags = F_KIND_EXTRACT if is_extract else 0
-    chunks = [
-        MAGIC,
-        bytes([VER_V6]),
-        bytes([flags]),
-        bytes([LAYER_TO_CODE[layer_id]]),
-        bytes([CODEC_TO_CODE[codec_id]]),
-    ]
-
-    # meta: omitted if empty
     if meta:
         flags |= F_HAS_META
-        chunks[2] = bytes([flags])
-        chunks.append(_enc_varint(len(meta)))
-        chunks.append(meta)
+    header = _v6_header(layer_id, codec_id, flags)
 
-    # payload_len: omitted (payload is rest-of-file)
-    chunks.append(payload)
-    return b"".join(chunks)
+    # meta: omitted if empty; payload_len: omitted (payload is rest-of-file)
+    if meta:
+        return b"".join((header, enc_varint(len(meta)), meta, payload))
+    return header + payload
 
 
 def unpack_container_v6(blob: bytes) -> V6Header:
@@ -148,29 +132,32 @@ def unpack_container_v6(blob: bytes) -> V6Header:
     layer_code = blob[5]
     codec_code = blob[6]
 
-    layer_id = CODE_TO_LAYER.get(layer_code)
+    layer_id = _LAYER_BY_U8[layer_code]
     if layer_id is None:
         raise ValueError(f"v6: layer_code sconosciuto: {layer_code}")
-    codec_id = CODE_TO_CODEC.get(codec_code)
+    codec_id = _CODEC_BY_U8[codec_code]
     if codec_id is None:
         raise ValueError(f"v6: codec_code sconosciuto: {codec_code}")
 
+    # memoryview: il payload (la parte grossa) resta una vista su blob, senza copie;
+    # la copia, se serve, la fa il codec/decoder che ha bisogno di bytes veri
+    mv = memoryview(blob)
     idx = 7
     meta = b""
     if flags & F_HAS_META:
-        mlen, idx = _dec_varint(blob, idx)
-        meta = blob[idx : idx + mlen]
+        mlen, idx = dec_varint(mv, idx)
+        meta = bytes(mv[idx : idx + mlen])
         if len(meta) != mlen:
             raise ValueError("v6: meta troncata")
         idx += mlen
 
     if flags & F_HAS_PAYLOAD_LEN:
-        plen, idx = _dec_varint(blob, idx)
-        payload = blob[idx : idx + plen]
+        plen, idx = dec_varint(mv, idx)
+        payload = mv[idx : idx + plen]
         if len(payload) != plen:
             raise ValueError("v6: payload troncato")
     else:
-        payload = blob[idx:]
+        payload = mv[idx:]
 
     return V6Header(
         layer_id=layer_id,
@@ -192,6 +179,15 @@ def compress_v6(engine: Any, data: bytes, *, layer_id: str, codec_id: str) -> by
     return pack_container_v6(payload, layer_id=layer_id, codec_id=codec_id, meta=b"")
 
 
+# Layer multi-stream MBN -> tipi stream, nell'ordine della tupla symbols di encode/decode.
+_MBN_LAYER_STREAMS: dict[str, tuple[int, ...]] = {
+    "vc0": (ST_MASK, ST_VOWELS, ST_CONS),
+    "split_text_nums": (ST_TEXT, ST_NUMS),
+    "tpl_lines_v0": (ST_TPL, ST_IDS, ST_NUMS),
+    "tpl_lines_shared_v0": (ST_TPL, ST_IDS, ST_NUMS),
+}
+
+
 def _layer_to_mbn_raw_streams(
     layer_id: str, layer: Any, data: bytes
 ) -> tuple[list[tuple[int, bytes]], bytes | None]:
@@ -210,52 +206,50 @@ def _layer_to_mbn_raw_streams(
     else:
         symbols, layer_meta = ret, {}
 
-    layer_meta = layer_meta or {}
+    if layer_meta is None:
+        layer_meta = {}
     meta_bytes: bytes | None = None
-    if layer_meta and hasattr(layer, "pack_meta"):
+    if layer_meta and _layer_caps(type(layer))[0]:
         mb = layer.pack_meta(layer_meta)
         if mb:
-            meta_bytes = bytes(mb)
+            meta_bytes = as_bytes(mb)
 
     # bytes
     if isinstance(symbols, (bytes, bytearray)):
-        return [(ST_MAIN, bytes(symbols))], meta_bytes
-
-    # vc0
-    if (
-        layer_id == "vc0"
-        and isinstance(symbols, tuple)
-        and len(symbols) == 3
-        and all(isinstance(x, (bytes, bytearray)) for x in symbols)
-    ):
-        mask, vowels, cons = (bytes(symbols[0]), bytes(symbols[1]), bytes(symbols[2]))
-        return [(ST_MASK, mask), (ST_VOWELS, vowels), (ST_CONS, cons)], meta_bytes
-
-    # split_text_nums
-    if (
-        layer_id == "split_text_nums"
-        and isinstance(symbols, tuple)
-        and len(symbols) == 2
-        and all(isinstance(x, (bytes, bytearray)) for x in symbols)
-    ):
-        text_b, nums_b = bytes(symbols[0]), bytes(symbols[1])
-        return [(ST_TEXT, text_b), (ST_NUMS, nums_b)], meta_bytes
-
-    # tpl_lines_v0 / tpl_lines_shared_v0
-    if (
-        layer_id in ("tpl_lines_v0", "tpl_lines_shared_v0")
-        and isinstance(symbols, tuple)
-        and len(symbols) == 3
-        and all(isinstance(x, (bytes, bytearray)) for x in symbols)
-    ):
-        tpl_b, ids_b, nums_b = bytes(symbols[0]), bytes(symbols[1]), bytes(symbols[2])
-        return [(ST_TPL, tpl_b), (ST_IDS, ids_b), (ST_NUMS, nums_b)], meta_bytes
+        return [(ST_MAIN, as_bytes(symbols))], meta_bytes
+
+    # layer multi-stream: tupla di bytes, un tipo stream per posizione
+    stypes = _MBN_LAYER_STREAMS.get(layer_id)
+    if stypes is not None and isinstance(symbols, tuple) and len(symbols) == len(stypes):
+        streams: list[tuple[int, bytes]] = []
+        for stype, part in zip(stypes, symbols, strict=True):
+            if not isinstance(part, (bytes, bytearray)):
+                break
+            streams.append((stype, as_bytes(part)))
+        else:
+            return streams, meta_bytes
 
     raise NotImplementedError(
         "MBN per ora supporta solo layer bytes/vc0/split_text_nums/tpl_lines_v0/tpl_lines_shared_v0"
     )
 
 
+# Sotto questa soglia (byte raw totali) gli stream MBN si (de)comprimono in serie:
+# avviare il pool costa più di quanto si guadagna su input piccoli.
+_MBN_PARALLEL_MIN_BYTES = 1 << 20
+
+
+def _map_streams(fn: Callable[[Any], bytes], jobs: list[Any], total_bytes: int) -> list[bytes]:
+    """fn su ogni stream, in ordine. zstd/zlib rilasciano il GIL: con più stream e input
+    grandi i codec girano in parallelo su thread (contesti zstd per-thread, vedi CodecZstd).
+    """
+    workers = min(len(jobs), os.cpu_count() or 1)
+    if workers < 2 or total_bytes < _MBN_PARALLEL_MIN_BYTES:
+        return [fn(j) for j in jobs]
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(fn, jobs))
+
+
 def compress_v6_mbn(
     engine: Any,
     data: bytes,
@@ -285,8 +279,8 @@ def compress_v6_mbn(
         for k, v in stream_codecs.items():
             sc[int(k)] = str(v)
 
-    records: list[MBNStream] = []
-
+    # codec per-stream risolti (e validati) prima di comprimere
+    jobs: list[tuple[int, bytes, str, Any]] = []
     for stype, raw in raw_streams:
         # codec per-stream, fallback al default
         cid = sc.get(int(stype), codec_id)
@@ -295,18 +289,21 @@ def compress_v6_mbn(
             raise ValueError(f"MBN: codec non supportato per stype={stype}: {cid!r}")
         if cid not in CODEC_TO_CODE:
             raise ValueError(f"MBN: codec_id non mappato: {cid!r} (stype={stype})")
+        jobs.append((int(stype), raw, cid, engine.codecs[cid]))
 
-        codec = engine.codecs[cid]
-        comp = codec.compress(raw)
-        records.append(
-            MBNStream(
-                stype=int(stype),
-                codec=CODEC_TO_CODE[cid],
-                ulen=len(raw),
-                comp=comp,
-                meta=b"",
-            )
+    comps = _map_streams(
+        lambda j: j[3].compress(j[1]), jobs, sum(len(raw) for _, raw in raw_streams)
+    )
+    records: list[MBNStream] = [
+        MBNStream(
+            stype=stype,
+            codec=CODEC_TO_CODE[cid],
+            ulen=len(raw),
+            comp=comp,
+            meta=b"",
         )
+        for (stype, raw, cid, _codec), comp in zip(jobs, comps, strict=True)
+    ]
 
     # optional meta stream (codec raw)
     if meta_bytes is not None:
@@ -329,19 +326,23 @@ def compress_v6_mbn(
     return pack_container_v6(payload, layer_id=layer_id, codec_id="mbn", meta=b"")
 
 
-def _decode_mbn_payload_to_raw(engine: Any, payload: bytes) -> list[tuple[int, bytes]]:
+def _decode_mbn_payload_to_raw(engine: Any, payload: bytes | memoryview) -> list[tuple[int, bytes]]:
     streams = unpack_mbn(payload)
-    out: list[tuple[int, bytes]] = []
+    jobs: list[tuple[Any, MBNStream]] = []
     for s in streams:
-        cid = CODE_TO_CODEC.get(int(s.codec))
+        cid = _CODEC_BY_U8[s.codec]
         if cid is None:
             raise ValueError(f"MBN: codec_code sconosciuto: {s.codec}")
         codec = engine.codecs.get(cid)
         if codec is None:
             raise ValueError(f"engine: codec non registrato: {cid!r}")
-        raw = codec.decompress(s.comp, out_size=int(s.ulen))
-        out.append((int(s.stype), raw))
-    return out
+        jobs.append((codec, s))
+    raws = _map_streams(
+        lambda j: j[0].decompress(j[1].comp, out_size=int(j[1].ulen)),
+        jobs,
+        sum(int(s.ulen) for s in streams),
+    )
+    return [(int(s.stype), raw) for s, raw in zip(streams, raws, strict=True)]
 
 
 def unpack_v6_mbn_raw(
@@ -379,38 +380,20 @@ def decompress_v6(engine: Any, blob: bytes, *, allow_extract: bool = False) -> b
                 by_type[stype] = raw
 
         layer_meta = {}
-        if meta_bytes is not None and hasattr(layer, "unpack_meta"):
+        if meta_bytes is not None and _layer_caps(type(layer))[1]:
             layer_meta = layer.unpack_meta(meta_bytes) or {}
 
-        if h.layer_id == "vc0":
-            symbols = (
-                by_type.get(ST_MASK, b""),
-                by_type.get(ST_VOWELS, b""),
-                by_type.get(ST_CONS, b""),
-            )
-        elif h.layer_id == "split_text_nums":
-            symbols = (
-                by_type.get(ST_TEXT, b""),
-                by_type.get(ST_NUMS, b""),
-            )
-        elif h.layer_id in ("tpl_lines_v0", "tpl_lines_shared_v0"):
-            symbols = (
-                by_type.get(ST_TPL, b""),
-                by_type.get(ST_IDS, b""),
-                by_type.get(ST_NUMS, b""),
-            )
+        stypes = _MBN_LAYER_STREAMS.get(h.layer_id)
+        if stypes is not None:
+            symbols = tuple([by_type.get(st, b"") for st in stypes])
         else:
             symbols = by_type.get(ST_MAIN)
             if symbols is None:
                 # fallback: primo stream non-meta
-                for k in sorted(by_type.keys()):
-                    symbols = by_type[k]
-                    break
-                if symbols is None:
-                    symbols = b""
+                symbols = by_type[min(by_type)] if by_type else b""
 
         return layer.decode(symbols, layer_meta)
 
     # fallback: payload v5 (HBN2/ZBN2/ZRAW1 ecc.)
     codec = engine.codecs[h.codec_id]
-    return decode_v5_payload(h.payload, {}, h.layer_id, layer, codec)
+    return decode_v5_payload(bytes(h.payload), {}, h.layer_id, layer, codec)
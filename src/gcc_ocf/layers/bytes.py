@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+from collections.abc import Mapping
 from dataclasses import dataclass
+from types import MappingProxyType
 from typing import Any
 
+# Meta vuota condivisa (read-only): encode non alloca un dict per chiamata.
+_NO_META: Mapping[str, Any] = MappingProxyType({})
+
 
 @dataclass(frozen=True)
 class LayerBytes:
@@ -14,8 +19,8 @@ class LayerBytes:
 
     id: str = "bytes"
 
-    def encode(self, data: bytes) -> tuple[bytes, dict[str, Any]]:
-        return data, {}
+    def encode(self, data: bytes) -> tuple[bytes, Mapping[str, Any]]:
+        return data, _NO_META
 
     def decode(self, symbols: bytes, layer_meta: dict[str, Any]) -> bytes:
         return symbols
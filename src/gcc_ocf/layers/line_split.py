@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+# ------------------------------------------------------------
+# Split in righe condiviso dai layer line-based (lines_dict, lines_rle, tpl_lines_*).
+#
+# L'autopick prova più layer sugli stessi campioni: lo split (un bytes per riga) si può
+# fare una volta per campione. Il riuso vale solo dentro shared_line_splits(), aperto dal
+# chiamante per la durata dello scoring (gcc_dir: un bucket alla volta); all'uscita la
+# cache si svuota, quindi nessun input resta trattenuto. Fuori dal blocco: splitlines
+# puro. Per-thread: i job paralleli non vedono (né riempiono) la cache altrui.
+# ------------------------------------------------------------
+
+_CACHE_MAX_BYTES = 1 << 20
+
+_local = threading.local()
+
+
+@contextmanager
+def shared_line_splits() -> Iterator[None]:
+    """Dentro il blocco split_keeplines riusa lo split di input identici (<= 1 MiB)."""
+    if getattr(_local, "cache", None) is not None:
+        # blocco annidato: usa la cache esterna
+        yield
+        return
+    _local.cache = {}
+    try:
+        yield
+    finally:
+        _local.cache = None
+
+
+def split_keeplines(data: bytes) -> tuple[bytes, ...] | list[bytes]:
+    """data.splitlines(keepends=True); il risultato può essere condiviso: non modificarlo."""
+    cache: dict[bytes, tuple[bytes, ...]] | None = getattr(_local, "cache", None)
+    if cache is None or type(data) is not bytes or len(data) > _CACHE_MAX_BYTES:
+        return data.splitlines(keepends=True)
+    lines = cache.get(data)
+    if lines is None:
+        lines = cache[data] = tuple(data.splitlines(keepends=True))
+    return lines
+
+
+class LineIndex(dict):
+    """riga -> id; una riga nuova prende il prossimo id al primo accesso (un solo hash)."""
+
+    def __missing__(self, ln: bytes) -> int:
+        j = self[ln] = len(self)
+        return j
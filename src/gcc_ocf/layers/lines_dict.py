@@ -3,6 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any
 
+from gcc_ocf.layers.line_split import LineIndex, split_keeplines
+
 
 @dataclass
 class LayerLinesDict:
@@ -21,21 +23,24 @@ class LayerLinesDict:
     def encode(self, data: bytes) -> tuple[list[int], dict[str, Any]]:
         # splitlines(keepends=True) è la via corretta: preserva esattamente i newline
         # e NON inventa righe extra quando il file termina con '\n'.
-        lines: list[bytes] = data.splitlines(keepends=True)
+        # caso degenere (log/file fatti di una sola riga ripetuta): niente split né hash
+        nl = data.find(b"\n")
+        if nl >= 0:
+            line = data[: nl + 1]
+            k, rem = divmod(len(data), nl + 1)
+            # \r interno spezzerebbe la riga per splitlines (\r\n finale invece no)
+            if not rem and data.endswith(line) and b"\r" not in line[:-2] and data.count(line) == k:
+                return [0] * k, {"vocab_list": [line]}
 
-        vocab: list[bytes] = []
-        index: dict[bytes, int] = {}
-        ids: list[int] = []
+        lines = split_keeplines(data)
 
-        for ln in lines:
-            j = index.get(ln)
-            if j is None:
-                j = len(vocab)
-                vocab.append(ln)
-                index[ln] = j
-            ids.append(j)
+        # lookup per riga tutto in C (map + __getitem__); vocab = chiavi in ordine first-seen.
+        # Resta list[int] (contratto degli stream ids: SymbolStream/bundle/dispatch v5), ma gli
+        # int sono i valori del dict, condivisi: nessun PyLong allocato per riga.
+        index = LineIndex()
+        ids: list[int] = list(map(index.__getitem__, lines))
 
-        meta = {"vocab_list": vocab}
+        meta = {"vocab_list": list(index)}
         return ids, meta
 
     def decode(self, symbols: list[int], layer_meta: dict[str, Any]) -> bytes:
@@ -45,12 +50,12 @@ class LayerLinesDict:
         if not isinstance(vocab, list) or (vocab and not isinstance(vocab[0], (bytes, bytearray))):
             raise TypeError("lines_dict: vocab_list deve essere list[bytes]")
 
-        out = bytearray()
-        for i in symbols:
-            if i < 0 or i >= len(vocab):
-                raise ValueError("lines_dict: id fuori range")
-            out += bytes(vocab[i])
-        return bytes(out)
+        # un solo controllo di range (min/max in C), poi una sola concatenazione:
+        # join somma già le lunghezze e alloca l'output esatto una volta (niente
+        # bytearray preallocato + copie a fette in Python + bytes() finale)
+        if symbols and (min(symbols) < 0 or max(symbols) >= len(vocab)):
+            raise ValueError("lines_dict: id fuori range")
+        return b"".join(map(vocab.__getitem__, symbols))
 
     def pack_meta(self, layer_meta: dict[str, Any]) -> bytes:
         from gcc_ocf.layers.vocab_blob import pack_vocab_list
@@ -1,39 +1,37 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from itertools import groupby
+from operator import mul
 from typing import Any
 
+from gcc_ocf.core.varint import dec_varint, enc_varint
+from gcc_ocf.layers.line_split import LineIndex, split_keeplines
 
-def _enc_varint(x: int) -> bytes:
-    if x < 0:
-        raise ValueError("varint negativo non supportato")
-    out = bytearray()
-    while True:
-        b = x & 0x7F
-        x >>= 7
-        if x:
-            out.append(0x80 | b)
-        else:
-            out.append(b)
-            break
-    return bytes(out)
-
-
-def _dec_varint(buf: bytes, idx: int) -> tuple[int, int]:
-    shift = 0
-    x = 0
-    while True:
-        if idx >= len(buf):
-            raise ValueError("varint troncato")
-        b = buf[idx]
-        idx += 1
-        x |= (b & 0x7F) << shift
-        if (b & 0x80) == 0:
-            break
-        shift += 7
-        if shift > 63:
-            raise ValueError("varint troppo grande")
-    return x, idx
+
+def _dec_varint_pairs(buf: bytes) -> tuple[list[int], list[int]]:
+    """Decodifica tutto lo stream (id,run) in una passata: ritorna (ids, runs)."""
+    if not buf:
+        return [], []
+    if max(buf) < 0x80:
+        # caso tipico (id e run < 128): un byte per varint, basta lo slicing
+        vals: list[int] = list(buf)
+    else:
+        vals = []
+        append = vals.append
+        idx = 0
+        end = len(buf)
+        while idx < end:
+            b0 = buf[idx]
+            if b0 < 0x80:
+                append(b0)
+                idx += 1
+            else:
+                x, idx = dec_varint(buf, idx)
+                append(x)
+    if len(vals) & 1:
+        raise ValueError("varint troncato")
+    return vals[0::2], vals[1::2]
 
 
 @dataclass
@@ -53,37 +51,28 @@ class LayerLinesRLE:
     layer_id: str = "lines_rle"
 
     def encode(self, data: bytes) -> tuple[bytes, dict[str, Any]]:
-        lines: list[bytes] = data.splitlines(keepends=True)
+        lines = split_keeplines(data)
 
-        vocab: list[bytes] = []
-        index: dict[bytes, int] = {}
-        ids: list[int] = []
+        index = LineIndex()
 
-        for ln in lines:
-            j = index.get(ln)
-            if j is None:
-                j = len(vocab)
-                vocab.append(ln)
-                index[ln] = j
-            ids.append(j)
-
-        # RLE ids -> bytes (coppie id,run)
+        # RLE direttamente sulle righe: groupby trova i run in C; gli id si
+        # assegnano una volta per run (stesso ordine first-seen: ogni riga sta in un run).
         out = bytearray()
-        if ids:
-            cur = ids[0]
-            run = 1
-            for v in ids[1:]:
-                if v == cur:
-                    run += 1
-                else:
-                    out += _enc_varint(cur)
-                    out += _enc_varint(run)
-                    cur = v
-                    run = 1
-            out += _enc_varint(cur)
-            out += _enc_varint(run)
-
-        meta = {"vocab_list": vocab, "n_lines": len(lines)}
+        append = out.append
+        for ln, grp in groupby(lines):
+            vid = index[ln]
+            run = len(list(grp))
+            # id e run quasi sempre < 128: un byte ciascuno, scritto direttamente
+            if vid < 0x80:
+                append(vid)
+            else:
+                out += enc_varint(vid)
+            if run < 0x80:
+                append(run)
+            else:
+                out += enc_varint(run)
+
+        meta = {"vocab_list": list(index), "n_lines": len(lines)}
         return bytes(out), meta
 
     def decode(self, symbols: bytes, layer_meta: dict[str, Any]) -> bytes:
@@ -97,26 +86,21 @@ class LayerLinesRLE:
         if not isinstance(n_lines, int) or n_lines < 0:
             raise TypeError("lines_rle: n_lines deve essere int >= 0")
 
-        # parse RLE pairs
-        ids: list[int] = []
-        idx = 0
-        b = bytes(symbols)
-        while idx < len(b):
-            vid, idx = _dec_varint(b, idx)
-            run, idx = _dec_varint(b, idx)
-            if vid >= len(vocab):
+        # tutte le coppie in una passata, validazione sulle liste (min/max/sum in C)
+        # prima di espandere: run gonfiati (file corrotto) non arrivano al join
+        ids, runs = _dec_varint_pairs(bytes(symbols))
+        if ids:
+            if max(ids) >= len(vocab):
                 raise ValueError("lines_rle: id fuori range")
-            if run <= 0:
+            if min(runs) <= 0:
                 raise ValueError("lines_rle: run non valido")
-            ids.extend([vid] * run)
-
-        if len(ids) != n_lines:
+        if sum(runs) != n_lines:
             raise ValueError("lines_rle: n_lines mismatch (file corrotto?)")
 
-        out = bytearray()
-        for i in ids:
-            out += bytes(vocab[i])
-        return bytes(out)
+        # riga * run: ogni run diventa un solo bytes ripetuto (niente lista per riga).
+        # Espandere prima gli id (stile np.repeat) e indicizzare vocab riga per riga
+        # costerebbe O(n_lines) oggetti; qui il join vede solo len(runs) pezzi.
+        return b"".join(map(mul, map(vocab.__getitem__, ids), runs))
 
     def pack_meta(self, layer_meta: dict[str, Any]) -> bytes:
         from gcc_ocf.layers.vocab_blob import pack_vocab_list
@@ -127,12 +111,12 @@ class LayerLinesRLE:
         vocab_b = [bytes(x) for x in vocab]
         blob = pack_vocab_list(vocab_b)
 
-        return _enc_varint(n_lines) + blob
+        return enc_varint(n_lines) + blob
 
     def unpack_meta(self, meta_bytes: bytes) -> dict[str, Any]:
         from gcc_ocf.layers.vocab_blob import unpack_vocab_list
 
-        n_lines, idx = _dec_varint(meta_bytes, 0)
+        n_lines, idx = dec_varint(meta_bytes, 0)
         vocab_blob = meta_bytes[idx:]
         vocab = unpack_vocab_list(vocab_blob)
         return {"vocab_list": vocab, "n_lines": n_lines}
@@ -1,10 +1,26 @@
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
+from itertools import accumulate
 from typing import Any
 
 from gcc_ocf.core.num_stream import decode_ints, encode_ints
 
+# Token numerico: cifre ASCII, con segno unario (+|-) opzionale *solo* in contesto "valore":
+# inizio buffer, dopo whitespace (\t \n \r spazio) o dopo un separatore ( [ { < = : , ;
+# Così "2024-01-01", "10-12", "x-1" tengono il '-' nello stream TEXT.
+# Il contesto del segno è una classe di caratteri: re la compila in una bitmap a 256 voci
+# (lookup per byte, nessuna catena di confronti). Condivisa con tpl_lines_v0 (stesse regole).
+# finditer procede da sinistra senza sovrapposizioni: stesse scelte del vecchio scan per byte.
+# Il lookahead iniziale (?=[+\-0-9]) mette prima il caso comune: un byte che non è né
+# cifra né segno (quasi tutto il testo) si scarta con un solo test, senza tentare il
+# gruppo opzionale del segno e il lookbehind (~2x sullo split di testo naturale).
+_SIGN_PREFIX: dict[int, bytes] = {0: b"", 1: b"+", 2: b"-"}  # sign_code -> prefisso
+_SIGN_CODE: dict[bytes | None, int] = {None: 0, b"+": 1, b"-": 2}  # gruppo segno -> sign_code
+
+_NUM_TOKEN_RE = re.compile(rb"(?=[+\-0-9])(?:(?:^|(?<=[\t\n\r (\[{<=:,;]))([+-]))?([0-9]+)")
+
 
 @dataclass(frozen=True)
 class LayerSplitTextNums:
@@ -43,103 +59,22 @@ class LayerSplitTextNums:
     TOK_RULES = 1
 
     def encode(self, data: bytes) -> tuple[tuple[bytes, bytes], dict[str, Any]]:
-        b = bytes(data)
-
-        chunks: list[bytes] = []
-        nums_meta: list[tuple[int, int, int]] = []  # (sign_code, digits_len, magnitude)
-
-        i = 0
-        last = 0
-        n = len(b)
-
-        def is_digit(x: int) -> bool:
-            return 48 <= x <= 57
-
-        def is_unary_sign(pos: int) -> bool:
-            """True se b[pos] (+/-) è da interpretare come segno unario.
-
-            Regola standard (conservativa): il segno è unario solo se:
-              - è a inizio buffer, oppure
-              - il byte precedente è whitespace, oppure
-              - il byte precedente è un separatore tipico di "valore" (apertura parentesi, '=' ecc.).
-
-            Questo impedisce di trattare '-' come segno in date/range/operatori: "2024-01-01", "10-12", "x-1".
-            """
-            if pos <= 0:
-                return True
-            prev = b[pos - 1]
-            # whitespace
-            if prev in (9, 10, 13, 32):
-                return True
-            # common "value" separators
-            if prev in (
-                ord("("),
-                ord("["),
-                ord("{"),
-                ord("<"),
-                ord("="),
-                ord(":"),
-                ord(","),
-                ord(";"),
-            ):
-                return True
-            return False
-
-        while i < n:
-            c = b[i]
-
-            # Detect start of number token
-            start = -1
-            sign_code = self.SIGN_NONE
-            if c in (43, 45) and (i + 1) < n and is_digit(b[i + 1]) and is_unary_sign(i):
-                # '+' or '-' followed by digit, in unary-sign context
-                start = i
-                sign_code = self.SIGN_PLUS if c == 43 else self.SIGN_MINUS
-                j = i + 1
-            elif is_digit(c):
-                start = i
-                j = i
-            else:
-                i += 1
-                continue
-
-            # Consume digits
-            while j < n and is_digit(b[j]):
-                j += 1
-
-            token = b[start:j]
-
-            # chunk before token
-            chunks.append(b[last:start])
-            last = j
-
-            # parse digits part
-            if token and token[0] in (43, 45):
-                digits = token[1:]
-            else:
-                digits = token
-
-            if not digits:
-                # should not happen (we require at least 1 digit)
-                i = j
-                continue
-
-            digits_len = len(digits)
-            # magnitude as int (leading zeros ok)
-            magnitude = int(digits.decode("ascii"))
-            nums_meta.append((sign_code, digits_len, magnitude))
-
-            i = j
-
-        # tail chunk
-        chunks.append(b[last:])
-
-        # Build numeric stream payload as a list of non-negative ints
-        n_numbers = len(nums_meta)
-        seq: list[int] = [n_numbers]
-        seq.extend(len(ch) for ch in chunks)  # n_numbers + 1 entries
-        for sign_code, digits_len, magnitude in nums_meta:
-            seq.extend([int(sign_code), int(digits_len), int(magnitude)])
+        # re.split (scansione in C) con i due gruppi: [chunk, segno, cifre, chunk, ..., chunk].
+        # Le colonne escono per slicing: niente tuple per numero né append per token.
+        # Legge qualsiasi buffer (bytearray/memoryview) e restituisce sempre pezzi bytes:
+        # nessuna copia dell'input.
+        parts = _NUM_TOKEN_RE.split(data)
+        chunks = parts[0::3]
+        digits = parts[2::3]
+        k = len(digits)
+
+        # NUMS: [n_numbers, chunk_len_0..chunk_len_n, (sign_code, digits_len, magnitude) * n]
+        seq: list[int] = [k] * (2 + 4 * k)
+        seq[1 : k + 2] = map(len, chunks)
+        seq[k + 2 :: 3] = map(_SIGN_CODE.__getitem__, parts[1::3])
+        seq[k + 3 :: 3] = map(len, digits)
+        # magnitude as int (leading zeros ok); int() legge direttamente i bytes ASCII
+        seq[k + 4 :: 3] = map(int, digits)
 
         text_stream = b"".join(chunks)
         nums_stream = encode_ints(seq)
@@ -167,62 +102,51 @@ class LayerSplitTextNums:
                 f"split_text_nums: NUMS stream troppo corto: have={len(seq)} need>={need}"
             )
 
-        # chunk lengths
-        chunk_lens = [int(x) for x in seq[1 : 1 + n_numbers + 1]]
-        if any(x < 0 for x in chunk_lens):
+        # chunk lengths -> offset di fine (accumulate in C), poi fette di text_stream
+        chunk_lens = seq[1 : n_numbers + 2]
+        if min(chunk_lens) < 0:
             raise ValueError("split_text_nums: chunk_len negativo")
-
-        # split text_stream
-        ts = bytes(text_stream)
-        chunks: list[bytes] = []
-        pos = 0
-        for ln in chunk_lens:
-            ln = int(ln)
-            chunks.append(ts[pos : pos + ln])
-            pos += ln
-        if pos != len(ts):
+        # payload dal container spesso è una memoryview: fette e join finale leggono dal
+        # buffer, senza copiarlo in un bytes intermedio
+        ts = text_stream if type(text_stream) is bytes else memoryview(text_stream)
+        ends = list(accumulate(chunk_lens))
+        if ends[-1] != len(ts):
             raise ValueError(
-                f"split_text_nums: chunk_len sum mismatch: sum={pos} text_len={len(ts)}"
+                f"split_text_nums: chunk_len sum mismatch: sum={ends[-1]} text_len={len(ts)}"
             )
-
-        # numbers triples
-        idx = 1 + (n_numbers + 1)
-        nums: list[bytes] = []
-        for _ in range(n_numbers):
-            sign_code = int(seq[idx])
-            digits_len = int(seq[idx + 1])
-            magnitude = int(seq[idx + 2])
-            idx += 3
-
-            if digits_len <= 0:
+        chunks = [ts[a:b] for a, b in zip([0, *ends[:-1]], ends, strict=True)]
+
+        # numbers triples: colonne per slicing (sign, digits_len, magnitude), validate in blocco
+        base = n_numbers + 2
+        signs = seq[base:need:3]
+        lens = seq[base + 1 : need : 3]
+        mags = seq[base + 2 : need : 3]
+        if n_numbers:
+            if min(lens) <= 0:
                 raise ValueError("split_text_nums: digits_len <= 0")
-            if magnitude < 0:
+            if min(mags) < 0:
                 raise ValueError("split_text_nums: magnitude negativo")
-
-            s = b""
-            if sign_code == self.SIGN_PLUS:
-                s = b"+"
-            elif sign_code == self.SIGN_MINUS:
-                s = b"-"
-            elif sign_code != self.SIGN_NONE:
-                raise ValueError(f"split_text_nums: sign_code sconosciuto: {sign_code}")
-
-            digits = str(magnitude).encode("ascii")
-            if len(digits) > digits_len:
-                raise ValueError(
-                    f"split_text_nums: digits_len troppo piccolo: {digits_len} < {len(digits)}"
-                )
-            if len(digits) < digits_len:
-                digits = b"0" * (digits_len - len(digits)) + digits
-            nums.append(s + digits)
-
-        # interleave chunks and numbers
-        out = bytearray()
-        for i in range(n_numbers):
-            out += chunks[i]
-            out += nums[i]
-        out += chunks[n_numbers]
-        return bytes(out)
+            bad = set(signs).difference(_SIGN_PREFIX)
+            if bad:
+                raise ValueError(f"split_text_nums: sign_code sconosciuto: {min(bad)}")
+
+        # segno + cifre zero-padded in una sola formattazione C per numero
+        prefixes = map(_SIGN_PREFIX.__getitem__, signs)
+        nums = list(map(b"%s%0*d".__mod__, zip(prefixes, lens, mags, strict=True)))
+        # ogni numero è lungo almeno segno + digits_len: basta confrontare i totali
+        if sum(map(len, nums)) != sum(lens) + n_numbers - signs.count(self.SIGN_NONE):
+            for sc, dl, num in zip(signs, lens, nums, strict=True):
+                n_digits = len(num) - (sc != self.SIGN_NONE)
+                if n_digits != dl:
+                    raise ValueError(
+                        f"split_text_nums: digits_len troppo piccolo: {dl} < {n_digits}"
+                    )
+
+        # interleave chunks and numbers: chunk0 num0 chunk1 ... chunkN
+        parts: list[bytes] = [b""] * (2 * n_numbers + 1)
+        parts[0::2] = chunks
+        parts[1::2] = nums
+        return b"".join(parts)
 
     def pack_meta(self, meta: dict) -> bytes:
         # Meta compatta: 2 byte (fmt, tok). Se assenti, decoder assume legacy.
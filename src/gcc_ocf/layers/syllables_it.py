@@ -1,68 +1,37 @@
 from __future__ import annotations
 
+import re
 from collections.abc import Sequence
 from dataclasses import dataclass
 from typing import Any
 
 from gcc_ocf.layers.vocab_blob import pack_vocab_list, unpack_vocab_list
 
+# Stessa tokenizzazione legacy, ma con una sola scansione re (in C) invece del loop per byte:
+#   - sequenze di lettere -> pseudo-sillabe: consonanti* + vocale (si spezza dopo ogni vocale),
+#     le consonanti finali della parola restano un token a sé
+#   - sequenze di non-lettere -> blocchi separati
+# Le alternative si provano in ordine: se "consonanti* vocale" fallisce, la parola finisce
+# prima della prossima vocale, quindi [A-Za-z]+ prende esattamente le consonanti finali.
+# È già la scansione "su tutto il buffer" con i bytes costruiti una volta al confine
+# (findall): un kernel JIT per gli span non toglierebbe quella costruzione, e il progetto
+# resta senza dipendenze runtime (niente numba/numpy).
+_SYLLABLE_OR_OTHER_RE = re.compile(
+    rb"[B-DF-HJ-NP-TV-Zb-df-hj-np-tv-z]*[AEIOUaeiou]|[A-Za-z]+|[^A-Za-z]+"
+)
 
-def _is_ascii_letter(b: int) -> bool:
-    return (65 <= b <= 90) or (97 <= b <= 122)  # A-Z a-z
-
-
-_VOWEL_BYTES = {ord(c) for c in "aeiouAEIOU"}
 
+def _tokenize_syllables_and_other(data: bytes) -> list[bytes]:
+    """Identico alla logica legacy (vedi _SYLLABLE_OR_OTHER_RE)."""
+    return _SYLLABLE_OR_OTHER_RE.findall(data)
 
-def _is_vowel_byte(b: int) -> bool:
-    return b in _VOWEL_BYTES
 
+class _TokenIndex(dict):
+    """token -> id; un token nuovo prende il prossimo id al primo accesso (un solo hash)."""
 
-def _split_word_into_syllables(word: bytes) -> list[bytes]:
-    """
-    Identico alla logica legacy:
-    - accumula caratteri
-    - spezza dopo ogni vocale
-    """
-    syllables: list[bytes] = []
-    current = bytearray()
-    for b in word:
-        current.append(b)
-        if _is_vowel_byte(b):
-            syllables.append(bytes(current))
-            current.clear()
-    if current:
-        syllables.append(bytes(current))
-    return syllables
-
-
-def _tokenize_syllables_and_other(data: bytes) -> list[bytes]:
-    """
-    Identico alla logica legacy:
-    - sequenze di lettere -> spezzate in pseudo-sillabe
-    - sequenze di non-lettere -> blocchi separati
-    """
-    tokens: list[bytes] = []
-    i = 0
-    n = len(data)
-
-    while i < n:
-        b = data[i]
-        if _is_ascii_letter(b):
-            start = i
-            i += 1
-            while i < n and _is_ascii_letter(data[i]):
-                i += 1
-            word = data[start:i]
-            tokens.extend(_split_word_into_syllables(word))
-        else:
-            start = i
-            i += 1
-            while i < n and not _is_ascii_letter(data[i]):
-                i += 1
-            tokens.append(data[start:i])
-
-    return tokens
+    def __missing__(self, tok: bytes) -> int:
+        j = self[tok] = len(self)
+        return j
 
 
 @dataclass(frozen=True)
@@ -78,31 +47,23 @@ class LayerSyllablesIT:
     def encode(self, data: bytes) -> tuple[list[int], dict[str, Any]]:
         tokens = _tokenize_syllables_and_other(data)
 
-        vocab: dict[bytes, int] = {}
-        vocab_list: list[bytes] = []
-        id_stream: list[int] = []
-
-        # IMPORTANTISSIMO: ordine "first seen" identico alla versione legacy
-        for tok in tokens:
-            if tok not in vocab:
-                vocab[tok] = len(vocab_list)
-                vocab_list.append(tok)
-            id_stream.append(vocab[tok])
+        # IMPORTANTISSIMO: ordine "first seen" identico alla versione legacy.
+        # Un solo hash per token (map + __getitem__ in C); vocab = chiavi in ordine di inserimento.
+        index = _TokenIndex()
+        id_stream: list[int] = list(map(index.__getitem__, tokens))
 
-        return id_stream, {"vocab_list": vocab_list}
+        return id_stream, {"vocab_list": list(index)}
 
     def decode(self, id_stream: Sequence[int], layer_meta: dict[str, Any]) -> bytes:
         vocab_list = layer_meta.get("vocab_list")
         if vocab_list is None:
             raise ValueError("LayerSyllablesIT.decode: manca vocab_list in layer_meta")
 
-        out = bytearray()
-        for sid in id_stream:
-            if sid < 0 or sid >= len(vocab_list):
-                # stesso messaggio legacy
-                raise ValueError("ID token fuori range")
-            out += vocab_list[sid]
-        return bytes(out)
+        # un solo controllo di range (min/max in C), poi una sola concatenazione
+        if id_stream and (min(id_stream) < 0 or max(id_stream) >= len(vocab_list)):
+            # stesso messaggio legacy
+            raise ValueError("ID token fuori range")
+        return b"".join(map(vocab_list.__getitem__, id_stream))
 
     def pack_meta(self, meta: dict[str, Any]) -> bytes:
         vocab_list = meta.get("vocab_list")
@@ -27,40 +27,15 @@ from dataclasses import dataclass
 from typing import Any
 
 from gcc_ocf.core.num_stream import decode_ints, encode_ints
-from gcc_ocf.layers.tpl_lines_v0 import LayerTplLinesV0, _pack_templates, _unpack_templates
-
-
-def _enc_varint(x: int) -> bytes:
-    if x < 0:
-        raise ValueError("varint negativo non supportato")
-    out = bytearray()
-    while True:
-        b = x & 0x7F
-        x >>= 7
-        if x:
-            out.append(0x80 | b)
-        else:
-            out.append(b)
-            break
-    return bytes(out)
-
-
-def _dec_varint(buf: bytes, idx: int) -> tuple[int, int]:
-    shift = 0
-    x = 0
-    b = bytes(buf)
-    while True:
-        if idx >= len(b):
-            raise ValueError("varint troncato")
-        bb = b[idx]
-        idx += 1
-        x |= (bb & 0x7F) << shift
-        if (bb & 0x80) == 0:
-            break
-        shift += 7
-        if shift > 63:
-            raise ValueError("varint troppo grande")
-    return x, idx
+from gcc_ocf.core.varint import dec_varint, enc_varint
+from gcc_ocf.layers.line_split import split_keeplines
+from gcc_ocf.layers.tpl_lines_v0 import (
+    LayerTplLinesV0,
+    _pack_templates,
+    _render_lines,
+    _template_key,
+    _unpack_templates,
+)
 
 
 def _tag8(blob: bytes) -> bytes:
@@ -130,14 +105,18 @@ class LayerTplLinesSharedV0:
     def __post_init__(self) -> None:
         self._base_templates: list[list[bytes]] | None = None
         self._base_tag8: bytes | None = None
+        # template (tupla di bytes) -> id nel base dict: costruito una volta per dict, non per file
+        self._base_index: dict[bytes | tuple[bytes, ...], int] = {}
 
     def set_shared_dict(self, templates: list[list[bytes]], *, tag8: bytes) -> None:
         self._base_templates = [list(x) for x in templates]
         self._base_tag8 = bytes(tag8)
+        self._base_index = {_template_key(t): i for i, t in enumerate(self._base_templates)}
 
     def clear_shared_dict(self) -> None:
         self._base_templates = None
         self._base_tag8 = None
+        self._base_index = {}
 
     def pack_meta(self, meta: dict[str, Any]) -> bytes:
         fmt = int(meta.get("fmt", self.FMT_VERSION)) & 0xFF
@@ -145,7 +124,7 @@ class LayerTplLinesSharedV0:
         flags = int(meta.get("flags", 0)) & 0xFF
         base_n = int(meta.get("base_n", 0))
         out = bytearray([fmt, tok, flags])
-        out += _enc_varint(base_n)
+        out += enc_varint(base_n)
         if base_n > 0:
             tag8 = meta.get("base_tag8")
             if not isinstance(tag8, (bytes, bytearray)) or len(tag8) != 8:
@@ -163,7 +142,7 @@ class LayerTplLinesSharedV0:
         tok = int(b[1])
         flags = int(b[2])
         idx = 3
-        base_n, idx = _dec_varint(b, idx)
+        base_n, idx = dec_varint(b, idx)
         out: dict[str, Any] = {"fmt": fmt, "tok": tok, "flags": flags, "base_n": int(base_n)}
         if base_n > 0:
             if idx + 8 > len(b):
@@ -179,49 +158,58 @@ class LayerTplLinesSharedV0:
     def encode(self, data: bytes) -> tuple[tuple[bytes, bytes, bytes], dict[str, Any]]:
         # Reuse tpl_lines_v0 semantic tokenizer and NUMS encoding
         v0 = LayerTplLinesV0()
-        (tpl_raw_full, ids_raw_full, nums_raw), meta0 = v0.encode(data)
+        b = bytes(data)
+        base = self._base_templates
+        base_tag8 = self._base_tag8
 
-        meta: dict[str, Any] = {
-            "fmt": int(meta0.get("fmt", self.FMT_VERSION)),
-            "tok": int(meta0.get("tok", self.TOK_RULES)),
-        }
+        if not b or not base or not base_tag8:
+            (tpl_raw_full, ids_raw_full, nums_raw), meta0 = v0.encode(b)
 
-        if meta0.get("empty"):
-            # Keep empty encoding self-contained
-            meta["flags"] = int(self.FLAG_EMPTY)
+            meta: dict[str, Any] = {
+                "fmt": int(meta0.get("fmt", self.FMT_VERSION)),
+                "tok": int(meta0.get("tok", self.TOK_RULES)),
+            }
+            if meta0.get("empty"):
+                # Keep empty encoding self-contained
+                meta["flags"] = int(self.FLAG_EMPTY)
             meta["base_n"] = 0
             return (tpl_raw_full, ids_raw_full, nums_raw), meta
 
-        base = self._base_templates
-        base_tag8 = self._base_tag8
-        if not base or not base_tag8:
-            meta["base_n"] = 0
-            return (tpl_raw_full, ids_raw_full, nums_raw), meta
+        # Con base dict: templates/ids presi in memoria da v0 (niente pack+unpack del TPL
+        # completo né encode+decode degli IDS); NUMS resta identico a tpl_lines_v0.
+        full_templates, ids, nums_ints = v0._encode_lines(split_keeplines(b))
+        nums_raw = encode_ints(nums_ints)
+        meta = {"fmt": int(v0.FMT_VERSION), "tok": int(v0.TOK_RULES)}
 
-        full_templates = _unpack_templates(tpl_raw_full)
-        base_index: dict[tuple[bytes, ...], int] = {tuple(t): i for i, t in enumerate(base)}
+        base_index = self._base_index
 
-        # Build delta templates, map full template id -> new global id
+        keys = list(map(_template_key, full_templates))
         delta: list[list[bytes]] = []
-        delta_index: dict[tuple[bytes, ...], int] = {}
-        tid_map: dict[int, int] = {}
-
-        for tid, tpl in enumerate(full_templates):
-            key = tuple(tpl)
-            if key in base_index:
-                tid_map[tid] = int(base_index[key])
-            else:
-                di = delta_index.get(key)
-                if di is None:
-                    di = len(delta)
-                    delta_index[key] = di
-                    delta.append(list(tpl))
-                tid_map[tid] = int(len(base) + di)
-
-        # Remap IDS
-        ids = decode_ints(ids_raw_full)
-        ids2 = [int(tid_map.get(int(x), 0)) for x in ids]
-        ids_raw = encode_ints(ids2)
+        try:
+            # caso comune con dict ben tarato sul bucket: tutti i template sono nella base,
+            # il delta è vuoto e il remap è una lookup diretta
+            remap = list(map(base_index.__getitem__, keys))
+        except KeyError:
+            # Build delta templates, map full template id -> new global id
+            delta_index: dict[bytes | tuple[bytes, ...], int] = {}
+            # tid -> id globale: denso su range(len(full_templates)), quindi una lista
+            remap = []
+            append = remap.append
+            n_base = len(base)
+
+            for key, tpl in zip(keys, full_templates, strict=True):
+                gid = base_index.get(key)
+                if gid is None:
+                    di = delta_index.get(key)
+                    if di is None:
+                        di = len(delta)
+                        delta_index[key] = di
+                        delta.append(list(tpl))
+                    gid = n_base + di
+                append(gid)
+
+        # Remap IDS: gli id escono da _encode_lines, tutti in range(len(remap))
+        ids_raw = encode_ints(list(map(remap.__getitem__, ids)))
 
         tpl_raw = _pack_templates(delta)  # delta only
 
@@ -262,56 +250,11 @@ class LayerTplLinesSharedV0:
         if not nums:
             raise ValueError("tpl_lines_shared_v0: NUMS stream vuoto")
 
-        idx = 0
-        n_lines = int(nums[idx])
-        idx += 1
+        n_lines = int(nums[0])
 
         if n_lines != len(ids):
             # allow the special empty-file encoding
             if not (meta.get("empty") and n_lines == 1 and len(ids) == 1):
                 raise ValueError("tpl_lines_shared_v0: mismatch n_lines vs IDS")
 
-        out = bytearray()
-        for li in range(n_lines):
-            if idx >= len(nums):
-                raise ValueError("tpl_lines_shared_v0: NUMS troncato")
-            n_nums = int(nums[idx])
-            idx += 1
-
-            tid = int(ids[li]) if li < len(ids) else 0
-            if tid < 0 or tid >= len(templates):
-                raise ValueError(f"tpl_lines_shared_v0: template id fuori range: {tid}")
-            chunks = templates[tid]
-            expected = max(0, len(chunks) - 1)
-            if n_nums != expected:
-                raise ValueError(
-                    f"tpl_lines_shared_v0: n_nums mismatch (got={n_nums} expected={expected})"
-                )
-
-            out += chunks[0]
-            for ni in range(n_nums):
-                if idx + 3 > len(nums):
-                    raise ValueError("tpl_lines_shared_v0: NUMS troncato (triple)")
-                sign_code = int(nums[idx])
-                digits_len = int(nums[idx + 1])
-                magnitude = int(nums[idx + 2])
-                idx += 3
-
-                if sign_code == LayerTplLinesV0.SIGN_PLUS:
-                    out.append(ord("+"))
-                elif sign_code == LayerTplLinesV0.SIGN_MINUS:
-                    out.append(ord("-"))
-                elif sign_code != LayerTplLinesV0.SIGN_NONE:
-                    raise ValueError(f"tpl_lines_shared_v0: sign_code invalido: {sign_code}")
-
-                if digits_len < 1:
-                    raise ValueError("tpl_lines_shared_v0: digits_len invalido")
-                ds = str(magnitude)
-                if len(ds) < digits_len:
-                    ds = ds.zfill(digits_len)
-                out += ds.encode("ascii")
-                out += chunks[ni + 1]
-
-        if idx != len(nums):
-            raise ValueError("tpl_lines_shared_v0: NUMS stream contiene dati extra")
-        return bytes(out)
+        return _render_lines(templates, ids, nums, "tpl_lines_shared_v0")
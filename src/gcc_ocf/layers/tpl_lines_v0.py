@@ -1,42 +1,14 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
 from dataclasses import dataclass
+from itertools import accumulate, chain
 from typing import Any
 
 from gcc_ocf.core.num_stream import decode_ints, encode_ints
-
-
-def _enc_varint(x: int) -> bytes:
-    if x < 0:
-        raise ValueError("varint negativo non supportato")
-    out = bytearray()
-    while True:
-        b = x & 0x7F
-        x >>= 7
-        if x:
-            out.append(0x80 | b)
-        else:
-            out.append(b)
-            break
-    return bytes(out)
-
-
-def _dec_varint(buf: bytes, idx: int) -> tuple[int, int]:
-    shift = 0
-    x = 0
-    b = bytes(buf)
-    while True:
-        if idx >= len(b):
-            raise ValueError("varint troncato")
-        bb = b[idx]
-        idx += 1
-        x |= (bb & 0x7F) << shift
-        if (bb & 0x80) == 0:
-            break
-        shift += 7
-        if shift > 63:
-            raise ValueError("varint troppo grande")
-    return x, idx
+from gcc_ocf.core.varint import dec_varint, enc_varint
+from gcc_ocf.layers.line_split import split_keeplines
+from gcc_ocf.layers.split_text_nums import _NUM_TOKEN_RE, _SIGN_CODE, _SIGN_PREFIX
 
 
 def _pack_templates(templates: list[list[bytes]]) -> bytes:
@@ -48,31 +20,31 @@ def _pack_templates(templates: list[list[bytes]]) -> bytes:
           for each chunk:
             [len(varint)][chunk bytes]
     """
-    out = bytearray()
-    out += _enc_varint(len(templates))
+    # pezzi in lista e un solo join: niente bytearray che cresce né copia per chunk
+    parts = [enc_varint(len(templates))]
+    append = parts.append
     for chunks in templates:
-        out += _enc_varint(len(chunks))
+        append(enc_varint(len(chunks)))
         for c in chunks:
-            cb = bytes(c)
-            out += _enc_varint(len(cb))
-            out += cb
-    return bytes(out)
+            append(enc_varint(len(c)))
+            append(c)
+    return b"".join(parts)
 
 
 def _unpack_templates(raw: bytes) -> list[list[bytes]]:
     b = bytes(raw)
     idx = 0
-    n, idx = _dec_varint(b, idx)
+    n, idx = dec_varint(b, idx)
     if n > 1_000_000:
         raise ValueError("tpl_lines_v0: troppi template (sanity)")
     out: list[list[bytes]] = []
     for _ in range(n):
-        n_chunks, idx = _dec_varint(b, idx)
+        n_chunks, idx = dec_varint(b, idx)
         if n_chunks < 1 or n_chunks > 1_000_000:
             raise ValueError("tpl_lines_v0: n_chunks invalido")
         chunks: list[bytes] = []
         for _j in range(n_chunks):
-            ln, idx = _dec_varint(b, idx)
+            ln, idx = dec_varint(b, idx)
             if idx + ln > len(b):
                 raise ValueError("tpl_lines_v0: chunk troncato")
             chunks.append(b[idx : idx + ln])
@@ -84,6 +56,66 @@ def _unpack_templates(raw: bytes) -> list[list[bytes]]:
     return out
 
 
+def _template_key(chunks: Sequence[bytes]) -> bytes | tuple[bytes, ...]:
+    """Chiave di dict per un template: chunk uniti da \\x00 (un solo bytes da hashare).
+
+    Se qualche chunk contiene già \\x00 l'unione sarebbe ambigua: allora tuple dei chunk
+    (tipo diverso, quindi nessuna collisione con le chiavi bytes).
+    """
+    flat = b"\x00".join(chunks)
+    if flat.count(b"\x00") == len(chunks) - 1:
+        return flat
+    return tuple(map(bytes, chunks))
+
+
+def _render_lines(templates: list[list[bytes]], ids: list[int], nums: list[int], who: str) -> bytes:
+    """Ricostruisce le righe da template + IDS + NUMS (decode di tpl_lines_v0/shared).
+
+    Niente loop per numero: i contatori per riga devono valere len(template) - 1, quindi le
+    posizioni si ricavano con accumulate e si verificano in blocco; le triple escono a fette
+    e finiscono in un unico formato bytes (per template: chunk uniti da "%s%0*d").
+    """
+    n_total = len(nums)
+    n_tpl = len(templates)
+    if ids and (min(ids) < 0 or max(ids) >= n_tpl):
+        bad = next(t for t in ids if t < 0 or t >= n_tpl)
+        raise ValueError(f"{who}: template id fuori range: {bad}")
+
+    line_nums = list(map([max(0, len(c) - 1) for c in templates].__getitem__, ids))
+    pos = list(accumulate([3 * e + 1 for e in line_nums], initial=1))
+    counters = pos[:-1]
+    if pos[-1] > n_total or list(map(nums.__getitem__, counters)) != line_nums:
+        # stream incoerente: si ripercorrono le righe solo per l'errore preciso
+        idx = 1
+        for expected in line_nums:
+            if idx >= n_total:
+                raise ValueError(f"{who}: NUMS troncato")
+            got = nums[idx]
+            if got != expected:
+                raise ValueError(f"{who}: n_nums mismatch (got={got} expected={expected})")
+            idx += 1 + 3 * got
+            if idx > n_total:
+                raise ValueError(f"{who}: NUMS troncato (triple)")
+    if pos[-1] != n_total:
+        # strict: no garbage
+        raise ValueError(f"{who}: NUMS stream contiene dati extra")
+
+    # triple (sign_code, digits_len, magnitude) di tutte le righe, contatori esclusi
+    spans = map(slice, map((1).__add__, counters), pos[1:])
+    tri = list(chain.from_iterable(map(nums.__getitem__, spans)))
+    prefixes = list(map(_SIGN_PREFIX.get, tri[0::3]))
+    if None in prefixes:
+        raise ValueError(f"{who}: sign_code invalido: {tri[3 * prefixes.index(None)]}")
+    lens = tri[1::3]
+    if lens and min(lens) < 1:
+        raise ValueError(f"{who}: digits_len invalido")
+    tri[0::3] = prefixes
+
+    # '%' dei chunk raddoppiato: il formato vede solo gli slot dei numeri
+    patterns = [b"%s%0*d".join([c.replace(b"%", b"%%") for c in chunks]) for chunks in templates]
+    return b"".join(map(patterns.__getitem__, ids)) % tuple(tri)
+
+
 @dataclass(frozen=True)
 class LayerTplLinesV0:
     """Layer sperimentale: line template mining (lossless).
@@ -128,85 +160,30 @@ class LayerTplLinesV0:
             raise ValueError("tpl_lines_v0: meta troppo corta")
         return {"fmt": int(b[0]), "tok": int(b[1])}
 
-    @staticmethod
-    def _is_digit(x: int) -> bool:
-        return 48 <= x <= 57
-
-    @staticmethod
-    def _is_unary_sign(line: bytes, pos: int) -> bool:
-        # conservative: unary only in standard "value" contexts
-        if pos <= 0:
-            return True
-        prev = line[pos - 1]
-        if prev in (9, 10, 13, 32):
-            return True
-        if prev in (ord("("), ord("["), ord("{"), ord("<"), ord("="), ord(":"), ord(","), ord(";")):
-            return True
-        return False
-
     def _split_line(self, line: bytes) -> tuple[list[bytes], list[tuple[int, int, int]]]:
         """Return (chunks, nums_meta) for a single line.
 
         chunks length = n_nums + 1.
         nums_meta items = (sign_code, digits_len, magnitude).
+        Token/segno unario: stesse regole di split_text_nums (regex condivisa, ^ = inizio riga).
         """
         b = bytes(line)
-        n = len(b)
-        i = 0
         last = 0
         chunks: list[bytes] = []
         nums_meta: list[tuple[int, int, int]] = []
 
-        while i < n:
-            c = b[i]
-            start = -1
-            sign_code = self.SIGN_NONE
-            j = i
-
-            if (
-                c in (43, 45)
-                and (i + 1) < n
-                and self._is_digit(b[i + 1])
-                and self._is_unary_sign(b, i)
-            ):
-                start = i
-                sign_code = self.SIGN_PLUS if c == 43 else self.SIGN_MINUS
-                j = i + 1
-            elif self._is_digit(c):
-                start = i
-                j = i
-            else:
-                i += 1
-                continue
-
-            while j < n and self._is_digit(b[j]):
-                j += 1
-
-            token = b[start:j]
-            chunks.append(b[last:start])
-            last = j
-
-            if token and token[0] in (43, 45):
-                digits = token[1:]
-            else:
-                digits = token
-
-            if not digits:
-                i = j
-                continue
-
-            digits_len = len(digits)
-            magnitude = int(digits.decode("ascii"))
-            nums_meta.append((int(sign_code), int(digits_len), int(magnitude)))
-
-            i = j
+        for m in _NUM_TOKEN_RE.finditer(b):
+            sign, digits = m.group(1, 2)
+            chunks.append(b[last : m.start()])
+            last = m.end()
+            nums_meta.append((_SIGN_CODE[sign], len(digits), int(digits)))
 
         chunks.append(b[last:])
         return chunks, nums_meta
 
     def encode(self, data: bytes) -> tuple[tuple[bytes, bytes, bytes], dict[str, Any]]:
         b = bytes(data)
-        lines = b.splitlines(keepends=True)
+        lines = split_keeplines(b)
 
         # Special case: empty file
         if not lines and b == b"":
@@ -219,8 +196,23 @@ class LayerTplLinesV0:
                 "empty": True,
             }
 
+        templates, ids, nums_ints = self._encode_lines(lines)
+        tpl_raw = _pack_templates(templates)
+        ids_raw = encode_ints(ids)
+        nums_raw = encode_ints(nums_ints)
+
+        return (tpl_raw, ids_raw, nums_raw), {"fmt": self.FMT_VERSION, "tok": self.TOK_RULES}
+
+    def _encode_lines(
+        self, lines: Sequence[bytes]
+    ) -> tuple[list[list[bytes]], list[int], list[int]]:
+        """(templates, ids, nums_ints) in memoria, prima del packing degli stream.
+
+        Usato anche da tpl_lines_shared_v0, che rimappa templates/ids senza passare per i bytes.
+        """
         templates: list[list[bytes]] = []
-        tpl_index: dict[tuple[bytes, ...], int] = {}
+        # chiavi come _template_key, calcolata inline: i chunk sono pezzi della riga
+        tpl_index: dict[bytes | tuple[bytes, ...], int] = {}
 
         ids: list[int] = []
         nums_ints: list[int] = []
@@ -228,7 +220,7 @@ class LayerTplLinesV0:
 
         for line in lines:
             chunks, nums_meta = self._split_line(line)
-            key = tuple(chunks)
+            key = b"\x00".join(chunks) if b"\x00" not in line else tuple(chunks)
             tid = tpl_index.get(key)
             if tid is None:
                 tid = len(templates)
@@ -240,11 +232,7 @@ class LayerTplLinesV0:
             for sign_code, digits_len, magnitude in nums_meta:
                 nums_ints.extend([int(sign_code), int(digits_len), int(magnitude)])
 
-        tpl_raw = _pack_templates(templates)
-        ids_raw = encode_ints(ids)
-        nums_raw = encode_ints(nums_ints)
-
-        return (tpl_raw, ids_raw, nums_raw), {"fmt": self.FMT_VERSION, "tok": self.TOK_RULES}
+        return templates, ids, nums_ints
 
     def decode(self, symbols: tuple[bytes, bytes, bytes], layer_meta: dict[str, Any]) -> bytes:
         if not (isinstance(symbols, tuple) and len(symbols) == 3):
@@ -262,57 +250,11 @@ class LayerTplLinesV0:
         if not nums:
             raise ValueError("tpl_lines_v0: NUMS stream vuoto")
 
-        idx = 0
-        n_lines = int(nums[idx])
-        idx += 1
+        n_lines = int(nums[0])
 
         if n_lines != len(ids):
             # allow the special empty-file encoding
             if not (meta.get("empty") and n_lines == 1 and len(ids) == 1):
                 raise ValueError("tpl_lines_v0: mismatch n_lines vs IDS")
 
-        out = bytearray()
-        for li in range(n_lines):
-            if idx >= len(nums):
-                raise ValueError("tpl_lines_v0: NUMS troncato")
-            n_nums = int(nums[idx])
-            idx += 1
-
-            tid = int(ids[li]) if li < len(ids) else 0
-            if tid < 0 or tid >= len(templates):
-                raise ValueError(f"tpl_lines_v0: template id fuori range: {tid}")
-            chunks = templates[tid]
-            expected = max(0, len(chunks) - 1)
-            if n_nums != expected:
-                raise ValueError(
-                    f"tpl_lines_v0: n_nums mismatch (got={n_nums} expected={expected})"
-                )
-
-            out += chunks[0]
-            for ni in range(n_nums):
-                if idx + 3 > len(nums):
-                    raise ValueError("tpl_lines_v0: NUMS troncato (triple)")
-                sign_code = int(nums[idx])
-                digits_len = int(nums[idx + 1])
-                magnitude = int(nums[idx + 2])
-                idx += 3
-
-                if sign_code == self.SIGN_PLUS:
-                    out.append(ord("+"))
-                elif sign_code == self.SIGN_MINUS:
-                    out.append(ord("-"))
-                elif sign_code != self.SIGN_NONE:
-                    raise ValueError(f"tpl_lines_v0: sign_code invalido: {sign_code}")
-
-                if digits_len < 1:
-                    raise ValueError("tpl_lines_v0: digits_len invalido")
-                ds = str(magnitude)
-                if len(ds) < digits_len:
-                    ds = ds.zfill(digits_len)
-                out += ds.encode("ascii")
-                out += chunks[ni + 1]
-
-        if idx != len(nums):
-            # strict: no garbage
-            raise ValueError("tpl_lines_v0: NUMS stream contiene dati extra")
-        return bytes(out)
+        return _render_lines(templates, ids, nums, "tpl_lines_v0")
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from gcc_ocf.core.varint import dec_varint, enc_varint
+
 # ------------------------------------------------------------
 # Vocab blob encoding
 #
@@ -13,49 +15,26 @@ from __future__ import annotations
 MAGIC_VB2 = b"VB2\0"
 
 
+# varint condivisi, coi messaggi d'errore storici del formato VB2
 def _enc_varint(n: int) -> bytes:
-    if n < 0:
-        raise ValueError("varint: n < 0")
-    out = bytearray()
-    while True:
-        b = n & 0x7F
-        n >>= 7
-        if n:
-            out.append(b | 0x80)
-        else:
-            out.append(b)
-            break
-    return bytes(out)
+    return enc_varint(n, neg_msg="varint: n < 0")
 
 
 def _dec_varint(buf: bytes, idx: int) -> tuple[int, int]:
-    n = 0
-    shift = 0
-    while True:
-        if idx >= len(buf):
-            raise ValueError("varint: buffer troncato")
-        b = buf[idx]
-        idx += 1
-        n |= (b & 0x7F) << shift
-        if (b & 0x80) == 0:
-            return n, idx
-        shift += 7
-        if shift > 63:
-            raise ValueError("varint: overflow")
+    return dec_varint(buf, idx, trunc_msg="varint: buffer troncato", big_msg="varint: overflow")
 
 
 def pack_vocab_list(vocab_list: list[bytes]) -> bytes:
     # VB2 format
-    out = bytearray()
-    out += MAGIC_VB2
-    out += _enc_varint(len(vocab_list))
+    parts = [MAGIC_VB2, _enc_varint(len(vocab_list))]
+    append = parts.append
     for tok in vocab_list:
         if not isinstance(tok, (bytes, bytearray)):
             raise TypeError("vocab_list deve contenere bytes")
-        tok_b = bytes(tok)
-        out += _enc_varint(len(tok_b))
-        out += tok_b
-    return bytes(out)
+        append(_enc_varint(len(tok)))
+        append(tok)
+    # un solo join finale: niente bytearray che cresce né copia per token
+    return b"".join(parts)
 
 
 def unpack_vocab_list(blob: bytes) -> list[bytes]:
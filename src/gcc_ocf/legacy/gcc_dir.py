@@ -72,6 +72,7 @@ from gcc_ocf.core.num_stream import decode_ints, encode_ints
 from gcc_ocf.dir_pipeline_spec import DirPipelineSpec
 from gcc_ocf.engine.container import Engine
 from gcc_ocf.engine.container_v6 import compress_v6_mbn, decompress_v6
+from gcc_ocf.layers.line_split import shared_line_splits
 from gcc_ocf.layers.tpl_lines_shared_v0 import (
     LayerTplLinesSharedV0,
     pack_tpl_dict_v0_resource,
@@ -501,7 +502,7 @@ def _sha256(data: bytes) -> str:
 
 def _engine_with_num_shared(base: Engine, dict_vals: list[int], tag8: bytes) -> Engine:
     """Return a new Engine whose num_v1 codec is configured with a shared dict."""
-    eng = Engine(layers=base.layers, codecs=dict(base.codecs))
+    eng = Engine(layers=base.layers, codecs=base.codecs.copy())
     c = CodecNumV1()
     c.set_shared_dict(dict_vals, tag8=tag8)
     eng.codecs["num_v1"] = c
@@ -510,11 +511,11 @@ def _engine_with_num_shared(base: Engine, dict_vals: list[int], tag8: bytes) ->
 
 def _engine_with_tpl_shared(base: Engine, templates: list[list[bytes]], tag8: bytes) -> Engine:
     """Return a new Engine whose tpl_lines_shared_v0 layer is configured with a shared dict."""
-    layers = dict(base.layers)
+    layers = base.layers.copy()
     lyr = LayerTplLinesSharedV0()
     lyr.set_shared_dict(templates, tag8=tag8)
     layers[lyr.id] = lyr
-    return Engine(layers=layers, codecs=dict(base.codecs))
+    return Engine(layers=layers, codecs=base.codecs.copy())
 
 
 def _numeric_density(data: bytes) -> float:
@@ -800,7 +801,8 @@ def _build_bucket_tpl_dict(
         return [], b"", b"", {}
 
     blob, meta = pack_tpl_dict_v0_resource(picked)
-    tag8 = hashlib.sha256(blob).digest()[:8]
+    # tag8 già calcolato dal pack (sha256 del blob): niente secondo hash
+    tag8 = bytes.fromhex(meta["tag8_hex"])
     return picked, tag8, blob, meta
 
 
@@ -1337,15 +1339,17 @@ def packdir(
         btype, met = _bucket_type(recs)
         bucket_types[b] = btype
         bucket_metrics[b] = met
-        plan, runner, rep = _choose_plan_for_bucket(
-            eng,
-            recs,
-            bucket_type=btype,
-            top_db=top_db,
-            top_k=top_k,
-            top_db_max=top_db_max,
-            dir_spec=dir_spec,
-        )
+        # i candidati dell'autopick riusano lo split in righe dei campioni del bucket
+        with shared_line_splits():
+            plan, runner, rep = _choose_plan_for_bucket(
+                eng,
+                recs,
+                bucket_type=btype,
+                top_db=top_db,
+                top_k=top_k,
+                top_db_max=top_db_max,
+                dir_spec=dir_spec,
+            )
         plans[b] = plan
         runners[b] = runner
         bucket_autopick[b] = rep
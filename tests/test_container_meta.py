@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+
+def test_encode_meta_bytes_match_stdlib_json() -> None:
+    from gcc_ocf.engine.container import _meta_to_jsonable, decode_meta, encode_meta
+
+    metas = [
+        {"vocab_list": ["è", "a\nb", "😀"], "n": 3, "flags": (True, None), "blob": b"\x00\xff"},
+        {"ratio": 1e16, "tiny": 1e-05, "x": [0.1, 2.0]},
+        {},
+    ]
+    for meta in metas:
+        ref = json.dumps(_meta_to_jsonable(meta), ensure_ascii=False, separators=(",", ":"))
+        blob = encode_meta(meta)
+        assert blob == ref.encode("utf-8")
+        assert decode_meta(blob) == meta
+
+
+def test_container_v5_layout_roundtrip() -> None:
+    from gcc_ocf.engine.container import pack_container_v5, unpack_container_v5
+
+    blob = pack_container_v5("vc0", "zstd", {"n": 1}, b"PAYLOAD")
+    assert blob == (
+        b"GCC\x05\x03vc0\x04zstd" + b"\x00\x00\x00\x07" + b'{"n":1}' + b"\x00\x00\x00\x07PAYLOAD"
+    )
+    assert unpack_container_v5(blob) == ("vc0", "zstd", {"n": 1}, b"PAYLOAD")
+
+
+def test_container_v5_truncated_lengths_raise_value_error() -> None:
+    from gcc_ocf.engine.container import pack_container_v5, unpack_container_v5
+
+    blob = pack_container_v5("vc0", "zstd", {}, b"x" * 10)
+    with pytest.raises(ValueError, match="troncato"):
+        unpack_container_v5(blob[:21])
+
+
+def test_meta_jsonable_conversion_is_not_recursive() -> None:
+    import sys
+
+    from gcc_ocf.engine.container import _meta_from_jsonable, _meta_to_jsonable
+
+    deep: object = b"\x01"
+    for i in range(sys.getrecursionlimit() + 100):
+        deep = [deep] if i % 3 == 0 else ((deep,) if i % 3 == 1 else {"k": deep, "f": 2.5})
+    meta = {"deep": deep, "a": 1}
+    floats: list[float] = []
+    jsonable = _meta_to_jsonable(meta, floats)
+    assert len(floats) == (sys.getrecursionlimit() + 100) // 3
+
+    a, b = _meta_from_jsonable(jsonable)["deep"], meta["deep"]
+    while type(b) is not bytes:
+        assert type(a) is type(b)
+        a, b = (a["k"], b["k"]) if type(b) is dict else (a[0], b[0])
+    assert a == b
+
+
+def test_engine_default_builds_fresh_instances() -> None:
+    from gcc_ocf.engine.container import Engine
+
+    a, b = Engine.default(), Engine.default()
+    assert a.codecs is not b.codecs and a.layers is not b.layers
+    assert a.codecs["zstd"] is not b.codecs["zstd"]
+    # stato impostato su un engine (dict condivisi) non deve comparire negli altri
+    a.layers["tpl_lines_shared_v0"].set_shared_dict([[b"x", b"\n"]], tag8=b"T" * 8)
+    a.codecs["num_v1"].set_shared_dict([1, 2, 3])
+    assert b.layers["tpl_lines_shared_v0"]._base_templates is None
+    assert Engine.default().codecs["num_v1"]._shared_vals is None
+    assert b.decompress(b.compress(b"abc\n" * 10, "lines_dict", "zlib")) == b"abc\n" * 10
+
+
+def test_engine_default_materializes_lazily() -> None:
+    from gcc_ocf.core.codec_num_v1 import CodecNumV1
+    from gcc_ocf.engine.container import Engine
+    from gcc_ocf.layers.bytes import LayerBytes
+
+    e = Engine.default()
+    assert dict.__len__(e.codecs) == 0
+    assert "zstd" in e.codecs and "nope" not in e.codecs
+    z = e.codecs["zstd"]
+    assert e.codecs["zstd"] is z and e.codecs.get("zstd") is z
+    assert e.codecs.get("nope") is None
+    # copie: le voci già costruite restano le stesse istanze, le altre sono istanze vere
+    for cp in (dict(e.codecs), e.codecs.copy()):
+        assert cp["zstd"] is z
+        assert set(cp) == set(e.codecs)
+        assert isinstance(cp["num_v1"], CodecNumV1)
+    assert isinstance(dict(e.layers)["bytes"], LayerBytes)
+    # assegnazione esplicita sostituisce il costruttore
+    e.codecs["raw"] = "x"
+    assert e.codecs["raw"] == "x"
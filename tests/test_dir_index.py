@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import pytest
+
+from gcc_ocf.dir_index import DirBundleIndexV1, DirIndexEntry
+from gcc_ocf.errors import CorruptPayload
+
+
+def _idx() -> DirBundleIndexV1:
+    idx = DirBundleIndexV1(
+        root="d",
+        kind="text",
+        concat_sha256="00" * 32,
+        layer_used="bytes",
+        codec_used="zstd",
+        files=[],
+    )
+    idx.put("a.txt", 0, 3, "aa")
+    idx.put("sub/b.txt", 3, 5, "bb")
+    return idx
+
+
+def test_dir_index_roundtrip() -> None:
+    idx = _idx()
+    back = DirBundleIndexV1.deserialize(idx.serialize())
+    assert back == idx
+    assert back.get("sub/b.txt") == DirIndexEntry("sub/b.txt", 3, 5, "bb")
+    assert back.get("missing") is None
+
+
+def test_dir_index_entries_coercion_and_errors() -> None:
+    # slow path still coerces numeric strings
+    ents = DirIndexEntry.list_from_dicts(
+        [
+            {"rel": "a", "offset": 0, "length": 1, "sha256": "x"},
+            {"rel": "b", "offset": "1", "length": "2", "sha256": "y"},
+        ]
+    )
+    assert ents == [DirIndexEntry("a", 0, 1, "x"), DirIndexEntry("b", 1, 2, "y")]
+
+    with pytest.raises(CorruptPayload, match=r"\(rel\)"):
+        DirIndexEntry.list_from_dicts([{"offset": 0, "length": 1, "sha256": "x"}])
+    with pytest.raises(CorruptPayload, match="negative"):
+        DirIndexEntry.list_from_dicts([{"rel": "a", "offset": -1, "length": 1, "sha256": "x"}])
+    with pytest.raises(CorruptPayload, match="non dict"):
+        DirIndexEntry.list_from_dicts(["a"])
+
+
+def test_dir_index_serialize_matches_stdlib_json() -> None:
+    import json
+
+    idx = _idx()
+    idx.put("àccènti/ü.txt", 8, 0, "cc")
+    expected = json.dumps(idx.to_dict(), ensure_ascii=False, indent=2).encode("utf-8")
+    assert idx.serialize() == expected
+
+    with pytest.raises(CorruptPayload, match="JSON invalido"):
+        DirBundleIndexV1.deserialize(b"\xff{")
+
+
+def test_dir_index_get_lazy_map_tracks_put() -> None:
+    idx = _idx()
+    assert idx.get("a.txt") is not None  # builds the map
+    idx.put("c.txt", 8, 1, "cc")
+    assert idx.get("c.txt") == DirIndexEntry("c.txt", 8, 1, "cc")
+    # duplicates: first occurrence wins (same as the old linear scan)
+    idx.put("a.txt", 9, 9, "dup")
+    assert idx.get("a.txt") == DirIndexEntry("a.txt", 0, 3, "aa")
+    assert idx.get("missing") is None
@@ -35,3 +35,82 @@ def test_packdir_writes_aggregated_report(tmp_path: Path) -> None:
     assert isinstance(rep["top_extensions"], list)
     keys = {row["key"] for row in rep["top_extensions"] if "key" in row}
     assert ".txt" in keys
+
+
+def test_load_manifest_rows_streams_and_skips_bad_lines(tmp_path: Path) -> None:
+    from gcc_ocf.dir_pack_report import _load_manifest_rows
+
+    assert _load_manifest_rows(tmp_path) == []
+    (tmp_path / "manifest.jsonl").write_bytes(
+        b'{"rel": "a.txt", "bucket": 1}\r\n\nnot json\n[1, 2]\n{"rel": "\xc3\xa8.txt"}'
+    )
+    assert _load_manifest_rows(tmp_path) == [{"rel": "a.txt", "bucket": 1}, {"rel": "è.txt"}]
+
+
+def test_build_report_aggregates_file_rows(tmp_path: Path) -> None:
+    from gcc_ocf.dir_pack_report import build_dir_pack_report
+
+    rows = [
+        {
+            "rel": "a.txt",
+            "bucket": 1,
+            "in_size": 100,
+            "out_size": 40,
+            "layer_id": "bytes",
+            "codec_text": "zstd",
+            "stream_codecs": {"1": "zstd", "0": "raw"},
+        },
+        {
+            "rel": "b.TXT",
+            "bucket": 1,
+            "in_size": 50,
+            "out_size": 30,
+            "layer_id": "bytes",
+            "codec_text": "zstd",
+            "stream_codecs": {0: "raw", 1: "zstd"},
+        },
+        {"rel": "c", "bucket": 2, "size_in": 10, "size_out": 12, "layer_id": "vc0", "note": " x "},
+        {"path": "d.bin", "bucket": "x", "in_size": "7", "out_size": 7},
+        {"rel": ""},
+    ]
+    rep = build_dir_pack_report(
+        input_dir=tmp_path,
+        output_dir=tmp_path,
+        buckets=4,
+        files_ok=4,
+        files_fail=0,
+        total_in=167,
+        total_out=89,
+        bucket_summaries={"03": {"bucket_type": "text"}},
+        file_rows=rows,
+        error_rows=[],
+    )
+
+    def cols(key: str) -> list[tuple]:
+        return [(r["key"], r["files"], r["in"], r["out"], r["saved"]) for r in rep[key]]
+
+    assert cols("top_extensions") == [
+        (".txt", 2, 150, 70, 80),
+        (".bin", 1, 7, 7, 0),
+        ("(none)", 1, 10, 12, -2),
+    ]
+    assert cols("top_plans") == [
+        ("bytes+zstd;streams=0:raw,1:zstd", 2, 150, 70, 80),
+        ("+", 1, 7, 7, 0),
+        ("vc0+;note=x", 1, 10, 12, -2),
+    ]
+    assert [(r["bucket"], r["files"], r["saved"]) for r in rep["top_buckets"]] == [
+        (1, 2, 80),
+        (3, 0, 0),
+        (0, 1, 0),
+        (2, 1, -2),
+    ]
+    assert rep["buckets_detail"]["03"]["bucket_type"] == "text"
+    assert rep["ratio"] == 89 / 167
+
+
+def test_norm_ext_matches_path_suffix() -> None:
+    from gcc_ocf.dir_pack_report import _norm_ext
+
+    for rel in ["a.txt", "d/A.TXT", "d.x/noext", ".bashrc", "a.", "x/..", "a.tar.GZ", "b.md/"]:
+        assert _norm_ext(rel) == (Path(rel).suffix.lower() or "(none)")
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import pytest
+
+from gcc_ocf.core.bundle import SymbolStream
+from gcc_ocf.core.huffman_bundle import (
+    BUNDLE_MAGIC_V2,
+    BUNDLE_MAGIC_V3,
+    BUNDLE_MAGICS,
+    _svb_decode,
+    _svb_encode,
+    huffman_decode_stream,
+    huffman_encode_stream,
+    pack_huffman_bundle,
+    unpack_huffman_bundle,
+)
+
+
+def test_svb_golden_vector() -> None:
+    # lens: 1,2,3,4 -> ctrl = 0b11_10_01_00 = 0xe4 ; 5th value (1 byte) -> ctrl 0x00
+    vals = [0x01, 0x0203, 0x040506, 0x0708090A, 0xFF]
+    blob = _svb_encode(vals)
+    assert blob.hex() == "e400" + "01" + "0302" + "060504" + "0a090807" + "ff"
+    assert _svb_decode(blob, 0, len(vals)) == (vals, len(blob))
+
+
+def test_svb_validation() -> None:
+    with pytest.raises(ValueError, match="fuori range u32"):
+        _svb_encode([1 << 32])
+    with pytest.raises(ValueError, match="data bytes troncati"):
+        _svb_decode(bytes.fromhex("e40001"), 0, 4)
+    with pytest.raises(ValueError, match="control bytes troncati"):
+        _svb_decode(b"", 0, 1)
+
+
+def test_hbn3_roundtrip_matches_v2() -> None:
+    assert BUNDLE_MAGIC_V3 in BUNDLE_MAGICS
+
+    data = b"abracadabra " * 50 + bytes(range(256))
+    ids = [i % 300 for i in range(0, 5000, 7)] + [70000, 3, 70000]
+    streams = [
+        huffman_encode_stream(
+            SymbolStream(name="main", kind="bytes", alphabet_size=256, n=len(data), data=data)
+        ),
+        huffman_encode_stream(
+            SymbolStream(name="ids", kind="ids", alphabet_size=70001, n=len(ids), data=ids)
+        ),
+    ]
+
+    v2 = pack_huffman_bundle(streams)
+    v3 = pack_huffman_bundle(streams, magic=BUNDLE_MAGIC_V3)
+    assert v2[:4] == BUNDLE_MAGIC_V2
+    assert v3[:4] == BUNDLE_MAGIC_V3
+
+    dec2 = unpack_huffman_bundle(v2)
+    dec3 = unpack_huffman_bundle(v3)
+    assert dec3 == dec2
+    assert huffman_decode_stream(dec3[0]).data == data
+    assert list(huffman_decode_stream(dec3[1]).data) == ids
+
+
+def test_hbn3_encode_rejects_unknown_magic() -> None:
+    with pytest.raises(ValueError, match="magic bundle non supportato"):
+        pack_huffman_bundle([], magic=b"HBN1")
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import pytest
+
+
+def test_lines_layers_roundtrip_and_rle_pairs() -> None:
+    from gcc_ocf.layers.lines_dict import LayerLinesDict
+    from gcc_ocf.layers.lines_rle import LayerLinesRLE
+
+    data = b"a\na\na\nb\na\n\n\nc"
+    sym, meta = LayerLinesRLE().encode(data)
+    # (id, run) pairs: a*3, b*1, a*1, \n*2, c*1
+    assert bytes(sym) == bytes([0, 3, 1, 1, 0, 1, 2, 2, 3, 1])
+    assert meta == {"vocab_list": [b"a\n", b"b\n", b"\n", b"c"], "n_lines": 8}
+
+    for layer in (LayerLinesDict(), LayerLinesRLE()):
+        for d in (data, b"", b"x", b"\n" * 5, b"".join(b"%d\n" % (i % 7) for i in range(500))):
+            sym, meta = layer.encode(d)
+            assert layer.decode(sym, meta) == d
+            assert layer.decode(sym, layer.unpack_meta(layer.pack_meta(meta))) == d
+
+
+def test_lines_rle_decode_rejects_bad_runs() -> None:
+    from gcc_ocf.layers.lines_rle import LayerLinesRLE
+
+    meta = {"vocab_list": [b"a\n"], "n_lines": 3}
+    for sym, msg in [
+        (bytes([0, 2]), "n_lines mismatch"),
+        (bytes([0, 0xFF, 0xFF, 0xFF, 0x7F]), "n_lines mismatch"),
+        (bytes([0, 0]), "run non valido"),
+        (bytes([1, 3]), "fuori range"),
+    ]:
+        with pytest.raises(ValueError, match=msg):
+            LayerLinesRLE().decode(sym, meta)
+
+
+def test_lines_rle_dec_varint_pairs_multibyte() -> None:
+    from gcc_ocf.core.varint import enc_varint
+    from gcc_ocf.layers.lines_rle import _dec_varint_pairs
+
+    pairs = [(0, 1), (300, 2), (5, 70000), (127, 128)]
+    buf = b"".join(enc_varint(v) + enc_varint(r) for v, r in pairs)
+    assert _dec_varint_pairs(buf) == ([v for v, _ in pairs], [r for _, r in pairs])
+    assert _dec_varint_pairs(bytes([1, 2, 3, 4])) == ([1, 3], [2, 4])
+    with pytest.raises(ValueError, match="troncato"):
+        _dec_varint_pairs(bytes([1, 2, 3]))
+
+
+def test_lines_dict_repeated_line_fast_path_matches_split() -> None:
+    from gcc_ocf.layers.lines_dict import LayerLinesDict
+
+    layer = LayerLinesDict()
+    for data in [
+        b"same line\n" * 50,
+        b"crlf\r\n" * 7,
+        b"a\rb\n" * 3,  # \r interno: splitlines fa due righe
+        b"x\n" * 4 + b"x",
+        b"ab\nab\nba\n",
+        b"\n\n\n",
+    ]:
+        lines = data.splitlines(keepends=True)
+        vocab = list(dict.fromkeys(lines))
+        ids, meta = layer.encode(data)
+        assert meta["vocab_list"] == vocab
+        assert ids == [vocab.index(ln) for ln in lines]
+        assert layer.decode(ids, meta) == data
+
+
+def test_split_keeplines_shared_across_line_layers() -> None:
+    from gcc_ocf.layers import line_split
+    from gcc_ocf.layers.line_split import shared_line_splits, split_keeplines
+
+    data = b"a\nb\r\nc\rd"
+    assert list(split_keeplines(data)) == data.splitlines(keepends=True)
+    # fuori da shared_line_splits niente cache: nessun input trattenuto
+    assert split_keeplines(data) is not split_keeplines(data)
+    with shared_line_splits():
+        first = split_keeplines(data)
+        assert split_keeplines(bytes(bytearray(data))) is first
+        with shared_line_splits():  # annidato: stessa cache
+            assert split_keeplines(data) is first
+        big = bytearray(b"x\n" * 4)
+        assert split_keeplines(big) == big.splitlines(keepends=True)
+        assert len(line_split._local.cache) == 1
+    assert line_split._local.cache is None
@@ -89,3 +89,55 @@ def test_mbn_unpack_error_cases() -> None:
     # sanity check: nstreams too large (10001)
     with pytest.raises(ValueError, match="nstreams troppo grande"):
         unpack_mbn(_b("4d424e") + b"\x91\x4e")  # 0x4e91 (LEB128) = 10001
+
+
+def test_container_v6_golden_layout() -> None:
+    from gcc_ocf.engine.container_v6 import pack_container_v6, unpack_container_v6
+
+    # magic "GCC" + ver 6 + flags + layer code + codec code [+ varint mlen + meta] + payload
+    blob = pack_container_v6(b"PAY", layer_id="lines_rle", codec_id="zlib")
+    assert blob.hex() == "4743430600050650" + "4159"
+    blob = pack_container_v6(b"P", layer_id="bytes", codec_id="mbn", meta=b"\xaa", is_extract=True)
+    assert blob.hex() == "47434306810004" + "01aa" + "50"
+
+    h = unpack_container_v6(blob)
+    assert (h.layer_id, h.codec_id, h.is_extract, h.meta, h.payload) == (
+        "bytes",
+        "mbn",
+        True,
+        b"\xaa",
+        b"P",
+    )
+
+
+def test_unpack_views_payload_and_streams_without_copy() -> None:
+    from gcc_ocf.engine.container import Engine
+    from gcc_ocf.engine.container_v6 import compress_v6_mbn, decompress_v6, unpack_container_v6
+
+    eng = Engine.default()
+    data = b"".join(b"riga %d qty=%d\n" % (i % 5, i) for i in range(200))
+    blob = compress_v6_mbn(
+        eng, data, layer_id="split_text_nums", codec_id="zlib", stream_codecs={ST_NUMS: "num_v1"}
+    )
+
+    h = unpack_container_v6(blob)
+    assert isinstance(h.payload, memoryview) and h.payload.obj is blob
+    assert all(isinstance(s.comp, memoryview) for s in unpack_mbn(h.payload))
+    assert decompress_v6(eng, blob) == data
+
+
+def test_mbn_parallel_streams_match_serial(monkeypatch: pytest.MonkeyPatch) -> None:
+    import gcc_ocf.engine.container_v6 as v6
+    from gcc_ocf.engine.container import Engine
+
+    eng = Engine.default()
+    data = b"".join(b"RIGA %d qty=%d tot=%d.50\n" % (i % 13, i, i * 7) for i in range(2000))
+
+    monkeypatch.setattr(v6, "_MBN_PARALLEL_MIN_BYTES", 1 << 62)
+    serial = v6.compress_v6_mbn(eng, data, layer_id="tpl_lines_v0", codec_id="zlib")
+    monkeypatch.setattr(v6, "_MBN_PARALLEL_MIN_BYTES", 0)
+    monkeypatch.setattr(v6.os, "cpu_count", lambda: 4)
+    parallel = v6.compress_v6_mbn(eng, data, layer_id="tpl_lines_v0", codec_id="zlib")
+
+    assert parallel == serial
+    assert v6.decompress_v6(eng, parallel) == data
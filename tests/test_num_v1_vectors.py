@@ -43,6 +43,24 @@ def test_num_stream_vectors_roundtrip_and_hex() -> None:
     raw = encode_ints(ints)
     assert decode_ints(raw) == ints
 
+    # 1-byte fast path vs multi-byte path must agree byte-for-byte
+    small = list(range(-64, 64))
+    assert encode_ints(small) == bytes(2 * abs(n) - (n < 0) for n in small)
+    assert decode_ints(encode_ints(small)) == small
+    assert decode_ints(encode_ints([2**62, -(2**62)])) == [2**62, -(2**62)]
+
+    # tabelle 1-2 byte (|n| ~ < 8192) vs percorso generico, ai bordi del range
+    edge = [8191, -8192, 8192, -8193, 63, -65, 1.0]
+    assert encode_ints(edge) == b"".join(encode_ints([int(n)]) for n in edge)
+    assert encode_ints([8191, -8192]).hex() == "fe7fff7f"
+    assert decode_ints(encode_ints(edge)) == [int(n) for n in edge]
+    assert decode_ints(b"\x82\x00\x05") == [1, -3]  # varint non canonico accettato
+
+    with pytest.raises(ValueError, match="varint troncato"):
+        decode_ints(b"\x80")
+    with pytest.raises(ValueError, match="varint troppo grande"):
+        decode_ints(b"\xff" * 11)
+
 
 def test_num_v1_empty_raw_vector() -> None:
     c = CodecNumV1()
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import pytest
+
+
+def test_split_text_nums_unary_sign_rules() -> None:
+    from gcc_ocf.core.num_stream import decode_ints, encode_ints
+    from gcc_ocf.layers.split_text_nums import LayerSplitTextNums
+
+    layer = LayerSplitTextNums()
+    data = b"-7 2024-01-01 x-1 (+05,-3)--4"
+    (text, nums), meta = layer.encode(data)
+    seq = decode_ints(nums)
+    n = seq[0]
+    triples = [tuple(seq[i : i + 3]) for i in range(2 + n, len(seq), 3)]
+    # segno solo a inizio buffer e dopo separatori; date/range/operatori restano TEXT
+    assert triples == [
+        (2, 1, 7),
+        (0, 4, 2024),
+        (0, 2, 1),
+        (0, 2, 1),
+        (0, 1, 1),
+        (1, 2, 5),
+        (2, 1, 3),
+        (0, 1, 4),
+    ]
+    assert text == b" -- x- (,)--"
+    assert layer.decode((text, nums), meta) == data
+    # buffer non-bytes: niente copia dell'input, stessi stream e output bytes
+    assert layer.encode(memoryview(data)) == ((text, nums), meta)
+    assert layer.decode((memoryview(text), nums), meta) == data
+
+    # zeri iniziali preservati; digits_len più corto delle cifre = stream corrotto
+    assert layer.decode((b"a", encode_ints([1, 1, 0, 0, 4, 7])), meta) == b"a0007"
+    with pytest.raises(ValueError, match="digits_len troppo piccolo"):
+        layer.decode((b"a", encode_ints([1, 1, 0, 0, 1, 70])), meta)
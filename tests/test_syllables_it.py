@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import pytest
+
+
+def test_syllables_it_tokenization() -> None:
+    from gcc_ocf.layers.syllables_it import LayerSyllablesIT, _tokenize_syllables_and_other
+
+    data = b"Strada, casa! brr 42 aiuola"
+    assert _tokenize_syllables_and_other(data) == [
+        b"Stra",
+        b"da",
+        b", ",
+        b"ca",
+        b"sa",
+        b"! ",
+        b"brr",
+        b" 42 ",
+        b"a",
+        b"i",
+        b"u",
+        b"o",
+        b"la",
+    ]
+    layer = LayerSyllablesIT()
+    ids, meta = layer.encode(data)
+    assert layer.decode(ids, meta) == data
+    for bad in ([0, len(meta["vocab_list"])], [-1]):
+        with pytest.raises(ValueError, match="fuori range"):
+            layer.decode(bad, meta)
@@ -78,3 +78,23 @@ def test_tpl_lines_shared_fails_on_tag_mismatch(tmp_path: Path) -> None:
         raise AssertionError("expected tag8 mismatch error")
     except ValueError as e:
         assert "tag8 mismatch" in str(e)
+
+
+def test_tpl_lines_shared_base_covering_all_templates() -> None:
+    from gcc_ocf.layers.tpl_lines_shared_v0 import LayerTplLinesSharedV0
+    from gcc_ocf.layers.tpl_lines_v0 import _pack_templates
+
+    data = b"id=1 x=2\nid=30 x=-4\nok\n"
+    layer = LayerTplLinesSharedV0()
+    base = [[b"ok\n"], [b"id=", b" x=", b"\n"]]
+    layer.set_shared_dict(base, tag8=b"T" * 8)
+    (tpl_raw, ids_raw, nums_raw), meta = layer.encode(data)
+    assert tpl_raw == _pack_templates([])
+    assert meta["base_n"] == 2
+    assert layer.decode((tpl_raw, ids_raw, nums_raw), meta) == data
+
+    # base parziale: i template mancanti finiscono nel delta
+    layer.set_shared_dict(base[1:], tag8=b"T" * 8)
+    (tpl_raw, ids_raw, nums_raw), meta = layer.encode(data)
+    assert tpl_raw == _pack_templates([[b"ok\n"]])
+    assert layer.decode((tpl_raw, ids_raw, nums_raw), meta) == data
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+
+def test_tpl_template_key_flat_and_nul_safe() -> None:
+    from gcc_ocf.layers.tpl_lines_v0 import LayerTplLinesV0, _template_key, _unpack_templates
+
+    assert _template_key([b"id=", b"\n"]) == b"id=\x00\n"
+    # un \x00 dentro i chunk non deve far collidere template diversi
+    assert _template_key([b"a\x00", b"b"]) != _template_key([b"a", b"\x00b"])
+
+    data = b"a\x00 1\na \x001\na\x00 2\n"
+    layer = LayerTplLinesV0()
+    streams, meta = layer.encode(data)
+    assert len(_unpack_templates(streams[0])) == 2
+    assert layer.decode(streams, meta) == data
+
+
+def test_tpl_templates_blob_multibyte_lengths() -> None:
+    from gcc_ocf.layers.tpl_lines_v0 import _pack_templates, _unpack_templates
+
+    tpls = [[b"x" * 128, b""], [b"y" * 16384]]
+    raw = _pack_templates(tpls)
+    assert raw[:4] == b"\x02\x02\x80\x01"
+    assert _unpack_templates(raw) == tpls
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("zstandard")
+
+from gcc_ocf.core.codec_zstd import CodecZstd  # noqa: E402
+from gcc_ocf.core.v5_dispatch import decode_v5_payload, encode_v5_payload  # noqa: E402
+from gcc_ocf.core.zstd_raw import ZRAW2_MAGIC, pack_zstd_raw2, unpack_zstd_raw2  # noqa: E402
+
+
+class _UpperMetaLayer:
+    """bytes layer with a non-empty binary meta: main + __meta__ streams."""
+
+    def encode(self, data: bytes):
+        return data.lower(), {"upper": [i for i, b in enumerate(data) if 65 <= b <= 90]}
+
+    def decode(self, symbols, meta):
+        out = bytearray(symbols)
+        for i in meta.get("upper", []):
+            out[i] -= 32
+        return bytes(out)
+
+    def pack_meta(self, meta) -> bytes:
+        return bytes(meta["upper"])
+
+    def unpack_meta(self, mb: bytes):
+        return {"upper": list(mb)}
+
+
+def test_zraw2_roundtrip() -> None:
+    c = CodecZstd()
+    blob = pack_zstd_raw2(b"hello world" * 10, b"\x01\x02", c)
+    assert blob[:5] == ZRAW2_MAGIC
+    assert unpack_zstd_raw2(blob, c) == (b"hello world" * 10, b"\x01\x02")
+
+    with pytest.raises(ValueError, match="ZRAW2 magic"):
+        unpack_zstd_raw2(b"ZRAW1\x00", c)
+
+
+def test_v5_zstd_main_plus_meta_uses_zraw2() -> None:
+    layer = _UpperMetaLayer()
+    codec = CodecZstd()
+    data = b"Hello World, Ciao Mondo"
+
+    payload = encode_v5_payload(data, "upper_test", layer, codec)
+    assert payload[:5] == ZRAW2_MAGIC
+    assert decode_v5_payload(payload, {}, "upper_test", layer, codec) == data
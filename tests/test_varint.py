@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import pytest
+
+from gcc_ocf.core.varint import dec_varint, enc_varint
+
+
+def test_varint_size_classes_roundtrip() -> None:
+    for x in [0, 1, 0x7F, 0x80, 0x3FFF, 0x4000, 0x1FFFFF, 0x200000, 2**35 + 3, 2**64 - 1]:
+        enc = enc_varint(x)
+        assert len(enc) == max(1, (x.bit_length() + 6) // 7)
+        assert dec_varint(b"\x05" + enc, 1) == (x, 1 + len(enc))
+    assert enc_varint(300) == b"\xac\x02"
+
+
+def test_varint_errors_and_custom_messages() -> None:
+    with pytest.raises(ValueError, match="varint negativo"):
+        enc_varint(-1)
+    with pytest.raises(ValueError, match="n < 0"):
+        enc_varint(-1, neg_msg="varint: n < 0")
+    for buf in (b"", b"\x80", b"\xff\xff", b"\xff\xff\xff", b"\xff\xff\xff\xff"):
+        with pytest.raises(ValueError, match="varint troncato"):
+            dec_varint(buf, 0)
+    with pytest.raises(ValueError, match="buffer troncato"):
+        dec_varint(b"\x80", 0, trunc_msg="varint: buffer troncato")
+    with pytest.raises(ValueError, match="overflow"):
+        dec_varint(b"\xff" * 11, 0, big_msg="varint: overflow")
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import pytest
+
+
+def test_vocab_blob_multibyte_lengths() -> None:
+    from gcc_ocf.layers.vocab_blob import pack_vocab_list, unpack_vocab_list
+
+    # lunghezze da 1, 2 e 3 byte di varint (127 / 128 / 16384)
+    toks = [b"a" * 127, b"b" * 128, b"c" * 16384, bytearray(b"xy")]
+    blob = pack_vocab_list(toks)
+    assert blob[:6] == b"VB2\0\x04\x7f"
+    assert unpack_vocab_list(blob) == toks
+    with pytest.raises(ValueError, match="troncato"):
+        unpack_vocab_list(blob[:-1])